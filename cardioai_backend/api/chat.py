@@ -1,17 +1,64 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import asyncio
+import itertools
+import json
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, TypeVar, Union
 
 import httpx
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
 
-from cardioai_backend.schemas import ChatRequest, ChatResponse, Message
+from cardioai_backend.llm.context import get_context_budget
+from cardioai_backend.metrics import histogram
+
+from cardioai_backend.scg.executor import get_executor
+from cardioai_backend.scg.ingest import IngestError, IngestLimitError, parse_observation_stream
+from cardioai_backend.scg.wire import WIRE_FORMAT, decode_observation, is_wire_observation
+from cardioai_backend.schemas import BatchAnalyzeRequest, BatchItem, ChatRequest, ChatResponse, Message, SessionResponse
+from cardioai_backend.services.admission import (
+    PRIORITY_BATCH,
+    PRIORITY_FOLLOW_UP,
+    PRIORITY_MEASUREMENT,
+    AdmissionRejected,
+    request_priority,
+)
+from cardioai_backend.services.circuit_breaker import CircuitOpenError
 from cardioai_backend.services.dr7_llm import Dr7LlmClient
-from cardioai_backend.services.heartscan import HeartscanClient
-from cardioai_backend.utils import get_system_prompt
+from cardioai_backend.services.heartscan import create_heartscan_client
+from cardioai_backend.services.llm_cache import cached_llm_client
+from cardioai_backend.services.sessions import Session, SessionNotFound, SessionStore, get_session_store
+from cardioai_backend.settings import Settings, get_settings
+
+T = TypeVar("T")
 
 router = APIRouter(prefix="/api")
 
+# Keep proxies (nginx, Cloud Run) from buffering the event stream / NDJSON lines.
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+class _ClosingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that always awaits `on_close` once the response ends,
+    also when the client went away before the body was iterated (the body
+    generator's own `finally` never runs then).
+    """
+
+    def __init__(self, content: Any, on_close: Callable[[], Awaitable[Any]], **kwargs: Any) -> None:
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.on_close()
+
 
 def _model_to_dict(m: Message) -> Dict[str, str]:
     # Pydantic v1 uses .dict(); v2 uses .model_dump()
@@ -38,6 +85,14 @@ def parse_math_data(data: Dict[str, Any]) -> str:
 
     timestamps_str = ", ".join(formatted_ts) if formatted_ts else "None"
 
+    quality_str = ""
+    if data.get("signal_quality") is not None:
+        quality_str = (
+            "\n\n[Metric: Signal Quality]\n"
+            "Value: {:.2f} (0 = unusable, 1 = clean)\n"
+            "Description: How clean the recording was (motion, clipping, gaps, strength of the heartbeat signal)."
+        ).format(float(data["signal_quality"]))
+
     return (
         """
 --- CLINICAL MEASUREMENT REPORT ---
@@ -59,7 +114,7 @@ Description: The extrapolated density of abnormal heart rhythm events.
 
 [Metric: Event Timestamps]
 Value: {timestamps_str}
-Description: Precise time markers within the recording when anomalies were identified.
+Description: Precise time markers within the recording when anomalies were identified.{quality_str}
 -----------------------------------
 """.strip()
     ).format(
@@ -69,86 +124,528 @@ Description: Precise time markers within the recording when anomalies were ident
         episodes_count=episodes_count,
         episodes_per_hour=float(episodes_per_hour or 0),
         timestamps_str=timestamps_str,
+        quality_str=quality_str,
+    )
+
+
+MEASUREMENT_ERROR_MESSAGE = (
+    "Data could not be processed. Please perform the measurement again. "
+    "Lie down flat, place the phone in the middle of your chest vertically or under your left breast horizontally, "
+    "and start the measurement for 60 seconds. During the process, the phone will make sounds like a heart monitor."
+)
+
+
+@dataclass
+class _Turn:
+    """A chat turn prepared for the LLM call, shared by /api/chat and /api/chat/stream."""
+
+    clean_history: List[Dict[str, str]]
+    full_messages: List[Dict[str, str]]
+    user_turn: Optional[str] = None
+    # The "measure again" answer: skips the LLM entirely.
+    early_reply: Optional[str] = None
+    session_id: Optional[str] = None
+    # Results Summary of an observation analyzed in this turn.
+    measurement: Optional[str] = None
+
+
+def _session_store() -> SessionStore:
+    store = get_session_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Sessions are disabled ([SESSIONS] ENABLED)")
+    return store
+
+
+async def _in_session_store(call: Callable[[SessionStore], T]) -> T:
+    """Run `call(store)`; with the sqlite tier it does disk I/O, so in a worker thread."""
+    store = _session_store()
+    if store.persistent:
+        return await asyncio.to_thread(call, store)
+    return call(store)
+
+
+async def _load_session(session_id: str) -> Session:
+    try:
+        return await _in_session_store(lambda store: store.get(session_id))
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Unknown or expired session_id; start a new session")
+
+
+def _max_samples() -> int:
+    return get_settings().ingest.max_samples
+
+
+def _decode_wire_observation(observation: Dict[str, Any], data: Optional[bytes] = None) -> Dict[str, Any]:
+    """Compact-encoded observation (`scg/wire.py`) -> observation with SampleColumns; 413/422 on bad input."""
+    try:
+        return decode_observation(observation, data, max_samples=_max_samples())
+    except IngestLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except IngestError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+async def assess_observation_quality(observation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Local signal-quality report for the observation's samples
+    (`scg/quality.py`), or None when the gate is disabled or there are no samples.
+    """
+    if not get_settings().quality_gate:
+        return None
+    try:
+        from cardioai_backend.scg.peak_detection import observation_samples
+        from cardioai_backend.scg.quality import assess_quality, load_quality_thresholds
+
+        samples = observation_samples(observation)
+    except (ImportError, ValueError):
+        return None
+    executor = get_executor()
+    if executor is not None:
+        return await executor.run(assess_quality, samples, load_quality_thresholds(), size=len(samples))
+    return assess_quality(samples, load_quality_thresholds())
+
+
+@dataclass
+class _Observation:
+    """The local part of the pipeline: a decoded observation and its signal-quality report."""
+
+    data: Dict[str, Any]
+    quality: Optional[Dict[str, Any]] = None
+
+
+async def _preprocess(request: ChatRequest) -> Optional[_Observation]:
+    """Decode and quality-check the request's observation locally, without upstream calls; None without one."""
+    observation = request.observation
+    if observation and is_wire_observation(observation):
+        observation = _decode_wire_observation(observation)
+    if not observation:
+        return None
+    return _Observation(observation, await assess_observation_quality(observation))
+
+
+async def _prepare_chat(
+    request: ChatRequest,
+    settings: Settings,
+    *,
+    preprocessed: Optional[_Observation] = None,
+    priority: Optional[int] = None,
+) -> _Turn:
+    """
+    Everything before the LLM call, shared by /api/chat and /api/chat/stream:
+    load the session, decode, quality-gate and analyze the observation, then
+    build the prompt within the context budget.
+
+    With `session_id` the history and the latest Results Summary come from
+    the server-side session; otherwise from the request. `preprocessed` is
+    the result of `_preprocess(request)` when the caller already ran it.
+    """
+    system_prompt = settings.system_prompt
+    if not system_prompt:
+        raise RuntimeError(
+            "Missing SYSTEM_PROMPT in cardioai_backend/config.ini (section [DEFAULT])."
+        )
+
+    # Upstream queues serve follow-up turns before new measurements.
+    if priority is None:
+        priority = PRIORITY_MEASUREMENT if request.observation else PRIORITY_FOLLOW_UP
+    request_priority.set(priority)
+
+    session: Optional[Session] = None
+    if request.session_id:
+        if request.history:
+            raise HTTPException(status_code=422, detail="Send either session_id or history, not both")
+        session = await _load_session(request.session_id)
+        clean_history = session.history
+    else:
+        clean_history = [_model_to_dict(m) for m in (request.history or []) if m.role != "system"]
+    full_messages: List[Dict[str, str]] = [{"role": "system", "content": system_prompt}]
+    turn = _Turn(clean_history, full_messages, session_id=session.id if session else None)
+
+    if preprocessed is None:
+        preprocessed = await _preprocess(request)
+    observation = preprocessed.data if preprocessed else None
+
+    if preprocessed is not None:
+        # Hopeless recordings are rejected here, before paying for Heartscan and the LLM.
+        quality = preprocessed.quality
+        if quality is not None and not quality["usable"]:
+            turn.user_turn, turn.early_reply = request.message, MEASUREMENT_ERROR_MESSAGE
+            return turn
+
+        math_client = create_heartscan_client(cached=True)
+        try:
+            math_data = await math_client.analyze(observation)
+        except (CircuitOpenError, AdmissionRejected) as e:
+            raise _unavailable("Math API", e)
+        except httpx.HTTPStatusError as e:  # type: ignore[name-defined]
+            raise HTTPException(status_code=e.response.status_code, detail=f"Math API Error: {e.response.text}")
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"Math API Error: {str(e)}")
+
+        if not math_data.get("avg_bpm") or math_data.get("avg_bpm") == 0:
+            turn.user_turn, turn.early_reply = request.message, MEASUREMENT_ERROR_MESSAGE
+            return turn
+        if quality is not None:
+            math_data = dict(math_data, signal_quality=quality["score"])
+
+        turn.measurement = "User just performed a heart rhythm measurement. Results Summary:\n" + parse_math_data(math_data)
+
+    summary = turn.measurement or (session.measurement if session else None)
+    if summary:
+        full_messages.append({"role": "system", "content": summary})
+    full_messages.extend(clean_history)
+
+    turn.user_turn = request.message or ("Analyze my heart rhythm measurement." if observation else None)
+    if turn.user_turn:
+        full_messages.append({"role": "user", "content": turn.user_turn})
+    # Long conversations: older turns are folded into a rolling summary ([CONTEXT]).
+    turn.full_messages = await get_context_budget().compact(full_messages)
+    return turn
+
+
+async def _reply(turn: _Turn, ai_response: str) -> Dict[str, Any]:
+    """ChatResponse fields; in session mode the new messages are stored instead of returned."""
+    new_messages = [{"role": "user", "content": turn.user_turn}] if turn.user_turn else []
+    new_messages.append({"role": "assistant", "content": ai_response})
+    session_id = turn.session_id
+    if session_id is None:
+        return {"response": ai_response, "history": turn.clean_history + new_messages}
+    try:
+        await _in_session_store(lambda store: store.append(session_id, new_messages, measurement=turn.measurement))
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Unknown or expired session_id; start a new session")
+    return {"response": ai_response, "session_id": session_id}
+
+
+def _llm_client(turn: _Turn, settings: Settings) -> Any:
+    """Dr7 client for this turn; first turns about a new observation may be answered from `[LLM_CACHE]`."""
+    request_class = "initial_analysis" if turn.measurement and not turn.clean_history else "follow_up"
+    return cached_llm_client(Dr7LlmClient(settings=settings.dr7), request_class, settings.system_prompt)
+
+
+def _unavailable(api: str, e: Union[CircuitOpenError, AdmissionRejected]) -> HTTPException:
+    """
+    Open breaker (503) or no upstream slot (429 queue full / 503 wait deadline):
+    answered right away, with Retry-After for when trying again makes sense.
+    """
+    status_code = e.status_code if isinstance(e, AdmissionRejected) else 503
+    return HTTPException(
+        status_code=status_code, detail=f"{api} Error: {str(e)}", headers={"Retry-After": str(math.ceil(e.retry_after_s))}
     )
 
 
-@router.post("/chat", response_model=ChatResponse)
+def _llm_error(e: Exception) -> HTTPException:
+    if isinstance(e, (CircuitOpenError, AdmissionRejected)):
+        return _unavailable("LLM API", e)
+    if isinstance(e, httpx.HTTPStatusError):
+        return HTTPException(status_code=e.response.status_code, detail=f"LLM API Error: {e.response.text}")
+    return HTTPException(status_code=502, detail=f"LLM API Error: {str(e)}")
+
+
+@router.post("/chat", response_model=ChatResponse, response_model_exclude_none=True)
 async def chat(request: ChatRequest) -> Dict[str, Any]:
     """
     Canonical production endpoint.
     Accepts either:
       - message + history
       - observation (raw SCG accelerometer payload) + optional message/history
+
+    The observation may be a JSON sample list or the compact column encoding
+    from `scg/wire.py` (base64 float32/int16 columns, delta timestamps, gzip/zstd).
     """
     try:
-        system_prompt = get_system_prompt()
-        if not system_prompt:
-            raise RuntimeError(
-                "Missing SYSTEM_PROMPT in cardioai_backend/config.ini (section [DEFAULT])."
-            )
-
-        clean_history: List[Dict[str, str]] = [
-            _model_to_dict(m) for m in (request.history or []) if m.role != "system"
-        ]
-        full_messages: List[Dict[str, str]] = [{"role": "system", "content": system_prompt}]
-
-        if request.observation:
-            math_client = HeartscanClient()
-            try:
-                math_data = await math_client.analyze(request.observation)
-            except httpx.HTTPStatusError as e:  # type: ignore[name-defined]
-                raise HTTPException(status_code=e.response.status_code, detail=f"Math API Error: {e.response.text}")
-            except Exception as e:
-                raise HTTPException(status_code=502, detail=f"Math API Error: {str(e)}")
-
-            if not math_data.get("avg_bpm") or math_data.get("avg_bpm") == 0:
-                error_msg = (
-                    "Data could not be processed. Please perform the measurement again. "
-                    "Lie down flat, place the phone in the middle of your chest vertically or under your left breast horizontally, "
-                    "and start the measurement for 60 seconds. During the process, the phone will make sounds like a heart monitor."
-                )
-
-                new_history = list(clean_history)
-                if request.message:
-                    new_history.append({"role": "user", "content": request.message})
-                new_history.append({"role": "assistant", "content": error_msg})
-
-                return {"response": error_msg, "history": new_history}
-
-            full_messages.append(
-                {
-                    "role": "system",
-                    "content": "User just performed a heart rhythm measurement. Results Summary:\n"
-                    + parse_math_data(math_data),
-                }
-            )
-
-        full_messages.extend(clean_history)
-
-        if request.message:
-            full_messages.append({"role": "user", "content": request.message})
-        elif request.observation:
-            full_messages.append({"role": "user", "content": "Analyze my heart rhythm measurement."})
-
-        llm_client = Dr7LlmClient()
-        try:
-            ai_response = await llm_client.chat(full_messages)
-        except httpx.HTTPStatusError as e:  # type: ignore[name-defined]
-            raise HTTPException(status_code=e.response.status_code, detail=f"LLM API Error: {e.response.text}")
-        except Exception as e:
-            raise HTTPException(status_code=502, detail=f"LLM API Error: {str(e)}")
+        return await _chat_reply(request, get_settings())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _chat_reply(request: ChatRequest, settings: Settings, **prepare: Any) -> Dict[str, Any]:
+    """One complete /api/chat turn; `prepare` is passed on to `_prepare_chat`."""
+    turn = await _prepare_chat(request, settings, **prepare)
+    if turn.early_reply is not None:
+        return await _reply(turn, turn.early_reply)
+
+    llm_client = _llm_client(turn, settings)
+    try:
+        ai_response = await llm_client.chat(turn.full_messages)
+    except Exception as e:
+        raise _llm_error(e)
 
-        new_history = list(clean_history)
-        if request.message:
-            new_history.append({"role": "user", "content": request.message})
-        elif request.observation:
-            new_history.append({"role": "user", "content": "Analyze my heart rhythm measurement."})
-        new_history.append({"role": "assistant", "content": ai_response})
+    return await _reply(turn, ai_response)
 
-        return {"response": ai_response, "history": new_history}
 
+def _sse(event: str, data: Dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+async def _sse_chat_events(
+    first: str,
+    deltas: AsyncIterator[str],
+    turn: _Turn,
+    t0: float,
+    ttft_ms: float,
+) -> AsyncIterator[bytes]:
+    parts = [first]
+    try:
+        if first:
+            yield _sse("delta", {"content": first})
+        async for delta in deltas:
+            parts.append(delta)
+            yield _sse("delta", {"content": delta})
+    except Exception as e:
+        # Headers (200) are already sent: report the failure in-band.
+        yield _sse("error", {"detail": f"LLM API Error: {str(e)}"})
+        return
+    finally:
+        await deltas.aclose()  # type: ignore[attr-defined]
+    histogram("chat.stream_ms").observe((time.perf_counter() - t0) * 1000.0)
+    try:
+        done = await _reply(turn, "".join(parts))
+    except HTTPException as e:
+        yield _sse("error", {"detail": e.detail})
+        return
+    yield _sse("done", dict(done, ttft_ms=round(ttft_ms, 1)))
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """
+    Same request as POST /api/chat; the reply is streamed as Server-Sent
+    Events while Dr7 generates it: `delta` events ({"content"}) and a final
+    `done` event with the ChatResponse fields (`response`, `history`) plus
+    `ttft_ms`. Failures before the first token keep their HTTP status; later
+    ones arrive as an `error` event.
+    """
+    t0 = time.perf_counter()
+    try:
+        settings = get_settings()
+        turn = await _prepare_chat(request, settings)
+        if turn.early_reply is not None:
+            early = await _reply(turn, turn.early_reply)
+            ttft_ms = (time.perf_counter() - t0) * 1000.0
+            body = [_sse("delta", {"content": early["response"]}), _sse("done", dict(early, ttft_ms=round(ttft_ms, 1)))]
+            return StreamingResponse(iter(body), media_type="text/event-stream", headers=SSE_HEADERS)
+
+        deltas = _llm_client(turn, settings).stream_chat(turn.full_messages)
+        # Wait for the first token before committing to 200, so upstream errors keep their status code.
+        try:
+            first = await deltas.__anext__()
+        except StopAsyncIteration:
+            first = ""
+        except Exception as e:
+            raise _llm_error(e)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    ttft_ms = (time.perf_counter() - t0) * 1000.0
+    histogram("chat.ttft_ms").observe(ttft_ms)
+    # `deltas` holds a Dr7 admission slot and breaker guard until closed.
+    return _ClosingStreamingResponse(
+        _sse_chat_events(first, deltas, turn, t0, ttft_ms),
+        deltas.aclose,  # type: ignore[attr-defined]
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.post("/chat/upload", response_model=ChatResponse, response_model_exclude_none=True)
+async def chat_upload(request: Request) -> Dict[str, Any]:
+    """
+    Same contract as POST /api/chat, for large observation uploads.
+
+    The body is parsed incrementally: `az_data_array` samples go straight into
+    columnar arrays instead of a dict per sample, and size limits from
+    [INGEST] are enforced while reading.
+
+    A multipart/form-data body carries the compact encoding instead: a
+    `request` field with the usual JSON (observation = wire header without
+    `data`) and an `observation` part with the raw column bytes.
+    """
+    max_body_bytes = get_settings().ingest.max_body_bytes
+    max_samples = _max_samples()
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_body_bytes:
+        raise HTTPException(status_code=413, detail=f"Request body exceeds {max_body_bytes} bytes")
+
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        body = await _read_multipart_chat(request, max_body_bytes)
+        try:
+            chat_request = ChatRequest(**body)
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return await chat(chat_request)
+
+    try:
+        body = await parse_observation_stream(
+            request.stream(), max_body_bytes=max_body_bytes, max_samples=max_samples
+        )
+    except IngestLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except IngestError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        chat_request = ChatRequest(**body)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return await chat(chat_request)
+
+
+async def _read_multipart_chat(request: Request, max_body_bytes: int) -> Dict[str, Any]:
+    try:
+        form = await request.form(max_files=1, max_fields=4, max_part_size=max_body_bytes)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid multipart body: {e}")
+    try:
+        body = json.loads(str(form.get("request") or "{}"))
+        if not isinstance(body, dict):
+            raise ValueError("'request' must be a JSON object")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid 'request' field: {e}")
+
+    part = form.get("observation")
+    header = body.get("observation")
+    if part is not None and not isinstance(part, str):
+        if not is_wire_observation(header):
+            raise HTTPException(status_code=422, detail=f"'observation' part needs a {WIRE_FORMAT} header in 'request'")
+        body["observation"] = _decode_wire_observation(header, await part.read())
+    return body
+
+
+def _ndjson(data: Dict[str, Any]) -> bytes:
+    return (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _preprocess_slots() -> int:
+    """Batch items decoded and quality-checked at once: one per processing worker."""
+    executor = get_executor()
+    if executor is None or executor.mode == "inline":
+        return 1  # runs on the event loop anyway
+    return executor.thread_workers + (executor.workers if executor.mode == "process" else 0)
+
+
+async def _analyze_item(
+    index: int, item: BatchItem, settings: Settings, local: asyncio.Semaphore, upstream: asyncio.Semaphore
+) -> Dict[str, Any]:
+    """Result line of one item; failures become an error line instead of ending the batch."""
+    t0 = time.perf_counter()
+    line: Dict[str, Any] = {"index": index}
+    if item.id is not None:
+        line["id"] = item.id
+    try:
+        # Decoding and the quality gate run `local` items at a time (on the processing
+        # pool); Heartscan and the LLM are limited to `upstream` items at a time.
+        async with local:
+            preprocessed = await _preprocess(item)
+        async with upstream:
+            result = await _chat_reply(item, settings, preprocessed=preprocessed, priority=PRIORITY_BATCH)
+        line.update(status=200, result={k: v for k, v in result.items() if v is not None})
+    except HTTPException as e:
+        line.update(status=e.status_code, error=e.detail)
+    except Exception as e:
+        line.update(status=500, error=str(e))
+    histogram("batch.item_ms").observe((time.perf_counter() - t0) * 1000.0)
+    return line
+
+
+async def _batch_lines(items: List[BatchItem], settings: Settings, concurrency: int) -> AsyncIterator[bytes]:
+    t0 = time.perf_counter()
+    slots = _preprocess_slots()
+    local, upstream = asyncio.Semaphore(slots), asyncio.Semaphore(concurrency)
+    # Only as many items are started as can make progress; the rest stay
+    # undecoded until one finishes, so a large batch does not sit in memory.
+    pending = iter(enumerate(items))
+    running: Set["asyncio.Task[Dict[str, Any]]"] = set()
+    emitted = succeeded = 0
+    try:
+        while True:
+            for i, item in itertools.islice(pending, slots + concurrency - len(running)):
+                running.add(asyncio.create_task(_analyze_item(i, item, settings, local, upstream)))
+            if not running:
+                break
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                line = task.result()
+                if emitted == 0:
+                    histogram("batch.first_result_ms").observe((time.perf_counter() - t0) * 1000.0)
+                emitted += 1
+                succeeded += line["status"] == 200
+                yield _ndjson(line)
+        yield _ndjson(
+            {
+                "done": True,
+                "total": len(items),
+                "succeeded": succeeded,
+                "failed": len(items) - succeeded,
+                "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+            }
+        )
+    finally:
+        # The client went away: stop the items still running and wait for them to unwind.
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+@router.post("/analyze/batch")
+async def analyze_batch(request: BatchAnalyzeRequest) -> StreamingResponse:
+    """
+    Many observations in one request (e.g. a clinic's day of measurements),
+    each analyzed like POST /api/chat. Results stream back as NDJSON, one
+    line per item in completion order (`index`, `id`, `status` and `result`
+    or `error`), then a summary line with `done: true`. A failed item does
+    not stop the others. At most [BATCH] CONCURRENCY items call the
+    upstreams at once, behind interactive requests in the upstream queues.
+    """
+    items = request.items
+    settings = get_settings()
+    max_items = settings.batch.max_items
+    if not items:
+        raise HTTPException(status_code=422, detail="'items' is empty")
+    if len(items) > max_items:
+        raise HTTPException(status_code=413, detail=f"At most {max_items} items per batch ([BATCH] MAX_ITEMS)")
+    missing = [i for i, item in enumerate(items) if not item.observation]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Items without an observation: {missing[:20]}")
+
+    return StreamingResponse(
+        _batch_lines(items, settings, settings.batch.concurrency),
+        media_type="application/x-ndjson",
+        headers=SSE_HEADERS,
+    )
+
+
+def _session_response(session: Session) -> Dict[str, Any]:
+    return {
+        "session_id": session.id,
+        "history": session.history,
+        "measurement": session.measurement,
+        "expires_in_s": round(max(0.0, session.expires - time.time()), 1),
+    }
+
+
+@router.post("/sessions", response_model=SessionResponse, status_code=201)
+async def create_session() -> Dict[str, Any]:
+    """
+    Start a server-side conversation. Chat requests with its `session_id`
+    send only the new message (and optionally an observation); the history
+    and the latest Results Summary are kept here, bounded by [SESSIONS].
+    """
+    return _session_response(await _in_session_store(lambda store: store.create()))
+
+
+@router.get("/sessions/{session_id}", response_model=SessionResponse)
+async def get_session(session_id: str) -> Dict[str, Any]:
+    """Stored history of a session, e.g. to redraw the conversation after an app restart."""
+    return _session_response(await _load_session(session_id))
+
+
+@router.delete("/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str) -> None:
+    if not await _in_session_store(lambda store: store.delete(session_id)):
+        raise HTTPException(status_code=404, detail="Unknown or expired session_id")
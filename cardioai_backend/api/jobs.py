@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException, Response
+
+from cardioai_backend.api.chat import chat
+from cardioai_backend.schemas import ChatRequest, JobResponse
+from cardioai_backend.services.jobs import Job, JobError, JobNotFound, JobQueueFull, JobRunner, get_job_runner
+
+router = APIRouter(prefix="/api")
+
+
+def _job_runner() -> JobRunner:
+    runner = get_job_runner()
+    if runner is None:
+        raise HTTPException(status_code=404, detail="Analysis jobs are disabled ([JOBS] ENABLED)")
+    return runner
+
+
+def _job_response(job: Job) -> Dict[str, Any]:
+    body: Dict[str, Any] = {"job_id": job.id, "status": job.status, "result": job.result, "error": job.error}
+    if job.started is not None:
+        body["queue_ms"] = round((job.started - job.created) * 1000.0, 1)
+    if job.started is not None and job.finished is not None:
+        body["run_ms"] = round((job.finished - job.started) * 1000.0, 1)
+    if job.is_finished:
+        body["expires_in_s"] = round(max(0.0, job.expires - time.time()), 1)
+    return body
+
+
+@router.post("/analyze", response_model=JobResponse, response_model_exclude_none=True, status_code=202)
+async def analyze(request: ChatRequest, response: Response) -> Dict[str, Any]:
+    """
+    Same request as POST /api/chat with an observation, answered at once
+    with a job id: the analysis (Heartscan + LLM) runs in the background, so
+    no HTTP request has to stay open for it. Poll GET /api/jobs/{job_id}.
+    """
+    if not request.observation:
+        raise HTTPException(status_code=422, detail="POST /api/analyze needs an observation; use /api/chat for messages")
+    runner = _job_runner()
+
+    async def run() -> Dict[str, Any]:
+        try:
+            return await chat(request)
+        except HTTPException as e:
+            raise JobError(e.status_code, e.detail)
+
+    try:
+        job = runner.submit(run)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after_s))})
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return _job_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse, response_model_exclude_none=True)
+async def get_job(job_id: str, wait: float = 0.0) -> Dict[str, Any]:
+    """
+    State of an analysis job; `result` holds the ChatResponse once `done`,
+    `error` the HTTP status and detail /api/chat would have answered once
+    `failed`. With `wait` (seconds, capped by [JOBS] MAX_WAIT_S) the request
+    is held until the job finishes: long-poll.
+    """
+    try:
+        return _job_response(await _job_runner().wait(job_id, wait))
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Unknown or expired job_id")
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi import APIRouter
+
+from cardioai_backend.llm.context import get_context_budget
+from cardioai_backend.metrics import metrics_snapshot
+from cardioai_backend.scg.cache import get_metrics_cache
+from cardioai_backend.scg.executor import get_executor
+from cardioai_backend.services.admission import admission_stats
+from cardioai_backend.services.circuit_breaker import breaker_stats
+from cardioai_backend.services.heartscan import fallback_stats, get_hedge_policy
+from cardioai_backend.services.jobs import get_job_runner
+from cardioai_backend.services.llm_cache import get_llm_cache
+from cardioai_backend.services.sessions import get_session_store
+from cardioai_backend.services.single_flight import flight_stats
+from cardioai_backend.services.http_clients import get_http_clients
+from cardioai_backend.settings import get_settings_store
+
+router = APIRouter(prefix="/api/status")
+
+
+@router.get("/executor")
+async def executor_status() -> Dict[str, Any]:
+    """Queue depth and job latency of the local processing pools."""
+    executor = get_executor()
+    if executor is None:
+        return {"mode": "inline", "started": False}
+    return {"started": executor.started, **executor.stats()}
+
+
+@router.get("/cache")
+async def cache_status() -> Dict[str, Any]:
+    """Size and hit/miss counters of the measurement metrics cache."""
+    cache = get_metrics_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/llm_cache")
+async def llm_cache_status() -> Dict[str, Any]:
+    """Opted-in request classes and hit/miss counters of the LLM response cache."""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/http")
+async def http_status() -> Dict[str, Any]:
+    """Connection pool utilisation and reuse of the shared upstream clients."""
+    registry = get_http_clients()
+    if registry is None or not registry.started:
+        return {"started": False}
+    return {"started": True, "upstreams": registry.stats()}
+
+
+@router.get("/config")
+async def config_status() -> Dict[str, Any]:
+    """config.ini hot-reload state; `last_error` is set while an edit fails validation."""
+    return get_settings_store().stats()
+
+
+@router.get("/metrics")
+async def latency_metrics() -> Dict[str, Any]:
+    """Latency histograms (ms): time to first token of streamed replies, ..."""
+    return metrics_snapshot()
+
+
+@router.get("/heartscan")
+async def heartscan_status() -> Dict[str, Any]:
+    """
+    Hedging of remote Heartscan calls (current hedge delay, budget, hedges,
+    retries) and, in local_fallback mode, how the local attempts ended.
+    """
+    return {**get_hedge_policy().stats(), "local_fallback": fallback_stats()}
+
+
+@router.get("/breakers")
+async def breaker_status() -> Dict[str, Any]:
+    """Circuit breaker per upstream: state, recent failure / slow-call rates, trips and rejections."""
+    return breaker_stats()
+
+
+@router.get("/single_flight")
+async def single_flight_status() -> Dict[str, Any]:
+    """Coalescing of identical concurrent upstream calls: calls made, duplicates that joined one, cancellations."""
+    return flight_stats()
+
+
+@router.get("/sessions")
+async def session_status() -> Dict[str, Any]:
+    """Server-side conversation sessions: count, stored messages, expirations and evictions."""
+    store = get_session_store()
+    if store is None:
+        return {"enabled": False}
+    return {"enabled": True, **store.stats()}
+
+
+@router.get("/context")
+async def context_status() -> Dict[str, Any]:
+    """Prompt compaction: prompts over budget, rolling summaries computed vs reused."""
+    return get_context_budget().stats()
+
+
+@router.get("/admission")
+async def admission_status() -> Dict[str, Any]:
+    """Upstream concurrency limits: calls in flight, queue depth, rejections and queue wait (ms)."""
+    return admission_stats()
+
+
+@router.get("/jobs")
+async def jobs_status() -> Dict[str, Any]:
+    """Background analysis jobs: queue depth, running, outcomes, queue wait and submit-to-result latency (ms)."""
+    runner = get_job_runner()
+    if runner is None:
+        return {"enabled": False}
+    return {"enabled": True, **runner.stats()}
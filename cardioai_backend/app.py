@@ -1,11 +1,45 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from cardioai_backend.api.chat import router as chat_router
+from cardioai_backend.api.jobs import router as jobs_router
+from cardioai_backend.api.status import router as status_router
+from cardioai_backend.scg.executor import create_processing_executor, set_executor
+from cardioai_backend.services.http_clients import create_http_clients, set_http_clients
+from cardioai_backend.services.jobs import get_job_runner
+from cardioai_backend.settings import get_settings_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Fail fast on a bad config.ini instead of on the first request.
+    app.state.settings = get_settings_store().reload().validate()
+    executor = create_processing_executor(app.state.settings.executor)
+    executor.start()
+    set_executor(executor)
+    app.state.processing_executor = executor
+    http_clients = create_http_clients()
+    http_clients.start()
+    set_http_clients(http_clients)
+    app.state.http_clients = http_clients
+    try:
+        yield
+    finally:
+        # Background analyses still need the upstream clients: stop them first.
+        job_runner = get_job_runner()
+        if job_runner is not None:
+            await job_runner.aclose()
+        set_http_clients(None)
+        await http_clients.aclose()
+        set_executor(None)
+        executor.shutdown()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
     # Enable CORS for frontend
     app.add_middleware(
@@ -17,5 +51,6 @@ def create_app() -> FastAPI:
     )
 
     app.include_router(chat_router)
+    app.include_router(jobs_router)
+    app.include_router(status_router)
     return app
-
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from cardioai_backend.metrics import histogram
+from cardioai_backend.services.dr7_llm import Dr7LlmClient
+from cardioai_backend.services.single_flight import get_flight
+from cardioai_backend.settings import Configured, ContextSettings, Settings
+
+# Chat-format overhead per message (role, separators), in tokens.
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+_WORD = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+Summarizer = Callable[[Optional[str], List[Dict[str, str]], int], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local token estimate, no tokenizer download: the larger of ~4 characters
+    per token (English prose) and ~0.75 words/punctuation marks per token
+    (short words, numbers, non-English text split into more pieces).
+    """
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), math.ceil(len(_WORD.findall(text)) * 4 / 3))
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+def prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+def _prefix_digests(history: List[Dict[str, str]]) -> List[str]:
+    """digests[k] identifies history[:k] (running hash, one pass)."""
+    h = hashlib.blake2b(digest_size=16)
+    digests = [h.hexdigest()]
+    for m in history:
+        h.update(f"{m['role']}\0{m['content']}\0".encode())
+        digests.append(h.hexdigest())
+    return digests
+
+
+def local_summary(previous: Optional[str], messages: List[Dict[str, str]], max_tokens: int) -> str:
+    """Extractive fallback: the previous summary plus the first sentence of each folded message."""
+    lines = [previous] if previous else []
+    for m in messages:
+        first = re.split(r"(?<=[.!?])\s", m["content"].strip(), maxsplit=1)[0]
+        lines.append(f"- {m['role']}: {first[:100]}")
+    text = "\n".join(lines)
+    while lines and estimate_tokens(text) > max_tokens:
+        lines.pop(0)  # the oldest lines go first
+        text = "\n".join(lines)
+    return text
+
+
+class ContextBudget:
+    """
+    Keeps prompts within `max_prompt_tokens`.
+
+    Leading system messages (system prompt, measurement summary) and the new
+    user turn are always kept, as are the last `keep_recent_messages` history
+    messages. Older turns are folded into a rolling summary, inserted as a
+    system message. Summaries are cached by the exact folded prefix; a
+    longer conversation extends the longest cached prefix instead of
+    re-summarizing from scratch, and the fold point only moves once the
+    prompt outgrows the budget again (it is cut back to `low_watermark`).
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        max_prompt_tokens: int = 6000,
+        keep_recent_messages: int = 6,
+        summary_max_tokens: int = 400,
+        low_watermark: float = 0.7,
+        summarizer: Optional[Summarizer] = None,
+        cache_entries: int = 1024,
+    ) -> None:
+        self.enabled = enabled
+        self.max_prompt_tokens = max_prompt_tokens
+        self.keep_recent_messages = max(0, keep_recent_messages)
+        self.summary_max_tokens = summary_max_tokens
+        self.low_watermark = low_watermark
+        self.summarizer = summarizer
+        self.cache_entries = cache_entries
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.compacted = 0
+        self.summaries_computed = 0
+        self.summary_hits = 0
+        self.summary_failures = 0
+
+    def configure(self, settings: ContextSettings, summarizer: Optional[Summarizer]) -> None:
+        """Apply reloaded settings; cached summaries are kept."""
+        self.enabled = settings.enabled
+        self.max_prompt_tokens = settings.max_prompt_tokens
+        self.keep_recent_messages = max(0, settings.keep_recent_messages)
+        self.summary_max_tokens = settings.summary_max_tokens
+        self.low_watermark = settings.low_watermark
+        self.summarizer = summarizer
+
+    def _cached(self, digest: str) -> Optional[str]:
+        with self._lock:
+            summary = self._summaries.get(digest)
+            if summary is not None:
+                self._summaries.move_to_end(digest)
+            return summary
+
+    def _remember(self, digest: str, summary: str) -> None:
+        with self._lock:
+            self._summaries[digest] = summary
+            self._summaries.move_to_end(digest)
+            while len(self._summaries) > self.cache_entries:
+                self._summaries.popitem(last=False)
+
+    async def _summarize(self, previous: Optional[str], folded: List[Dict[str, str]]) -> Tuple[str, bool]:
+        """(summary, cacheable): a failed summarizer falls back to `local_summary`, which is not cached."""
+        if self.summarizer is None:
+            return local_summary(previous, folded, self.summary_max_tokens), True
+        try:
+            return await self.summarizer(previous, folded, self.summary_max_tokens), True
+        except Exception:
+            self.summary_failures += 1
+            return local_summary(previous, folded, self.summary_max_tokens), False
+
+    async def compact(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """`messages` (system..., history..., [user turn]) within the budget; records prompt-size histograms."""
+        self.prompts += 1
+        sizes = [message_tokens(m) for m in messages]
+        total = sum(sizes)
+        histogram("llm.prompt_tokens").observe(total)
+        result = await self._compact(messages, sizes, total) if self.enabled and total > self.max_prompt_tokens else messages
+        histogram("llm.prompt_tokens_compacted").observe(total if result is messages else prompt_tokens(result))
+        return result
+
+    async def _compact(self, messages: List[Dict[str, str]], sizes: List[int], total: int) -> List[Dict[str, str]]:
+        start = 0
+        while start < len(messages) and messages[start]["role"] == "system":
+            start += 1
+        end = len(messages) - 1 if len(messages) > start and messages[-1]["role"] == "user" else len(messages)
+        head, history, tail = messages[:start], messages[start:end], messages[end:]
+        hist_sizes = sizes[start:end]
+        # suffix[k] = tokens of history[k:]
+        suffix = [0] * (len(history) + 1)
+        for i in range(len(history) - 1, -1, -1):
+            suffix[i] = suffix[i + 1] + hist_sizes[i]
+        fixed = total - suffix[0] + self.summary_max_tokens + MESSAGE_OVERHEAD_TOKENS + estimate_tokens(SUMMARY_PREFIX)
+
+        # Fold only at turn boundaries (the kept history starts with a user message).
+        latest_cut = max(0, len(history) - self.keep_recent_messages)
+        cuts = [k for k in range(1, latest_cut + 1) if k == len(history) or history[k]["role"] == "user"]
+        if not cuts:
+            return messages
+        digests = _prefix_digests(history)
+
+        reuse = next((k for k in reversed(cuts) if self._cached(digests[k]) is not None), 0)
+        if reuse and fixed + suffix[reuse] <= self.max_prompt_tokens:
+            cut = reuse
+        else:
+            target = self.low_watermark * self.max_prompt_tokens
+            cut = next((k for k in cuts if k >= reuse and fixed + suffix[k] <= target), cuts[-1])
+        if cut == reuse:
+            # The cached summary still fits, or nothing more may be folded (best effort).
+            self.summary_hits += 1
+            summary = self._cached(digests[reuse]) or ""
+        else:
+            previous = self._cached(digests[reuse]) if reuse else None
+
+            async def summarize() -> str:
+                summary, cacheable = await self._summarize(previous, history[reuse:cut])
+                if cacheable:
+                    self._remember(digests[cut], summary)
+                self.summaries_computed += 1
+                return summary
+
+            # Concurrent requests folding the same prefix share one summary.
+            summary = await get_flight("summary").do(digests[cut], summarize)
+
+        self.compacted += 1
+        return head + [{"role": "system", "content": SUMMARY_PREFIX + summary}] + history[cut:] + tail
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "keep_recent_messages": self.keep_recent_messages,
+            "prompts": self.prompts,
+            "compacted": self.compacted,
+            "summaries_computed": self.summaries_computed,
+            "summary_hits": self.summary_hits,
+            "summary_failures": self.summary_failures,
+            "cached_summaries": len(self._summaries),
+        }
+
+
+SUMMARY_INSTRUCTIONS = (
+    "You condense the earlier part of a conversation between a user and a heart-health assistant. "
+    "Merge the previous summary (if any) with the new messages into one plain-text summary of at most {words} words. "
+    "Keep measurements, symptoms, medications, advice already given and open questions; drop greetings and repetition."
+)
+
+
+def llm_summarizer(client_factory: Callable[[int], Any]) -> Summarizer:
+    """Summarizer calling the chat model; `client_factory(max_tokens)` builds the client."""
+
+    async def summarize(previous: Optional[str], messages: List[Dict[str, str]], max_tokens: int) -> str:
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        prompt = (f"Previous summary:\n{previous}\n\n" if previous else "") + f"New messages:\n{transcript}"
+        client = client_factory(max_tokens)
+        return str(
+            await client.chat(
+                [
+                    {"role": "system", "content": SUMMARY_INSTRUCTIONS.format(words=int(max_tokens * 0.7))},
+                    {"role": "user", "content": prompt},
+                ]
+            )
+        ).strip()
+
+    return summarize
+
+
+def _dr7_client(max_tokens: int) -> Any:
+    return Dr7LlmClient(max_tokens=max_tokens, temperature=0.2)
+
+
+def _summarizer(settings: ContextSettings) -> Optional[Summarizer]:
+    return llm_summarizer(_dr7_client) if settings.summarizer == "llm" else None
+
+
+def create_context_budget(settings: ContextSettings) -> ContextBudget:
+    """Budget configured in `[CONTEXT]`; `SUMMARIZER = llm` (Dr7) or `local` (extractive, no extra call)."""
+    return ContextBudget(
+        enabled=settings.enabled,
+        max_prompt_tokens=settings.max_prompt_tokens,
+        keep_recent_messages=settings.keep_recent_messages,
+        summary_max_tokens=settings.summary_max_tokens,
+        low_watermark=settings.low_watermark,
+        summarizer=_summarizer(settings),
+    )
+
+
+def _retune(budget: ContextBudget, settings: Settings, _: Any) -> None:
+    budget.configure(settings.context, _summarizer(settings.context))
+
+
+# Built from the snapshot on first use and re-tuned when config.ini changes
+_current: Configured[ContextBudget] = Configured(lambda settings, _: create_context_budget(settings.context), _retune)
+
+
+def get_context_budget() -> ContextBudget:
+    """Process-wide budget, created from `[CONTEXT]` on first use."""
+    return _current.get()
+
+
+def set_context_budget(budget: ContextBudget) -> None:
+    _current.set(budget)
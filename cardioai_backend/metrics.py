@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Any, Deque, Dict
+
+_WINDOW = 1024
+
+
+def _percentile(sorted_xs: list, q: float) -> float:
+    if not sorted_xs:
+        return 0.0
+    return sorted_xs[min(len(sorted_xs) - 1, int(round((len(sorted_xs) - 1) * q)))]
+
+
+class Histogram:
+    """
+    Rolling window of the last `window` observations (latencies in ms, sizes
+    in tokens, ...) plus lifetime count and sum; `snapshot()` gives
+    p50/p95/p99/max over the window.
+    """
+
+    def __init__(self, window: int = _WINDOW) -> None:
+        self._values: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._values.append(float(value))
+            self.count += 1
+            self.total += float(value)
+
+    def percentile(self, q: float) -> float:
+        with self._lock:
+            xs = sorted(self._values)
+        return _percentile(xs, q)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            xs = sorted(self._values)
+            count, total = self.count, self.total
+        return {
+            "count": count,
+            "mean": round(total / count, 3) if count else 0.0,
+            "p50": round(_percentile(xs, 0.5), 3),
+            "p95": round(_percentile(xs, 0.95), 3),
+            "p99": round(_percentile(xs, 0.99), 3),
+            "max": round(xs[-1], 3) if xs else 0.0,
+        }
+
+
+_histograms: Dict[str, Histogram] = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str) -> Histogram:
+    """Process-wide histogram `name` (e.g. "llm.ttft_ms"), created on first use."""
+    h = _histograms.get(name)
+    if h is None:
+        with _registry_lock:
+            h = _histograms.setdefault(name, Histogram())
+    return h
+
+
+def metrics_snapshot() -> Dict[str, Dict[str, Any]]:
+    return {name: h.snapshot() for name, h in sorted(_histograms.items())}
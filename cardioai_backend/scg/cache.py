@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from cardioai_backend.scg.observation import PeakObservation, SampleColumns
+from cardioai_backend.scg.processing import ALGORITHM_VERSION, preprocess_obs
+from cardioai_backend.settings import CacheSettings, Configured
+
+DEFAULT_MAX_MB = 64.0
+DEFAULT_TTL_S = 3600.0
+
+
+# -- keys ----------------------------------------------------------------------
+
+
+def _hasher(namespace: str) -> Any:
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"v{ALGORITHM_VERSION}\0{namespace}\0".encode())
+    return h
+
+
+def _update_column(h: Any, tag: bytes, column: Any) -> None:
+    data = column.tobytes() if column is not None else b""
+    h.update(tag + len(data).to_bytes(8, "little"))
+    h.update(data)
+
+
+def peaks_key(observation: Union[Dict[str, Any], PeakObservation], fs: float, namespace: str = "preprocess_obs") -> str:
+    """Key for `preprocess_obs()`: int32 peak column + fs, so dict and PeakObservation inputs share entries."""
+    obs = observation if isinstance(observation, PeakObservation) else PeakObservation.from_dict(observation)
+    h = _hasher(namespace)
+    h.update(repr(float(fs)).encode())
+    _update_column(h, b"p", obs.peaks)
+    return h.hexdigest()
+
+
+def observation_key(observation: Dict[str, Any], namespace: str) -> str:
+    """
+    Key for a Heartscan analysis: `az_data_array` canonicalized to float32/int64
+    columns (dict-per-sample and SampleColumns payloads hash the same) plus the
+    remaining observation fields as sorted JSON.
+    """
+    h = _hasher(namespace)
+    rest: Dict[str, Any] = {}
+    for key, value in sorted(observation.items()):
+        if isinstance(value, list) and value and isinstance(value[0], dict) and "az" in value[0]:
+            value = SampleColumns.from_samples(value)
+        if isinstance(value, SampleColumns):
+            h.update(f"\0{key}".encode())
+            for tag, column in ((b"x", value.ax), (b"y", value.ay), (b"z", value.az), (b"t", value.timestamp)):
+                _update_column(h, tag, column)
+        else:
+            rest[key] = value
+    h.update(json.dumps(rest, sort_keys=True, separators=(",", ":"), default=str).encode())
+    return h.hexdigest()
+
+
+# -- cache ---------------------------------------------------------------------
+
+
+class MetricsCache:
+    """
+    LRU cache of JSON-able metric dicts with a byte budget and TTL.
+
+    Values are stored serialized, so the budget counts real bytes and callers
+    always get a fresh copy. With `sqlite_path` every entry is also written to
+    an on-disk tier that survives restarts; memory misses fall through to it
+    (`table` lets several caches share one sqlite file).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = int(DEFAULT_MAX_MB * 1024 * 1024),
+        ttl_s: float = DEFAULT_TTL_S,
+        sqlite_path: Optional[Union[str, Path]] = None,
+        table: str = "metrics_cache",
+    ) -> None:
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name {table!r}")
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self._table = table
+        self._db: Optional[sqlite3.Connection] = None
+        if sqlite_path:
+            Path(sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(sqlite_path), check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+            )
+            self._db.execute(f"DELETE FROM {table} WHERE expires <= ?", (time.time(),))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                self._drop(key)
+                self.expired += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[1])
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value, expires FROM {self._table} WHERE key = ? AND expires > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._store(key, bytes(row[0]), float(row[1]))
+                    self.disk_hits += 1
+                    return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        blob = json.dumps(value, separators=(",", ":")).encode()
+        expires = time.time() + self.ttl_s
+        with self._lock:
+            self._store(key, blob, expires)
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self._table} (key, value, expires) VALUES (?, ?, ?)", (key, blob, expires)
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self._table}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "sqlite": self._db is not None,
+            }
+
+    def _store(self, key: str, blob: bytes, expires: float) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        self._drop(key)
+        self._entries[key] = (expires, blob)
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes:
+            _, (_, old_blob) = self._entries.popitem(last=False)
+            self._bytes -= len(old_blob)
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+
+def cached_preprocess_obs(
+    observation: Union[Dict[str, Any], PeakObservation],
+    fs: Optional[float] = None,
+    engine: Optional[str] = None,
+    *,
+    cache: Optional[MetricsCache] = None,
+) -> Dict[str, Any]:
+    """`preprocess_obs()` memoized on (peaks, fs, ALGORITHM_VERSION); engines share entries."""
+    cache = cache if cache is not None else get_metrics_cache()
+    if cache is None:
+        return preprocess_obs(observation, fs=fs, engine=engine)
+    if fs is None:
+        fs = observation.fs if isinstance(observation, PeakObservation) else 100.0
+    key = peaks_key(observation, fs)
+    result = cache.get(key)
+    if result is None:
+        result = preprocess_obs(observation, fs=fs, engine=engine)
+        cache.put(key, result)
+    return result
+
+
+def create_metrics_cache(settings: CacheSettings) -> Optional[MetricsCache]:
+    """Build the cache configured in `[CACHE]`; None when disabled."""
+    if not settings.enabled:
+        return None
+    return MetricsCache(max_bytes=settings.max_bytes, ttl_s=settings.ttl_s, sqlite_path=settings.sqlite_path)
+
+
+# Built from the snapshot on first use; changes to [CACHE] take effect on restart
+_current: Configured[Optional[MetricsCache]] = Configured(lambda settings, _: create_metrics_cache(settings.cache))
+
+
+def get_metrics_cache() -> Optional[MetricsCache]:
+    """Process-wide cache, created from `[CACHE]` on first use."""
+    return _current.get()
+
+
+def set_metrics_cache(cache: Optional[MetricsCache]) -> None:
+    _current.set(cache)
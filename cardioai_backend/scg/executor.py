@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+
+from cardioai_backend.settings import EXECUTOR_MODES, ExecutorSettings
+
+DEFAULT_SMALL_JOB_SAMPLES = ExecutorSettings.small_job_samples
+_LATENCY_WINDOW = 1024
+
+
+# -- worker side ---------------------------------------------------------------
+# Module-level so they pickle by reference; payloads are raw column bytes.
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    return fn(*args), time.perf_counter() - t0
+
+
+def _warm_up() -> None:
+    import cardioai_backend.scg.peak_detection  # noqa: F401  (pays numpy import once per worker)
+
+
+def analyze_buffers(az: bytes, timestamps: Optional[bytes] = None) -> Dict[str, Any]:
+    """`analyze_samples()` over packed float32 az / int64 timestamp buffers."""
+    import numpy as np
+
+    from cardioai_backend.scg.peak_detection import analyze_samples
+
+    ts = None if timestamps is None else np.frombuffer(timestamps, dtype=np.int64)
+    return analyze_samples(np.frombuffer(az, dtype=np.float32), ts)
+
+
+def pack_samples(samples: Any) -> Tuple[bytes, Optional[bytes]]:
+    """SampleColumns -> (float32 az bytes, int64 timestamp bytes or None); one memcpy each to pickle."""
+    ts = samples.timestamp
+    return samples.az.tobytes(), None if ts is None else ts.tobytes()
+
+
+# -- event-loop side -----------------------------------------------------------
+
+
+def _percentile(sorted_xs: list, q: float) -> float:
+    if not sorted_xs:
+        return 0.0
+    return sorted_xs[min(len(sorted_xs) - 1, int(round((len(sorted_xs) - 1) * q)))]
+
+
+class _PoolStats:
+    __slots__ = ("in_flight", "pending", "submitted", "completed", "failed", "latency", "run_time")
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        # Submitted jobs still held by the pool; those not yet running are the queue.
+        self.pending: Set["Future[Any]"] = set()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.latency: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.run_time: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    def snapshot(self, workers: int) -> Dict[str, Any]:
+        latency = sorted(self.latency)
+        run_time = sorted(self.run_time)
+        queued = sum(1 for f in self.pending if not f.running() and not f.done())
+        return {
+            "workers": workers,
+            "in_flight": self.in_flight,
+            "queue_depth": queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "latency_ms": {
+                "p50": _percentile(latency, 0.50) * 1000.0,
+                "p95": _percentile(latency, 0.95) * 1000.0,
+                "max": (latency[-1] if latency else 0.0) * 1000.0,
+            },
+            "run_ms": {
+                "p50": _percentile(run_time, 0.50) * 1000.0,
+                "p95": _percentile(run_time, 0.95) * 1000.0,
+            },
+        }
+
+
+class ProcessingExecutor:
+    """
+    Runs CPU-bound SCG processing off the event loop.
+
+    Large jobs go to a process pool as packed column buffers; jobs below
+    `small_job_samples` (and everything in "thread" mode) go to a thread pool,
+    where numpy releases the GIL and no IPC is paid. "inline" runs on the
+    caller, as before. `stats()` reports per-pool queue depth and job latency
+    (submit -> result) next to pure run time, for sizing workers per core.
+    A process pool broken by a dead worker is replaced (`process_restarts`);
+    if a new one cannot be started the executor falls back to "thread" mode.
+    """
+
+    def __init__(
+        self,
+        *,
+        mode: str = "process",
+        workers: int = 0,
+        thread_workers: int = 0,
+        small_job_samples: int = DEFAULT_SMALL_JOB_SAMPLES,
+    ) -> None:
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode {mode!r}; expected one of {EXECUTOR_MODES}")
+        cpus = os.cpu_count() or 1
+        self.mode = mode
+        self.workers = workers if workers > 0 else cpus
+        self.thread_workers = thread_workers if thread_workers > 0 else min(4, cpus)
+        self.small_job_samples = small_job_samples
+        self._processes: Optional[Executor] = None
+        self._threads: Optional[Executor] = None
+        self._stats = {"process": _PoolStats(), "thread": _PoolStats()}
+        self._lock = threading.Lock()
+        self.process_restarts = 0
+
+    @property
+    def started(self) -> bool:
+        return self._threads is not None or self.mode == "inline"
+
+    def start(self) -> None:
+        if self.mode == "inline" or self._threads is not None:
+            return
+        self._threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="scg")
+        if self.mode == "process":
+            self._processes = self._start_processes()
+
+    def _start_processes(self) -> Optional[Executor]:
+        try:
+            # spawn: forking a process that already runs an event loop and threads is unsafe
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            for _ in range(self.workers):
+                pool.submit(_warm_up)
+            return pool
+        except (OSError, NotImplementedError):
+            self.mode = "thread"  # e.g. no /dev/shm semaphores in a sandbox
+            return None
+
+    def _restart_processes(self, broken: Executor) -> None:
+        """Replace a broken process pool; of the jobs that hit it, only the first restarts it."""
+        with self._lock:
+            if self._processes is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.process_restarts += 1
+            self._processes = self._start_processes()
+
+    def shutdown(self, wait: bool = True) -> None:
+        for pool in (self._processes, self._threads):
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
+        self._processes = None
+        self._threads = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "small_job_samples": self.small_job_samples,
+                "process_restarts": self.process_restarts,
+                "process": self._stats["process"].snapshot(self.workers if self._processes else 0),
+                "thread": self._stats["thread"].snapshot(self.thread_workers if self._threads else 0),
+            }
+
+    async def run(self, fn: Callable[..., Any], *args: Any, size: int = 0) -> Any:
+        """Run `fn(*args)`; `size` (samples) picks the pool. `fn` and args must pickle for the process pool."""
+        if self.mode == "inline" or self._threads is None:
+            return fn(*args)
+        use_processes = self._processes is not None and size >= self.small_job_samples
+        kind = "process" if use_processes else "thread"
+        pool = self._processes if use_processes else self._threads
+        stats = self._stats[kind]
+        with self._lock:
+            stats.in_flight += 1
+            stats.submitted += 1
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            try:
+                result, run_s = await self._submit(stats, pool, fn, *args)
+            except BrokenProcessPool:
+                # A worker died (OOM kill etc.); start a new pool, finish this job on a thread and keep serving.
+                self._restart_processes(pool)
+                result, run_s = await self._submit(stats, self._threads, fn, *args)
+            ok = True
+            return result
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                stats.in_flight -= 1
+                if ok:
+                    stats.completed += 1
+                    stats.latency.append(elapsed)
+                    stats.run_time.append(run_s)
+                else:
+                    stats.failed += 1
+
+    async def _submit(self, stats: _PoolStats, pool: Any, fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+        future = pool.submit(_timed, fn, *args)
+        with self._lock:
+            stats.pending.add(future)
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            with self._lock:
+                stats.pending.discard(future)
+
+    async def analyze(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+        """`analyze_observation()` off the event loop."""
+        from cardioai_backend.scg.observation import SampleColumns, record_samples
+        from cardioai_backend.scg.peak_detection import analyze_observation, observation_samples
+
+        samples = record_samples(observation)
+        if not isinstance(samples, SampleColumns):
+            # Dict-per-sample payloads: building the columns is CPU work as well.
+            return await self.run(analyze_observation, observation, size=0)
+        samples = observation_samples(observation)
+        if self._processes is not None and len(samples) >= self.small_job_samples:
+            return await self.run(analyze_buffers, *pack_samples(samples), size=len(samples))
+        return await self.run(analyze_observation, observation, size=len(samples))
+
+
+def create_processing_executor(settings: ExecutorSettings) -> ProcessingExecutor:
+    """Build the executor configured in `[EXECUTOR]` (not started); read at startup only."""
+    return ProcessingExecutor(
+        mode=settings.mode,
+        workers=settings.workers,
+        thread_workers=settings.thread_workers,
+        small_job_samples=settings.small_job_samples,
+    )
+
+
+_current: Optional[ProcessingExecutor] = None
+
+
+def get_executor() -> Optional[ProcessingExecutor]:
+    """The executor started by the app lifespan, or None (callers then run inline)."""
+    return _current
+
+
+def set_executor(executor: Optional[ProcessingExecutor]) -> None:
+    global _current
+    _current = executor
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import codecs
+import json
+from array import array
+from typing import Any, AsyncIterable, Dict, List, Optional, Tuple
+
+from cardioai_backend.scg.observation import SAMPLE_KEYS, SampleColumns
+
+SAMPLES_KEY = "az_data_array"
+# Objects we descend into instead of decoding whole; everything else is small.
+STREAMED_OBJECT_KEYS = ("observation",)
+
+DEFAULT_MAX_BODY_BYTES = 32 * 1024 * 1024
+DEFAULT_MAX_SAMPLES = 24 * 3600 * 100
+# Upper bound for one not-yet-complete JSON value held in the buffer
+# (history/message at the top level, a single sample inside the array).
+DEFAULT_MAX_VALUE_BYTES = 2 * 1024 * 1024
+
+_WS = " \t\r\n"
+_COMPACT_AT = 64 * 1024
+
+
+class IngestError(ValueError):
+    """Malformed observation upload."""
+
+
+class IngestLimitError(IngestError):
+    """Observation upload exceeds a configured size limit."""
+
+
+class _Frame:
+    __slots__ = ("obj", "state", "key", "samples")
+
+    def __init__(self, samples: bool = False) -> None:
+        self.obj: Dict[str, Any] = {}
+        self.state = "start"
+        self.key: Optional[str] = None
+        self.samples = samples
+
+
+class _SampleSink:
+    """Accumulates `az_data_array` entries into typed columns as they arrive."""
+
+    def __init__(self) -> None:
+        self.ax = array("f")
+        self.ay = array("f")
+        self.az = array("f")
+        self.ts = array("q")
+        self.has_ts = True
+
+    def __len__(self) -> int:
+        return len(self.az)
+
+    def add(self, sample: Any) -> None:
+        if not isinstance(sample, dict):
+            raise IngestError(f"{SAMPLES_KEY} entries must be objects")
+        try:
+            self.ax.append(float(sample.get("ax", 0.0) or 0.0))
+            self.ay.append(float(sample.get("ay", 0.0) or 0.0))
+            self.az.append(float(sample.get("az", 0.0) or 0.0))
+            t = sample.get("timestamp")
+            if t is None:
+                self.has_ts = False
+            elif self.has_ts:
+                self.ts.append(int(t))
+        except (TypeError, ValueError) as e:
+            raise IngestError(f"invalid {SAMPLES_KEY} entry: {e}") from e
+
+    def extend(self, samples: List[Any]) -> None:
+        if not all(isinstance(s, dict) for s in samples):
+            raise IngestError(f"{SAMPLES_KEY} entries must be objects")
+        try:
+            self.ax.extend([float(s.get("ax", 0.0) or 0.0) for s in samples])
+            self.ay.extend([float(s.get("ay", 0.0) or 0.0) for s in samples])
+            self.az.extend([float(s.get("az", 0.0) or 0.0) for s in samples])
+            if self.has_ts:
+                ts = [s.get("timestamp") for s in samples]
+                if any(t is None for t in ts):
+                    self.has_ts = False
+                else:
+                    self.ts.extend([int(t) for t in ts])
+        except (TypeError, ValueError) as e:
+            raise IngestError(f"invalid {SAMPLES_KEY} entry: {e}") from e
+
+    def columns(self) -> SampleColumns:
+        return SampleColumns(self.ax, self.ay, self.az, self.ts if self.has_ts else None)
+
+
+class ObservationStreamParser:
+    """
+    Incremental parser for JSON bodies carrying an `az_data_array` (or the
+    frontend's `sensor_data`, see SAMPLE_KEYS).
+
+    Accepts either a bare observation ({"az_data_array": [...], ...}) or a chat
+    request ({"message": ..., "history": [...], "observation": {...}}). Bytes
+    are fed as they arrive; the samples buffered so far are decoded and moved
+    straight into float32/int64 columns, so the full per-sample dict tree is
+    never built.
+    Size limits are enforced while reading. `close()` returns the document
+    with the sample list replaced by a SampleColumns.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+        max_samples: int = DEFAULT_MAX_SAMPLES,
+        max_value_bytes: int = DEFAULT_MAX_VALUE_BYTES,
+    ) -> None:
+        self.max_body_bytes = max_body_bytes
+        self.max_samples = max_samples
+        self.max_value_bytes = max_value_bytes
+        self.bytes_read = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._stack: List[_Frame] = []
+        self._root: Optional[Dict[str, Any]] = None
+        self._sink: Optional[_SampleSink] = None
+        self._samples_key = SAMPLES_KEY
+
+    @property
+    def samples_read(self) -> int:
+        return len(self._sink) if self._sink is not None else 0
+
+    def feed(self, chunk: bytes) -> None:
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.max_body_bytes:
+            raise IngestLimitError(f"request body exceeds {self.max_body_bytes} bytes")
+        try:
+            self._buf += self._decoder.decode(chunk)
+        except UnicodeDecodeError as e:
+            raise IngestError(f"request body is not valid UTF-8: {e}") from e
+        self._parse()
+
+    def close(self) -> Dict[str, Any]:
+        try:
+            self._buf += self._decoder.decode(b"", final=True)
+        except UnicodeDecodeError as e:
+            raise IngestError(f"request body is not valid UTF-8: {e}") from e
+        self._eof = True
+        self._parse()
+        if self._root is None or self._stack:
+            raise IngestError("unexpected end of JSON body")
+        if self._buf[self._pos :].strip(_WS):
+            raise IngestError("unexpected data after JSON body")
+        return self._root
+
+    # -- scanner -----------------------------------------------------------
+
+    def _skip_ws(self) -> Optional[str]:
+        buf, pos = self._buf, self._pos
+        n = len(buf)
+        while pos < n and buf[pos] in _WS:
+            pos += 1
+        self._pos = pos
+        return buf[pos] if pos < n else None
+
+    def _decode_value(self) -> Tuple[bool, Any]:
+        """Decode one complete JSON value at the cursor; (False, None) if more input is needed."""
+        try:
+            value, end = self._json.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError as e:
+            if self._eof:
+                raise IngestError(f"invalid JSON: {e}") from e
+            if len(self._buf) - self._pos > self.max_value_bytes:
+                raise IngestLimitError(f"JSON value exceeds {self.max_value_bytes} bytes") from e
+            return False, None
+        if end == len(self._buf) and not self._eof and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return False, None  # a number may continue in the next chunk
+        self._pos = end
+        return True, value
+
+    def _compact(self) -> None:
+        if self._pos > _COMPACT_AT:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+
+    def _parse(self) -> None:
+        while True:
+            self._compact()
+            c = self._skip_ws()
+            if c is None:
+                return
+            if not self._stack:
+                if self._root is not None:
+                    return  # trailing data is reported by close()
+                if c != "{":
+                    raise IngestError("request body must be a JSON object")
+                self._pos += 1
+                frame = _Frame()
+                self._root = frame.obj
+                self._stack.append(frame)
+                continue
+
+            frame = self._stack[-1]
+            if frame.samples:
+                if not self._step_samples(frame, c):
+                    return
+            elif not self._step_object(frame, c):
+                return
+
+    def _step_object(self, frame: _Frame, c: str) -> bool:
+        if frame.state in ("start", "key"):
+            if c == "}" and frame.state == "start":
+                self._pos += 1
+                self._pop()
+                return True
+            if c != '"':
+                raise IngestError("expected object key")
+            ok, key = self._decode_value()
+            if not ok:
+                return False
+            frame.key = key
+            frame.state = "colon"
+            return True
+        if frame.state == "colon":
+            if c != ":":
+                raise IngestError("expected ':' after object key")
+            self._pos += 1
+            frame.state = "value"
+            return True
+        if frame.state == "value":
+            key = frame.key or ""
+            if key in SAMPLE_KEYS and c == "[":
+                self._pos += 1
+                if self._sink is not None:
+                    raise IngestError(f"duplicate {SAMPLES_KEY}")
+                self._sink = _SampleSink()
+                self._samples_key = key
+                self._stack.append(_Frame(samples=True))
+                frame.state = "after"
+                return True
+            if key in STREAMED_OBJECT_KEYS and c == "{" and len(self._stack) == 1:
+                self._pos += 1
+                child = _Frame()
+                frame.obj[key] = child.obj
+                self._stack.append(child)
+                frame.state = "after"
+                return True
+            ok, value = self._decode_value()
+            if not ok:
+                return False
+            frame.obj[key] = value
+            frame.state = "after"
+            return True
+        # frame.state == "after"
+        if c == ",":
+            self._pos += 1
+            frame.state = "key"
+            return True
+        if c == "}":
+            self._pos += 1
+            self._pop()
+            return True
+        raise IngestError("expected ',' or '}' in object")
+
+    def _step_samples(self, frame: _Frame, c: str) -> bool:
+        sink = self._sink
+        assert sink is not None
+        if frame.state in ("start", "item"):
+            if c == "]" and frame.state == "start":
+                self._pos += 1
+                self._finish_samples()
+                return True
+            if c == "{" and self._decode_sample_run(sink):
+                frame.state = "after"
+                return True
+            ok, sample = self._decode_value()
+            if not ok:
+                return False
+            sink.add(sample)
+            if len(sink) > self.max_samples:
+                raise IngestLimitError(f"{SAMPLES_KEY} exceeds {self.max_samples} samples")
+            frame.state = "after"
+            return True
+        if c == ",":
+            self._pos += 1
+            frame.state = "item"
+            return True
+        if c == "]":
+            self._pos += 1
+            self._finish_samples()
+            return True
+        raise IngestError(f"expected ',' or ']' in {SAMPLES_KEY}")
+
+    def _decode_sample_run(self, sink: _SampleSink) -> bool:
+        """
+        Fast path: decode every complete sample already buffered with a single
+        json.loads() call. Falls back to one-by-one decoding if the run cannot be
+        cut cleanly (e.g. a string value containing braces).
+        """
+        buf, pos = self._buf, self._pos
+        limit = buf.find("]", pos)
+        end = buf.rfind("}", pos, len(buf) if limit == -1 else limit)
+        if end <= pos:
+            return False
+        try:
+            batch = json.loads("[" + buf[pos : end + 1] + "]")
+        except ValueError:
+            return False
+        sink.extend(batch)
+        if len(sink) > self.max_samples:
+            raise IngestLimitError(f"{SAMPLES_KEY} exceeds {self.max_samples} samples")
+        self._pos = end + 1
+        return True
+
+    def _finish_samples(self) -> None:
+        self._stack.pop()
+        parent = self._stack[-1]
+        parent.obj[self._samples_key] = self._sink.columns()  # type: ignore[union-attr]
+
+    def _pop(self) -> None:
+        self._stack.pop()
+
+
+async def parse_observation_stream(
+    chunks: AsyncIterable[bytes],
+    *,
+    max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+    max_samples: int = DEFAULT_MAX_SAMPLES,
+) -> Dict[str, Any]:
+    """Drive ObservationStreamParser over an async byte stream (e.g. `Request.stream()`)."""
+    parser = ObservationStreamParser(max_body_bytes=max_body_bytes, max_samples=max_samples)
+    async for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+    return parser.close()
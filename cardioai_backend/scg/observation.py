@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional, array.array is used instead
+    np = None  # type: ignore[assignment]
+
+# Keys an observation carries its samples under: the Heartscan API's
+# `az_data_array`, and `sensor_data` as sent by the web frontend.
+SAMPLE_KEYS = ("az_data_array", "sensor_data")
+
+
+def _int_column(values: Iterable[int]) -> Any:
+    if np is not None:
+        return np.fromiter(values, dtype=np.int32)
+    return array("i", values)
+
+
+def parse_peaks(values: Any) -> Any:
+    """
+    Peak positions as an int32 column. Fast path for clean int sequences;
+    otherwise each value goes through int() and malformed entries are skipped,
+    like `normalize_observation()` always did.
+    """
+    if np is not None and isinstance(values, (list, tuple)) and values:
+        arr = np.asarray(values)
+        if arr.ndim == 1 and arr.dtype.kind in "iu":
+            return arr.astype(np.int32)
+    if np is not None and isinstance(values, np.ndarray) and values.dtype.kind in "iu":
+        return values.astype(np.int32).ravel()
+    parsed: List[int] = []
+    for v in values or []:
+        try:
+            parsed.append(int(v))
+        except Exception:
+            continue
+    return _int_column(parsed)
+
+
+def record_samples(record: Any) -> Any:
+    """The samples (list of dicts or SampleColumns) under the first of SAMPLE_KEYS a record has, else None."""
+    if not isinstance(record, dict):
+        return None
+    for key in SAMPLE_KEYS:
+        if record.get(key) is not None:
+            return record[key]
+    return None
+
+
+def record_timestamps(record: Dict[str, Any]) -> Optional[List[int]]:
+    """
+    Millisecond sample timestamps carried by a record, if any: a `timestamps`
+    list or the `timestamp` fields of its samples (SAMPLE_KEYS).
+    """
+    if not isinstance(record, dict):
+        return None
+    ts = record.get("timestamps")
+    if not isinstance(ts, list):
+        samples = record_samples(record)
+        if isinstance(samples, SampleColumns):
+            return None if samples.timestamp is None else samples.timestamp.tolist()
+        if not isinstance(samples, list):
+            return None
+        ts = [s.get("timestamp") if isinstance(s, dict) else None for s in samples]
+    try:
+        return [int(t) for t in ts] if len(ts) >= 2 else None
+    except (TypeError, ValueError):
+        return None
+
+
+def remap_record_peaks(peaks: Any, timestamps: Optional[List[int]], fs: float) -> Any:
+    """(peaks, fs) moved onto the uniform grid of the rate the timestamps imply, when numpy is available."""
+    if timestamps is None or np is None:
+        return peaks, fs
+    from cardioai_backend.scg.resample import remap_peaks
+
+    grid, true_fs = remap_peaks(peaks, timestamps)
+    return (grid, true_fs) if true_fs > 0 else (peaks, fs)
+
+
+class PeakObservation:
+    """
+    Compact observation: one int32 column of peak sample indices plus the
+    sampling rate and upstream bpm/confidence.
+
+    Replaces the legacy {'peaks': [{'x': int, 'y': 1.0}, ...]} dict inside the
+    processing code; `to_dict()` / `from_dict()` convert at the edges.
+    """
+
+    __slots__ = ("peaks", "fs", "bpm", "confidence")
+
+    def __init__(
+        self,
+        peaks: Any = (),
+        fs: float = 0.0,
+        bpm: Optional[Any] = None,
+        confidence: Optional[Any] = None,
+    ) -> None:
+        self.peaks = parse_peaks(peaks)
+        self.fs = float(fs)
+        self.bpm = bpm
+        self.confidence = confidence
+
+    def __len__(self) -> int:
+        return len(self.peaks)
+
+    def __repr__(self) -> str:
+        return f"PeakObservation(peaks=<{len(self.peaks)}>, fs={self.fs!r}, bpm={self.bpm!r})"
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "PeakObservation":
+        """
+        Build from a `resp_example/heart_rate_first10_responses.json` record.
+        If the record carries sample timestamps, fs is estimated from them and
+        the peaks are moved onto that uniform grid instead of trusting
+        `sampling_rate`.
+        """
+        if not isinstance(record, dict):
+            return cls()
+        try:
+            fs = float(record.get("sampling_rate", 0) or 0)
+        except Exception:
+            fs = 0.0
+        resp = record.get("response", {}) if isinstance(record.get("response", {}), dict) else {}
+        base_peaks = resp.get("base_peaks", []) if isinstance(resp.get("base_peaks", []), list) else []
+        peaks, fs = remap_record_peaks(parse_peaks(base_peaks), record_timestamps(record), fs)
+        return cls(peaks, fs=fs, bpm=resp.get("bpm"), confidence=resp.get("confidence"))
+
+    @classmethod
+    def from_dict(cls, observation: Dict[str, Any], fs: float = 0.0) -> "PeakObservation":
+        """Build from the legacy {'peaks': [{'x': ...}, ...]} shape."""
+        xs: List[int] = []
+        for p in observation.get("peaks", []) if isinstance(observation, dict) else []:
+            try:
+                xs.append(int(p.get("x")))
+            except Exception:
+                continue
+        obs = cls(_int_column(xs), fs=fs)
+        if isinstance(observation, dict):
+            obs.bpm = observation.get("bpm")
+            obs.confidence = observation.get("confidence")
+        return obs
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Legacy dict shape, as produced by `normalize_observation()`."""
+        out: Dict[str, Any] = {"peaks": [{"x": int(x), "y": 1.0} for x in self.peaks_list()]}
+        if self.bpm is not None:
+            out["bpm"] = self.bpm
+        if self.confidence is not None:
+            out["confidence"] = self.confidence
+        return out
+
+    def peaks_list(self) -> List[int]:
+        return self.peaks.tolist()
+
+
+class SampleColumns:
+    """
+    Columnar accelerometer samples: float32 ax/ay/az and int64 millisecond
+    timestamps (None when the payload has none), instead of one dict per sample.
+    """
+
+    __slots__ = ("ax", "ay", "az", "timestamp")
+
+    def __init__(self, ax: Any, ay: Any, az: Any, timestamp: Optional[Any] = None) -> None:
+        if np is not None:
+            self.ax = np.asarray(ax, dtype=np.float32)
+            self.ay = np.asarray(ay, dtype=np.float32)
+            self.az = np.asarray(az, dtype=np.float32)
+            self.timestamp = None if timestamp is None else np.asarray(timestamp, dtype=np.int64)
+        else:
+            self.ax, self.ay, self.az = array("f", ax), array("f", ay), array("f", az)
+            self.timestamp = None if timestamp is None else array("q", timestamp)
+        n = len(self.az)
+        if len(self.ax) != n or len(self.ay) != n or (self.timestamp is not None and len(self.timestamp) != n):
+            raise ValueError("sample columns must have equal length")
+
+    def __len__(self) -> int:
+        return len(self.az)
+
+    def __repr__(self) -> str:
+        return f"SampleColumns(n={len(self)}, timestamps={self.timestamp is not None})"
+
+    @classmethod
+    def from_samples(cls, samples: List[Dict[str, Any]]) -> "SampleColumns":
+        """Build from an `az_data_array` list of {'ax','ay','az','timestamp'} dicts."""
+        ax: List[float] = []
+        ay: List[float] = []
+        az: List[float] = []
+        ts: Optional[List[int]] = []
+        for s in samples:
+            ax.append(float(s.get("ax", 0.0) or 0.0))
+            ay.append(float(s.get("ay", 0.0) or 0.0))
+            az.append(float(s.get("az", 0.0) or 0.0))
+            if ts is not None:
+                t = s.get("timestamp")
+                if t is None:
+                    ts = None
+                else:
+                    ts.append(int(t))
+        return cls(ax, ay, az, ts)
+
+    def to_samples(self) -> List[Dict[str, Any]]:
+        """Legacy `az_data_array` shape, e.g. for the remote Heartscan API."""
+        ax, ay, az = self.ax.tolist(), self.ay.tolist(), self.az.tolist()
+        if self.timestamp is None:
+            return [{"ax": a, "ay": b, "az": c} for a, b, c in zip(ax, ay, az)]
+        ts = self.timestamp.tolist()
+        return [{"ax": a, "ay": b, "az": c, "timestamp": t} for a, b, c, t in zip(ax, ay, az, ts)]
+
+
+def observation_to_json(observation: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an observation with SampleColumns expanded back to JSON-able sample dicts."""
+    out = dict(observation)
+    for key, value in observation.items():
+        if isinstance(value, SampleColumns):
+            out[key] = value.to_samples()
+    return out
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from cardioai_backend.scg.observation import PeakObservation, SampleColumns, record_samples
+from cardioai_backend.scg.processing import preprocess_obs
+from cardioai_backend.scg.resample import StreamingResampler, estimate_rate
+from cardioai_backend.settings import get_settings
+
+# Mirrors MEASUREMENT_CONFIG in cardioai_frontend/lib/utils/measurementConfig.ts.
+# SMOOTHING_WINDOW / MEAN_DEV_WINDOW_FACTOR are shorter/longer than the live
+# frontend values: on whole recordings they track `expected_bpm` in
+# tests/data/cardiolog_payloads.json much better (see tools/bench_peak_detection.py).
+DETECTOR_CONFIG: Dict[str, float] = {
+    "QUARTER_PERIOD": 20,  # samples, ~120 BPM at 100 Hz
+    "SMOOTHING_WINDOW": 20,
+    "MEAN_DEV_WINDOW_FACTOR": 3.0,
+    "MAX_WINDOW_FACTOR": 4,  # dynamic threshold = max over 4 quarter periods
+    "MIN_PEAK_INTERVAL": 400,  # ms refractory window (150 BPM max)
+}
+
+DEFAULT_FS = 100.0
+
+
+def _trailing_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Mean of x[max(0, i - window + 1):i + 1] for every i (shrinking window at the start)."""
+    csum = np.concatenate(([0.0], np.cumsum(x)))
+    idx = np.arange(x.size)
+    lo = np.maximum(idx + 1 - window, 0)
+    return (csum[idx + 1] - csum[lo]) / (idx + 1 - lo)
+
+
+def _trailing_max(x: np.ndarray, window: int) -> np.ndarray:
+    padded = np.concatenate((np.full(window - 1, -np.inf), x))
+    return sliding_window_view(padded, window).max(axis=1)
+
+
+def estimate_sampling_rate(timestamps: Optional[np.ndarray], fallback: float = DEFAULT_FS) -> float:
+    """Sampling rate in Hz from millisecond timestamps (jitter- and dropout-robust, see `estimate_rate()`)."""
+    if timestamps is None or len(timestamps) < 2:
+        return float(fallback)
+    fs = estimate_rate(timestamps)["fs"]
+    return fs if fs > 0 else float(fallback)
+
+
+def detect_peaks(
+    az: Any,
+    timestamps: Optional[Any] = None,
+    fs: float = DEFAULT_FS,
+    config: Optional[Dict[str, float]] = None,
+) -> np.ndarray:
+    """
+    Vectorized port of the MATLAB-style detector in
+    `cardioai_frontend/hooks/usePeakDetector.ts`.
+
+    For every sample: absolute deviation of the last quarter period from the
+    mean of the last half period, smoothed, compared against the running max of
+    its own longer mean. A beat is an upward crossing of that dynamic
+    threshold, subject to the refractory window. Returns sample indices.
+    """
+    cfg = dict(DETECTOR_CONFIG, **(config or {}))
+    q = int(cfg["QUARTER_PERIOD"])
+    z = np.asarray(az, dtype=np.float64).ravel()
+    n = z.size
+    warmup = 4 * q
+    if n <= warmup:
+        return np.zeros(0, dtype=np.int64)
+
+    if timestamps is not None:
+        t = np.asarray(timestamps, dtype=np.float64).ravel()
+        if t.size != n or bool((np.diff(t) < 0).any()):
+            t = None
+    else:
+        t = None
+    if t is None:
+        t = np.arange(n, dtype=np.float64) * (1000.0 / fs if fs > 0 else 1000.0 / DEFAULT_FS)
+
+    window_mean = np.zeros(n)
+    window_mean[2 * q - 1 :] = sliding_window_view(z, 2 * q).mean(axis=1)
+    deviation = np.zeros(n)
+    deviation[q - 1 :] = np.abs(sliding_window_view(z, q) - window_mean[q - 1 :, None]).sum(axis=1)
+    deviation[: warmup - 1] = 0.0
+
+    smoothed = _trailing_mean(deviation, int(cfg["SMOOTHING_WINDOW"]))
+    mean_dev = _trailing_mean(smoothed, max(1, int(round(cfg["MEAN_DEV_WINDOW_FACTOR"] * q))))
+    threshold = _trailing_max(mean_dev, int(cfg["MAX_WINDOW_FACTOR"] * q))
+
+    crossing = np.zeros(n, dtype=bool)
+    crossing[2:] = (smoothed[2:] > threshold[2:]) & (smoothed[:-2] < threshold[:-2])
+    crossing[: warmup - 1] = False
+
+    # Refractory window; the frontend starts the clock at the end of warm-up.
+    refractory = float(cfg["MIN_PEAK_INTERVAL"])
+    peaks: List[int] = []
+    last = float(t[warmup - 1])
+    for i in np.flatnonzero(crossing).tolist():
+        if t[i] - last >= refractory:
+            peaks.append(i)
+            last = float(t[i])
+    return np.asarray(peaks, dtype=np.int64)
+
+
+def analyze_samples(
+    az: Any, timestamps: Optional[Any] = None, config: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    `preprocess_obs()` metrics for one az column and its optional ms timestamps.
+
+    With timestamps, az is first resampled onto a uniform DEFAULT_FS grid
+    (jitter and dropouts removed), so detector windows and peak-to-seconds
+    conversion use the true spacing. `sampling_rate` reports the device rate
+    estimated from the timestamps.
+    """
+    fs = DEFAULT_FS
+    source_fs = DEFAULT_FS
+    ts: Optional[np.ndarray] = None
+    if timestamps is not None and len(timestamps) >= 2:
+        ts = np.asarray(timestamps, dtype=np.int64)
+        source_fs = estimate_sampling_rate(ts)
+        if not bool((np.diff(ts) == 1000.0 / fs).all()):  # off the uniform grid: resample onto it
+            ts, (az,) = StreamingResampler(fs, columns=("az",)).add(ts, [az])
+    peaks = detect_peaks(az, ts, fs=fs, config=config)
+    metrics = preprocess_obs(PeakObservation(peaks, fs=fs), engine=get_settings().heartscan.engine)
+    metrics["sampling_rate"] = source_fs
+    return metrics
+
+
+def observation_samples(observation: Dict[str, Any]) -> SampleColumns:
+    """The samples of an observation (`az_data_array` or `sensor_data`) as SampleColumns (ValueError if empty)."""
+    samples = record_samples(observation)
+    if isinstance(samples, list) and samples:
+        samples = SampleColumns.from_samples(samples)
+    if not isinstance(samples, SampleColumns) or not len(samples):
+        raise ValueError("observation has no az_data_array or sensor_data samples")
+    return samples
+
+
+def analyze_observation(observation: Dict[str, Any], config: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Local replacement for the Heartscan analysis call: raw `az_data_array`
+    payload (list of sample dicts or SampleColumns) in, `preprocess_obs()`
+    metrics out (plus `sampling_rate`).
+    """
+    samples = observation_samples(observation)
+    return analyze_samples(samples.az, samples.timestamp, config=config)
@@ -1,7 +1,39 @@
 from __future__ import annotations
 
 import math
-from typing import Any, Dict, List, Tuple
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional, the python engine still works
+    np = None  # type: ignore[assignment]
+
+from cardioai_backend.scg.observation import PeakObservation, remap_record_peaks, record_timestamps
+from cardioai_backend.settings import SCG_ENGINES
+
+PeaksInput = Union[List[Dict[str, Any]], PeakObservation]
+
+
+# Bump when metric output changes, so cached results (scg/cache.py) are not reused.
+ALGORITHM_VERSION = 1
+
+# Available metric engines. "python" is the reference implementation below
+# and the default; "numpy" is the vectorized one. Its output dicts have the
+# same keys, types and integers, but floats may differ in the last bits
+# (summation order), so it is opt-in: `[HEARTSCAN] ENGINE` for local analysis.
+ENGINES = SCG_ENGINES
+DEFAULT_ENGINE = "python"
+
+
+def resolve_engine(engine: Optional[str] = None) -> str:
+    """Validate an engine name; None selects DEFAULT_ENGINE."""
+    name = (engine or DEFAULT_ENGINE).strip().lower()
+    if name not in ENGINES:
+        raise ValueError(f"Unknown SCG engine {engine!r}; expected one of {ENGINES}")
+    if name == "numpy" and np is None:
+        raise RuntimeError("SCG engine 'numpy' requested but numpy is not installed")
+    return name
 
 
 def sec2hms(sec: float) -> str:
@@ -50,18 +82,44 @@ def mistake_holder(obs: Dict[str, Any], th: int = 5) -> Dict[str, Any]:
     return obs
 
 
-def filter_peaks(peaks_x: List[Dict[str, Any]], N: float = 0.0) -> List[Dict[str, int]]:
-    """
-    Filter out peaks that are too close to each other (relaxation zone).
-    Input: [{'x': int|float, ...}, ...]
-    Output: [{'x': int}, ...]
-    """
+def _empty_metrics() -> Dict[str, Any]:
+    return {
+        "avg_bpm": 0,
+        "min_bpm": 0,
+        "max_bpm": 0,
+        "episodes_count": 0,
+        "episodes_per_hour": 0,
+        "episodes_timestamps": [],
+        "instantaneous_bpm": [],
+        "bpm_deviation": [],
+    }
+
+
+def _peak_positions(peaks_x: PeaksInput) -> List[int]:
+    """Extract integer peak positions from [{'x': ...}], skipping malformed entries."""
+    if isinstance(peaks_x, PeakObservation):
+        return peaks_x.peaks_list()
     peaks: List[int] = []
     for p in peaks_x or []:
         try:
             peaks.append(int(p.get("x")))  # type: ignore[arg-type]
         except Exception:
             continue
+    return peaks
+
+
+def filter_peaks(peaks_x: PeaksInput, N: float = 0.0, engine: Optional[str] = None) -> List[Dict[str, int]]:
+    """
+    Filter out peaks that are too close to each other (relaxation zone).
+    Input: [{'x': int|float, ...}, ...] or a PeakObservation
+    Output: [{'x': int}, ...]
+    """
+    engine = resolve_engine(engine)
+    if engine == "numpy":
+        kept = _filter_peak_array(_peak_array(peaks_x), N)
+        return [{"x": int(i)} for i in kept.tolist()]
+
+    peaks = _peak_positions(peaks_x)
     if not peaks:
         return []
 
@@ -77,38 +135,148 @@ def filter_peaks(peaks_x: List[Dict[str, Any]], N: float = 0.0) -> List[Dict[str
     return [{"x": int(i)} for i in filtered]
 
 
-def preprocess_obs(observation: Dict[str, Any], fs: float = 100.0) -> Dict[str, Any]:
+def _peak_array(peaks_x: PeaksInput) -> "np.ndarray":
+    """int64 peak positions; PeakObservation columns are used without a dict round-trip."""
+    if isinstance(peaks_x, PeakObservation):
+        return np.asarray(peaks_x.peaks, dtype=np.int64)
+    return np.asarray(_peak_positions(peaks_x), dtype=np.int64)
+
+
+def _filter_peak_array(peaks: "np.ndarray", N: float = 0.0) -> "np.ndarray":
+    """
+    Vectorized `filter_peaks()` over an int64 array of peak positions.
+
+    The greedy relaxation-zone filter is inherently sequential, but on sorted
+    input every run of gaps wider than N is kept as a whole, so we only step
+    through the (rare) short gaps and jump over them with searchsorted().
+    """
+    if peaks.size < 2:
+        return peaks
+
+    diffs = np.diff(peaks)
+    if N <= 0:
+        # mean of consecutive diffs telescopes to (last - first) / (n - 1)
+        avg_diff = float(peaks[-1] - peaks[0]) / float(diffs.size)
+        N = avg_diff / 2.0 if avg_diff > 0 else 0.0
+
+    if not math.isfinite(N) or bool((diffs < 0).any()):
+        # unsorted input or degenerate N: defer to the sequential rule
+        values = peaks.tolist()
+        filtered = [values[0]]
+        for v in values[1:]:
+            if float(v - filtered[-1]) > float(N):
+                filtered.append(v)
+        return np.asarray(filtered, dtype=np.int64)
+
+    # integer gap d satisfies d > N exactly when d >= floor(N) + 1
+    min_gap = int(math.floor(N)) + 1
+    short = np.flatnonzero(diffs < min_gap)
+    if short.size == 0:
+        return peaks
+
+    pieces: List["np.ndarray"] = []
+    i = 0
+    n = int(peaks.size)
+    while i < n:
+        k = int(np.searchsorted(short, i))
+        if k == short.size:
+            pieces.append(np.arange(i, n))
+            break
+        b = int(short[k])
+        pieces.append(np.arange(i, b + 1))
+        i = int(np.searchsorted(peaks, peaks[b] + min_gap, side="left"))
+    return peaks[np.concatenate(pieces)]
+
+
+def _episode_runs(idx: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Group sorted indices into runs of consecutive values; return (starts, ends)."""
+    if idx.size == 0:
+        return idx, idx
+    breaks = np.flatnonzero(np.diff(idx) != 1)
+    starts = idx[np.concatenate(([0], breaks + 1))]
+    ends = idx[np.concatenate((breaks, [idx.size - 1]))]
+    return starts, ends
+
+
+def _preprocess_peaks_numpy(peak_values: "np.ndarray", fs: float) -> Dict[str, Any]:
+    """Vectorized `preprocess_obs()` over an array of raw peak positions."""
+    peaks = _filter_peak_array(np.asarray(peak_values, dtype=np.int64))
+    if peaks.size < 2 or fs <= 0:
+        return _empty_metrics()
+
+    dx = np.diff(peaks).astype(np.float64)
+    rr_intervals = dx[dx > 0] / float(fs)
+    if rr_intervals.size == 0:
+        return _empty_metrics()
+
+    instantaneous_bpm = 60.0 / rr_intervals
+    mean_bpm = float(instantaneous_bpm.mean())
+    bpm_deviation = instantaneous_bpm - mean_bpm
+
+    dev_mu = bpm_deviation.mean()
+    sigma0 = float(np.sqrt(((bpm_deviation - dev_mu) ** 2).mean()))
+    exps = np.exp(instantaneous_bpm - instantaneous_bpm.max())
+    total = exps.sum()
+    weights = exps / total if total > 0 else np.full(exps.size, 1.0 / exps.size)
+    sigma = sigma0 + sigma0 * float(weights.std())
+
+    starts, ends = _episode_runs(np.flatnonzero(np.abs(bpm_deviation) > sigma))
+    start_x = peaks[starts].tolist()
+    end_x = peaks[np.minimum(ends + 1, peaks.size - 1)].tolist()
+    episodes_timestamps = [
+        [sec2hms(float(a) / fs), sec2hms(float(b) / fs)] for a, b in zip(start_x, end_x)
+    ]
+
+    episodes_count = len(episodes_timestamps)
+    duration_min = float(peaks[-1] - peaks[0]) / float(fs) / 60.0
+    episodes_per_hour = (60.0 / duration_min) * episodes_count if duration_min > 0 else 0.0
+
+    return mistake_holder(
+        {
+            "instantaneous_bpm": instantaneous_bpm.tolist(),
+            "bpm_deviation": bpm_deviation.tolist(),
+            "avg_bpm": mean_bpm,
+            "min_bpm": float(instantaneous_bpm.min()),
+            "max_bpm": float(instantaneous_bpm.max()),
+            "episodes_count": int(episodes_count),
+            "episodes_per_hour": float(episodes_per_hour),
+            "episodes_timestamps": episodes_timestamps,
+        },
+        th=4,
+    )
+
+
+def preprocess_obs(
+    observation: Union[Dict[str, Any], PeakObservation],
+    fs: Optional[float] = None,
+    engine: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Calculate heart rhythm metrics from peaks.
 
     Expected observation format:
-      {'peaks': [{'x': int}, ...]}
+      {'peaks': [{'x': int}, ...]} or a PeakObservation
+
+    `fs` defaults to the PeakObservation's sampling rate, or 100 Hz for dicts.
+    `engine` selects the implementation ("python" reference or "numpy");
+    both return the same dict.
     """
-    peaks_in = observation.get("peaks", []) if isinstance(observation, dict) else []
+    engine = resolve_engine(engine)
+    peaks_in: PeaksInput
+    if isinstance(observation, PeakObservation):
+        peaks_in = observation
+        fs = observation.fs if fs is None else fs
+    else:
+        peaks_in = observation.get("peaks", []) if isinstance(observation, dict) else []
+    fs = 100.0 if fs is None else fs
+    if peaks_in and engine == "numpy":
+        return _preprocess_peaks_numpy(_peak_array(peaks_in), fs)
     if not peaks_in:
-        return {
-            "avg_bpm": 0,
-            "min_bpm": 0,
-            "max_bpm": 0,
-            "episodes_count": 0,
-            "episodes_per_hour": 0,
-            "episodes_timestamps": [],
-            "instantaneous_bpm": [],
-            "bpm_deviation": [],
-        }
+        return _empty_metrics()
 
-    peaks = filter_peaks(peaks_in)
+    peaks = filter_peaks(peaks_in, engine="python")
     if len(peaks) < 2 or fs <= 0:
-        return {
-            "avg_bpm": 0,
-            "min_bpm": 0,
-            "max_bpm": 0,
-            "episodes_count": 0,
-            "episodes_per_hour": 0,
-            "episodes_timestamps": [],
-            "instantaneous_bpm": [],
-            "bpm_deviation": [],
-        }
+        return _empty_metrics()
 
     rr_intervals: List[float] = []
     for i in range(len(peaks) - 1):
@@ -118,29 +286,11 @@ def preprocess_obs(observation: Dict[str, Any], fs: float = 100.0) -> Dict[str,
         rr_intervals.append(dx / float(fs))
 
     if not rr_intervals:
-        return {
-            "avg_bpm": 0,
-            "min_bpm": 0,
-            "max_bpm": 0,
-            "episodes_count": 0,
-            "episodes_per_hour": 0,
-            "episodes_timestamps": [],
-            "instantaneous_bpm": [],
-            "bpm_deviation": [],
-        }
+        return _empty_metrics()
 
     instantaneous_bpm = [60.0 / rr for rr in rr_intervals if rr > 0]
     if not instantaneous_bpm:
-        return {
-            "avg_bpm": 0,
-            "min_bpm": 0,
-            "max_bpm": 0,
-            "episodes_count": 0,
-            "episodes_per_hour": 0,
-            "episodes_timestamps": [],
-            "instantaneous_bpm": [],
-            "bpm_deviation": [],
-        }
+        return _empty_metrics()
 
     mean_bpm = _mean(instantaneous_bpm)
     bpm_deviation = [bpm - mean_bpm for bpm in instantaneous_bpm]
@@ -196,6 +346,11 @@ def normalize_observation(record: Dict[str, Any]) -> Tuple[Dict[str, Any], float
     Output observation includes:
       - peaks: [{'x': int, 'y': 1.0}, ...]
       - bpm / confidence (if present upstream)
+
+    If the record carries sample timestamps (`timestamps` or
+    `az_data_array`), the sampling rate is estimated from them (jitter and
+    dropouts removed) and peaks are moved onto that uniform grid, instead of
+    trusting the nominal `sampling_rate`.
     """
     if not isinstance(record, dict):
         return {"peaks": []}, 0.0
@@ -216,6 +371,11 @@ def normalize_observation(record: Dict[str, Any]) -> Tuple[Dict[str, Any], float
         except Exception:
             continue
 
+    timestamps = record_timestamps(record)
+    if timestamps is not None and peaks:
+        xs, fs = remap_record_peaks([p["x"] for p in peaks], timestamps, fs)
+        peaks = [{"x": int(x), "y": 1.0} for x in xs]
+
     obs_norm: Dict[str, Any] = {"peaks": peaks}
     if "bpm" in resp:
         obs_norm["bpm"] = resp.get("bpm")
@@ -224,3 +384,590 @@ def normalize_observation(record: Dict[str, Any]) -> Tuple[Dict[str, Any], float
 
     return obs_norm, fs
 
+
+
+# ---------------------------------------------------------------------------
+# Batch API: many recordings in one call over ragged (flat + offsets) arrays
+# ---------------------------------------------------------------------------
+
+BATCH_SUMMARY_KEYS = ("avg_bpm", "min_bpm", "max_bpm", "episodes_count", "episodes_per_hour")
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("numpy is required for the batch SCG API")
+
+
+def _segment_ids(offsets: "np.ndarray") -> "np.ndarray":
+    """Record index of every element of a flat ragged array."""
+    return np.repeat(np.arange(offsets.size - 1), np.diff(offsets))
+
+
+def _sec2hms_many(sec: "np.ndarray") -> List[str]:
+    """Vectorized `sec2hms()`."""
+    sec = np.maximum(np.asarray(sec, dtype=np.float64), 0.0)
+    h = (sec // 3600).astype(np.int64).tolist()
+    m = ((sec % 3600) // 60).astype(np.int64).tolist()
+    s = (sec % 60).astype(np.int64).tolist()
+    return [f"{a:02d}:{b:02d}:{c:02d}" for a, b, c in zip(h, m, s)]
+
+
+def _filter_peaks_batch(peaks: "np.ndarray", offsets: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Apply `filter_peaks()` to every record. Records whose gaps are all wider
+    than their relaxation zone are kept as-is without leaving numpy; only the
+    remaining ones go through `_filter_peak_array()` one by one.
+    """
+    counts = np.diff(offsets)
+    n = counts.size
+    if peaks.size < 2:
+        return peaks, offsets
+
+    first = peaks[offsets[:-1].clip(max=peaks.size - 1)]
+    last = peaks[(offsets[1:] - 1).clip(min=0)]
+    multi = counts >= 2
+    avg_diff = np.zeros(n, dtype=np.float64)
+    avg_diff[multi] = (last[multi] - first[multi]).astype(np.float64) / (counts[multi] - 1)
+    relax = np.where(avg_diff > 0, avg_diff / 2.0, 0.0)
+    min_gap = np.floor(relax).astype(np.int64) + 1
+
+    seg = _segment_ids(offsets)
+    diffs = np.diff(peaks)
+    inner = seg[:-1] == seg[1:]
+    short = inner & (diffs < min_gap[seg[:-1]])
+    dirty = np.unique(seg[:-1][short])
+    if dirty.size == 0:
+        return peaks, offsets
+
+    parts: List["np.ndarray"] = []
+    new_counts = counts.copy()
+    prev = 0
+    for r in dirty.tolist():
+        parts.append(peaks[offsets[prev] : offsets[r]])
+        kept = _filter_peak_array(peaks[offsets[r] : offsets[r + 1]])
+        parts.append(kept)
+        new_counts[r] = kept.size
+        prev = r + 1
+    parts.append(peaks[offsets[prev] :])
+    new_offsets = np.concatenate(([0], np.cumsum(new_counts))).astype(np.int64)
+    return np.concatenate(parts), new_offsets
+
+
+def preprocess_batch(
+    peaks: Any,
+    offsets: Any,
+    fs: Any = 100.0,
+    *,
+    with_series: bool = False,
+) -> Dict[str, Any]:
+    """
+    Compute `preprocess_obs()` metrics for many recordings at once.
+
+    Input is CSR-style: `peaks` is one flat int array with every record's peak
+    positions concatenated, record i spans `peaks[offsets[i]:offsets[i + 1]]`
+    (len(offsets) == n_records + 1), and `fs` is a scalar or per-record array.
+
+    Returns columnar numpy arrays keyed like the `preprocess_obs()` summary
+    ("avg_bpm", "min_bpm", "max_bpm", "episodes_count", "episodes_per_hour"),
+    plus "beats" (RR interval count, 0 for unusable records) and
+    "episodes_timestamps" (one list per record). Per-beat
+    "instantaneous_bpm"/"bpm_deviation" arrays are added only when
+    `with_series=True`. Use `batch_to_records()` for per-record dicts.
+    """
+    _require_numpy()
+    peaks_arr = np.asarray(peaks, dtype=np.int64).ravel()
+    offsets_arr = np.asarray(offsets, dtype=np.int64).ravel()
+    if offsets_arr.size == 0 or offsets_arr[0] != 0 or offsets_arr[-1] != peaks_arr.size:
+        raise ValueError("offsets must start at 0 and end at len(peaks)")
+    if bool((np.diff(offsets_arr) < 0).any()):
+        raise ValueError("offsets must be non-decreasing")
+    n = offsets_arr.size - 1
+    fs_arr = np.broadcast_to(np.asarray(fs, dtype=np.float64), (n,)).astype(np.float64)
+
+    peaks_arr, offsets_arr = _filter_peaks_batch(peaks_arr, offsets_arr)
+    counts = np.diff(offsets_arr)
+    seg = _segment_ids(offsets_arr)
+
+    # RR intervals never straddle two records and need a usable fs.
+    dseg = seg[:-1]
+    dx = np.diff(peaks_arr).astype(np.float64)
+    valid = (dseg == seg[1:]) & (dx > 0) & (fs_arr[dseg] > 0) if dx.size else np.zeros(0, dtype=bool)
+    bseg = dseg[valid] if dx.size else np.zeros(0, dtype=np.int64)
+    bpm = 60.0 / (dx[valid] / fs_arr[bseg]) if dx.size else np.zeros(0, dtype=np.float64)
+    beats = np.bincount(bseg, minlength=n)
+    has = beats > 0
+    safe_beats = np.maximum(beats, 1)
+
+    mean = np.bincount(bseg, weights=bpm, minlength=n) / safe_beats
+    dev = bpm - mean[bseg]
+    dev_mu = np.bincount(bseg, weights=dev, minlength=n) / safe_beats
+    sigma0 = np.sqrt(np.bincount(bseg, weights=(dev - dev_mu[bseg]) ** 2, minlength=n) / safe_beats)
+
+    bstart = np.concatenate(([0], np.cumsum(beats)[:-1])).astype(np.int64)
+    min_bpm = np.zeros(n, dtype=np.float64)
+    max_bpm = np.zeros(n, dtype=np.float64)
+    if bpm.size:
+        min_bpm[has] = np.minimum.reduceat(bpm, bstart[has])
+        max_bpm[has] = np.maximum.reduceat(bpm, bstart[has])
+
+    exps = np.exp(bpm - max_bpm[bseg])
+    weights = exps / np.bincount(bseg, weights=exps, minlength=n)[bseg]
+    w_mu = np.bincount(bseg, weights=weights, minlength=n) / safe_beats
+    w_std = np.sqrt(np.bincount(bseg, weights=(weights - w_mu[bseg]) ** 2, minlength=n) / safe_beats)
+    sigma = sigma0 + sigma0 * w_std
+
+    # Episode runs: consecutive out-of-band beats inside the same record.
+    flag = np.abs(dev) > sigma[bseg]
+    same_prev = np.concatenate(([False], bseg[1:] == bseg[:-1]))
+    same_next = np.concatenate((bseg[:-1] == bseg[1:], [False]))
+    run_start = np.flatnonzero(flag & ~(np.concatenate(([False], flag[:-1])) & same_prev))
+    run_end = np.flatnonzero(flag & ~(np.concatenate((flag[1:], [False])) & same_next))
+    ep_seg = bseg[run_start]
+    episodes_count = np.bincount(ep_seg, minlength=n).astype(np.int64)
+
+    first_peak = peaks_arr[offsets_arr[:-1][has]] if has.any() else np.zeros(0, dtype=np.int64)
+    last_peak = peaks_arr[offsets_arr[1:][has] - 1] if has.any() else np.zeros(0, dtype=np.int64)
+    duration_min = np.zeros(n, dtype=np.float64)
+    duration_min[has] = (last_peak - first_peak).astype(np.float64) / fs_arr[has] / 60.0
+    episodes_per_hour = np.zeros(n, dtype=np.float64)
+    pos = duration_min > 0
+    episodes_per_hour[pos] = (60.0 / duration_min[pos]) * episodes_count[pos]
+
+    # mistake_holder(th=4), applied column-wise.
+    noisy = episodes_count < 4
+    episodes_count[noisy] = 0
+    episodes_per_hour[noisy] = 0.0
+
+    episodes_timestamps: List[List[List[str]]] = [[] for _ in range(n)]
+    keep = ~noisy[ep_seg]
+    if keep.any():
+        ks, ke, kseg = run_start[keep], run_end[keep], ep_seg[keep]
+        base = offsets_arr[:-1][kseg]
+        local_end = np.minimum(ke - bstart[kseg] + 1, counts[kseg] - 1)
+        start_s = _sec2hms_many(peaks_arr[base + ks - bstart[kseg]].astype(np.float64) / fs_arr[kseg])
+        end_s = _sec2hms_many(peaks_arr[base + local_end].astype(np.float64) / fs_arr[kseg])
+        for r, a, b in zip(kseg.tolist(), start_s, end_s):
+            episodes_timestamps[r].append([a, b])
+
+    out: Dict[str, Any] = {
+        "avg_bpm": np.where(has, mean, 0.0),
+        "min_bpm": min_bpm,
+        "max_bpm": max_bpm,
+        "episodes_count": episodes_count,
+        "episodes_per_hour": episodes_per_hour,
+        "beats": beats.astype(np.int64),
+        "episodes_timestamps": episodes_timestamps,
+    }
+    if with_series:
+        split_at = np.cumsum(beats)[:-1]
+        out["instantaneous_bpm"] = np.split(bpm, split_at)
+        out["bpm_deviation"] = np.split(dev, split_at)
+    return out
+
+
+def batch_to_records(batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Expand a `preprocess_batch()` result into `preprocess_obs()`-shaped dicts.
+    Per-beat lists are filled only if the batch was computed with_series=True.
+    """
+    n = len(batch["episodes_timestamps"])
+    columns = {k: batch[k].tolist() for k in BATCH_SUMMARY_KEYS}
+    beats = batch["beats"].tolist()
+    series = "instantaneous_bpm" in batch
+    records: List[Dict[str, Any]] = []
+    for i in range(n):
+        if not beats[i]:
+            records.append(_empty_metrics())
+            continue
+        count = int(columns["episodes_count"][i])
+        records.append(
+            {
+                "instantaneous_bpm": batch["instantaneous_bpm"][i].tolist() if series else [],
+                "bpm_deviation": batch["bpm_deviation"][i].tolist() if series else [],
+                "avg_bpm": float(columns["avg_bpm"][i]),
+                "min_bpm": float(columns["min_bpm"][i]),
+                "max_bpm": float(columns["max_bpm"][i]),
+                "episodes_count": count,
+                "episodes_per_hour": float(columns["episodes_per_hour"][i]) if count else 0,
+                "episodes_timestamps": batch["episodes_timestamps"][i],
+            }
+        )
+    return records
+
+
+def pack_observations(observations: List[PeakObservation]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Concatenate PeakObservations into the (peaks, offsets, fs) input of `preprocess_batch()`."""
+    _require_numpy()
+    counts = np.asarray([len(o) for o in observations], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+    if observations:
+        peaks = np.concatenate([np.asarray(o.peaks, dtype=np.int64) for o in observations])
+    else:
+        peaks = np.zeros(0, dtype=np.int64)
+    fs = np.asarray([o.fs for o in observations], dtype=np.float64)
+    return peaks, offsets, fs
+
+
+def normalize_observations(records: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], "np.ndarray"]:
+    """
+    Bulk `normalize_observation()` for a list of
+    `resp_example/heart_rate_first10_responses.json`-style records.
+
+    Returns ({'peaks': flat int64, 'offsets': int64, 'bpm': [...], 'confidence': [...]}, fs)
+    ready for `preprocess_batch(obs['peaks'], obs['offsets'], fs)`. Upstream
+    bpm/confidence are None where absent; fs is 0.0 where unusable.
+    """
+    observations = [PeakObservation.from_record(r) for r in records]
+    peaks, offsets, fs = pack_observations(observations)
+    bpm = [o.bpm for o in observations]
+    confidence = [o.confidence for o in observations]
+    return {"peaks": peaks, "offsets": offsets, "bpm": bpm, "confidence": confidence}, fs
+
+
+# ---------------------------------------------------------------------------
+# Streaming accumulator for live measurements
+# ---------------------------------------------------------------------------
+
+
+def _logaddexp(a: float, b: float) -> float:
+    if a == -math.inf:
+        return b
+    if b == -math.inf:
+        return a
+    hi, lo = (a, b) if a >= b else (b, a)
+    return hi + math.log1p(math.exp(lo - hi))
+
+
+class RRAccumulator:
+    """
+    Incremental RR metrics for a recording that is still arriving.
+
+    Peaks are fed in chunks via `add_peaks()`; every accepted beat updates the
+    running state in O(1): Welford mean/variance of the instantaneous BPM,
+    running log-sum-exp of BPM and 2*BPM (which gives the spread of the softmax
+    weights without storing them), min/max and the currently open episode.
+    `snapshot()` reports the live numbers. Because the batch algorithm uses
+    whole-recording statistics (relaxation zone, sigma), live episodes are
+    provisional; `finalize()` runs the batch computation once over the raw
+    peaks and returns exactly what `preprocess_obs()` would.
+    """
+
+    def __init__(self, fs: float = 100.0, engine: Optional[str] = None) -> None:
+        self.fs = float(fs)
+        self.engine = resolve_engine(engine)
+        self._raw = array("q")
+        self._last_kept: Optional[int] = None
+        self._first_kept: Optional[int] = None
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+        self._lse = -math.inf
+        self._lse2 = -math.inf
+        self._episodes: List[List[int]] = []
+        self._open: Optional[List[int]] = None
+
+    @property
+    def beats(self) -> int:
+        """Number of RR intervals accepted so far."""
+        return self._n
+
+    def add_peaks(self, peaks: Union[Iterable[Any], PeakObservation]) -> None:
+        """Append a chunk of peak positions (ints, {'x': ...} dicts or a PeakObservation)."""
+        if isinstance(peaks, PeakObservation):
+            peaks = peaks.peaks_list()
+        for p in peaks:
+            try:
+                x = int(p.get("x")) if isinstance(p, dict) else int(p)  # type: ignore[arg-type]
+            except Exception:
+                continue
+            self._raw.append(x)
+            self._add_peak(x)
+
+    def _add_peak(self, x: int) -> None:
+        if self._last_kept is None:
+            self._first_kept = self._last_kept = x
+            return
+
+        # relaxation zone from the raw peaks seen so far, as filter_peaks() does globally
+        n_raw = len(self._raw)
+        avg_diff = float(x - self._raw[0]) / float(n_raw - 1)
+        relax = avg_diff / 2.0 if avg_diff > 0 else 0.0
+        dx = x - self._last_kept
+        if float(dx) <= relax:
+            return
+        prev, self._last_kept = self._last_kept, x
+        if self.fs <= 0:
+            return
+
+        bpm = 60.0 / (float(dx) / self.fs)
+        self._n += 1
+        delta = bpm - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (bpm - self._mean)
+        self._min = min(self._min, bpm)
+        self._max = max(self._max, bpm)
+        self._lse = _logaddexp(self._lse, bpm)
+        self._lse2 = _logaddexp(self._lse2, 2.0 * bpm)
+
+        if abs(bpm - self._mean) > self._sigma():
+            if self._open is None:
+                self._open = [prev, x]
+                self._episodes.append(self._open)
+            else:
+                self._open[1] = x
+        else:
+            self._open = None
+
+    def _sigma(self) -> float:
+        n = self._n
+        sigma0 = math.sqrt(self._m2 / n) if n else 0.0
+        # softmax weights w_i = exp(b_i - lse); sum(w_i^2) = exp(lse2 - 2 * lse)
+        w_var = math.exp(self._lse2 - 2.0 * self._lse) / n - 1.0 / (n * n) if n else 0.0
+        return sigma0 + sigma0 * math.sqrt(max(w_var, 0.0))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Live summary in the `preprocess_obs()` shape, without per-beat lists."""
+        if not self._n:
+            return _empty_metrics()
+        episodes_count = len(self._episodes)
+        duration_min = float(self._last_kept - self._first_kept) / self.fs / 60.0  # type: ignore[operator]
+        episodes_per_hour = (60.0 / duration_min) * episodes_count if duration_min > 0 else 0.0
+        return mistake_holder(
+            {
+                "instantaneous_bpm": [],
+                "bpm_deviation": [],
+                "avg_bpm": float(self._mean),
+                "min_bpm": float(self._min),
+                "max_bpm": float(self._max),
+                "episodes_count": int(episodes_count),
+                "episodes_per_hour": float(episodes_per_hour),
+                "episodes_timestamps": [
+                    [sec2hms(float(a) / self.fs), sec2hms(float(b) / self.fs)] for a, b in self._episodes
+                ],
+            },
+            th=4,
+        )
+
+    def finalize(self) -> Dict[str, Any]:
+        """Exact batch metrics over every peak received; same as `preprocess_obs()`."""
+        if not self._raw:
+            return _empty_metrics()
+        if self.engine == "numpy":
+            return _preprocess_peaks_numpy(np.frombuffer(self._raw, dtype=np.int64).copy(), self.fs)
+        return preprocess_obs(PeakObservation(self._raw.tolist(), fs=self.fs), engine="python")
+
+
+# ---------------------------------------------------------------------------
+# Windowed long-recording (Holter) mode
+# ---------------------------------------------------------------------------
+
+DEFAULT_WINDOW_S = 300.0
+
+
+def iter_peak_chunks(source: Any, chunk_size: int = 65536) -> Iterable["np.ndarray"]:
+    """
+    Yield int64 peak chunks from a file path, open text file or iterable,
+    without loading the whole recording.
+
+    - `*.npy` paths are memory-mapped and sliced.
+    - Other paths / text files hold integers separated by whitespace or commas.
+    - Iterables may yield ints (batched into chunks) or whole chunks.
+    """
+    _require_numpy()
+    if isinstance(source, (str, bytes)) or hasattr(source, "__fspath__"):
+        path = str(source if not isinstance(source, bytes) else source.decode())
+        if path.endswith(".npy"):
+            mapped = np.load(path, mmap_mode="r")
+            for i in range(0, mapped.shape[0], chunk_size):
+                yield np.asarray(mapped[i : i + chunk_size], dtype=np.int64)
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            yield from iter_peak_chunks(f, chunk_size)
+        return
+
+    if hasattr(source, "read"):
+        tail = ""
+        while True:
+            data = source.read(chunk_size * 8)
+            text = (tail + data).replace(",", " ")
+            if data:
+                cut = max(text.rfind(" "), text.rfind("\n"), text.rfind("\t"))
+                text, tail = (text[: cut + 1], text[cut + 1 :]) if cut >= 0 else ("", text)
+            tokens = text.split()
+            if tokens:
+                yield np.asarray([int(t) for t in tokens], dtype=np.int64)
+            if not data:
+                return
+
+    batch: List[int] = []
+    for item in source:
+        if isinstance(item, (int, np.integer)):
+            batch.append(int(item))
+            if len(batch) >= chunk_size:
+                yield np.asarray(batch, dtype=np.int64)
+                batch = []
+        else:
+            if batch:
+                yield np.asarray(batch, dtype=np.int64)
+                batch = []
+            yield _peak_array(item) if isinstance(item, PeakObservation) else np.asarray(item, dtype=np.int64)
+    if batch:
+        yield np.asarray(batch, dtype=np.int64)
+
+
+class WindowedRRMetrics:
+    """
+    Bounded-memory metrics for multi-hour recordings.
+
+    Peaks are cut into fixed-duration windows (aligned to sample 0). Each
+    window is processed like `preprocess_obs()` with its own relaxation zone,
+    mean and sigma, and only its summary is kept; the last accepted peak is
+    carried over so the RR interval across a boundary is not lost. An episode
+    still open at the end of a window is joined with one starting on the first
+    beat of the next window. Memory is one window of peaks plus the summaries.
+
+    `add_peaks()` returns the windows completed by that chunk, `finalize()`
+    flushes the last window and returns the merged global summary (same keys
+    as `preprocess_obs()` without the per-beat lists). With a window longer
+    than the recording the summary equals `preprocess_obs()`.
+    """
+
+    def __init__(self, fs: float = 100.0, window_s: float = DEFAULT_WINDOW_S) -> None:
+        _require_numpy()
+        if window_s <= 0:
+            raise ValueError("window_s must be positive")
+        self.fs = float(fs)
+        self.window_s = float(window_s)
+        self.windows: List[Dict[str, Any]] = []
+        self._window_len = self.window_s * self.fs if self.fs > 0 else math.inf
+        self._buf = np.zeros(0, dtype=np.int64)
+        self._carry: Optional[int] = None
+        self._first_peak: Optional[int] = None
+        self._episodes: List[List[int]] = []
+        self._open_tail = False
+        self._beats = 0
+        self._bpm_sum = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+    def add_peaks(self, peaks: Any) -> List[Dict[str, Any]]:
+        """Feed one chunk of peak positions; returns the windows it completed."""
+        arr = _peak_array(peaks) if isinstance(peaks, PeakObservation) else np.asarray(peaks, dtype=np.int64).ravel()
+        if arr.size:
+            self._buf = np.concatenate((self._buf, arr))
+        done: List[Dict[str, Any]] = []
+        while self._buf.size and math.isfinite(self._window_len):
+            index = int(self._buf[0] // self._window_len)
+            beyond = self._buf >= (index + 1) * self._window_len
+            if not beyond.any():
+                break
+            cut = int(np.argmax(beyond))
+            done.append(self._process_window(index, self._buf[:cut]))
+            self._buf = self._buf[cut:]
+        return done
+
+    def finalize(self) -> Dict[str, Any]:
+        """Flush the open window and return the merged whole-recording summary."""
+        if self._buf.size:
+            index = int(self._buf[0] // self._window_len) if math.isfinite(self._window_len) else 0
+            self._process_window(index, self._buf)
+            self._buf = np.zeros(0, dtype=np.int64)
+        if not self._beats:
+            summary = _empty_metrics()
+            del summary["instantaneous_bpm"], summary["bpm_deviation"]
+            summary["beats"] = 0
+            summary["windows_count"] = len(self.windows)
+            return summary
+
+        episodes_count = len(self._episodes)
+        duration_min = float(self._carry - self._first_peak) / self.fs / 60.0  # type: ignore[operator]
+        episodes_per_hour = (60.0 / duration_min) * episodes_count if duration_min > 0 else 0.0
+        summary = mistake_holder(
+            {
+                "avg_bpm": float(self._bpm_sum / self._beats),
+                "min_bpm": float(self._min),
+                "max_bpm": float(self._max),
+                "episodes_count": int(episodes_count),
+                "episodes_per_hour": float(episodes_per_hour),
+                "episodes_timestamps": [
+                    [sec2hms(float(a) / self.fs), sec2hms(float(b) / self.fs)] for a, b in self._episodes
+                ],
+            },
+            th=4,
+        )
+        summary["beats"] = self._beats
+        summary["windows_count"] = len(self.windows)
+        return summary
+
+    def _process_window(self, index: int, raw: "np.ndarray") -> Dict[str, Any]:
+        seq = raw if self._carry is None else np.concatenate(([self._carry], raw))
+        if self._first_peak is None and seq.size:
+            self._first_peak = int(seq[0])
+        kept = _filter_peak_array(seq)
+        window: Dict[str, Any] = {
+            "window_index": index,
+            "start": sec2hms(index * self.window_s),
+            "end": sec2hms((index + 1) * self.window_s),
+            "beats": 0,
+            "avg_bpm": 0.0,
+            "min_bpm": 0.0,
+            "max_bpm": 0.0,
+            "episodes_count": 0,
+            "episodes_timestamps": [],
+        }
+        if kept.size:
+            self._carry = int(kept[-1])
+
+        dx = np.diff(kept).astype(np.float64)
+        if self.fs <= 0 or not (dx > 0).any():
+            self.windows.append(window)
+            return window
+        bpm = 60.0 / (dx[dx > 0] / self.fs)
+        mean = float(bpm.mean())
+        dev = bpm - mean
+        sigma0 = float(dev.std())
+        exps = np.exp(bpm - bpm.max())
+        sigma = sigma0 + sigma0 * float((exps / exps.sum()).std())
+        flags = np.abs(dev) > sigma
+        starts, ends = _episode_runs(np.flatnonzero(flags))
+        runs = [
+            [int(kept[s]), int(kept[min(e + 1, kept.size - 1)])] for s, e in zip(starts.tolist(), ends.tolist())
+        ]
+
+        window.update(
+            beats=int(bpm.size),
+            avg_bpm=mean,
+            min_bpm=float(bpm.min()),
+            max_bpm=float(bpm.max()),
+            episodes_count=len(runs),
+            episodes_timestamps=[[sec2hms(a / self.fs), sec2hms(b / self.fs)] for a, b in runs],
+        )
+        self.windows.append(window)
+
+        if runs and self._open_tail and bool(flags[0]):
+            self._episodes[-1][1] = runs[0][1]
+            runs = runs[1:]
+        self._episodes.extend(runs)
+        self._open_tail = bool(flags[-1])
+        self._beats += int(bpm.size)
+        self._bpm_sum += float(bpm.sum())
+        self._min = min(self._min, float(bpm.min()))
+        self._max = max(self._max, float(bpm.max()))
+        return window
+
+
+def preprocess_long_recording(
+    source: Any, fs: float = 100.0, window_s: float = DEFAULT_WINDOW_S, chunk_size: int = 65536
+) -> Dict[str, Any]:
+    """
+    Holter-mode `preprocess_obs()`: stream peaks from a file or iterator (see
+    `iter_peak_chunks()`) through WindowedRRMetrics.
+    Returns {'windows': [...per-window metrics], 'summary': {...}}.
+    """
+    acc = WindowedRRMetrics(fs=fs, window_s=window_s)
+    for chunk in iter_peak_chunks(source, chunk_size=chunk_size):
+        acc.add_peaks(chunk)
+    summary = acc.finalize()
+    return {"windows": acc.windows, "summary": summary}
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from cardioai_backend.scg.observation import SampleColumns
+from cardioai_backend.scg.peak_detection import DEFAULT_FS, estimate_sampling_rate
+from cardioai_backend.utils import get_config_float
+
+# Defaults for the [QUALITY] section of config.ini. Every recording in
+# tests/data/cardiolog_payloads.json passes with a wide margin; see
+# tools/bench_quality_gate.py for the rejected cases.
+QUALITY_THRESHOLDS: Dict[str, float] = {
+    "MIN_DURATION_S": 5.0,
+    "MAX_MOTION": 1.0,  # m/s^2, std of the 1 s moving average of az
+    "MAX_SATURATION": 0.05,  # share of samples clipped at the recording's min/max
+    "MAX_FLATLINE": 0.3,  # share of samples in >= 0.5 s runs of one value
+    "MAX_GAP_RATIO": 0.2,  # share of samples missing according to the timestamps
+    "MIN_SNR_DB": 6.0,  # beat envelope peak vs floor in the 0.7-3.5 Hz band
+}
+
+CARDIAC_BAND_HZ = (0.7, 3.5)  # 42-210 BPM
+_SNR_SPAN_DB = 10.0  # MIN_SNR_DB + this scores 1.0
+_SATURATION_RUN = 3
+_FLATLINE_RUN_S = 0.5
+_SEGMENT_S = 20.0
+
+
+def load_quality_thresholds() -> Dict[str, float]:
+    return {k: get_config_float(k, section="QUALITY", fallback=v) for k, v in QUALITY_THRESHOLDS.items()}
+
+
+def _centered_mean(x: np.ndarray, window: int) -> np.ndarray:
+    csum = np.concatenate(([0.0], np.cumsum(x)))
+    idx = np.arange(x.size)
+    lo = np.clip(idx - window // 2, 0, x.size)
+    hi = np.clip(idx + window // 2 + 1, 0, x.size)
+    return (csum[hi] - csum[lo]) / (hi - lo)
+
+
+def _equal_runs(x: np.ndarray) -> Any:
+    """(start, length) of every run of >= 2 equal consecutive samples."""
+    edges = np.diff(np.concatenate(([0], (np.diff(x) == 0).astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    return starts, np.flatnonzero(edges == -1) - starts + 1
+
+
+def _gap_ratio(timestamps: Optional[np.ndarray]) -> float:
+    if timestamps is None or timestamps.size < 2:
+        return 0.0
+    steps = np.diff(timestamps)
+    step = float(np.median(steps))
+    if step <= 0:
+        return 0.0
+    missing = float(np.clip(np.rint(steps / step) - 1, 0, None).sum())
+    return missing / (missing + timestamps.size)
+
+
+def _cardiac_snr_db(hp: np.ndarray, fs: float) -> float:
+    """
+    Periodicity of the beat envelope: strongest 0.7-3.5 Hz line of the
+    |high-passed az| envelope spectrum over the median level around it,
+    averaged over ~20 s segments.
+    """
+    envelope = _centered_mean(np.abs(hp), max(1, int(0.1 * fs)))
+    seg = min(envelope.size, int(_SEGMENT_S * fs))
+    count = envelope.size // seg
+    segments = envelope[: count * seg].reshape(count, seg)
+    segments = segments - segments.mean(axis=1, keepdims=True)
+    power = (np.abs(np.fft.rfft(segments * np.hanning(seg), axis=1)) ** 2).mean(axis=0)
+    freqs = np.fft.rfftfreq(seg, 1.0 / fs)
+    band = (freqs >= CARDIAC_BAND_HZ[0]) & (freqs <= CARDIAC_BAND_HZ[1])
+    floor = float(np.median(power[(freqs > 0.3) & (freqs <= 2 * CARDIAC_BAND_HZ[1])])) if band.any() else 0.0
+    if floor <= 0.0:
+        return 0.0
+    return float(10.0 * np.log10(power[band].max() / floor))
+
+
+def assess_quality(samples: SampleColumns, thresholds: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Vectorized signal-quality check over az (and timestamps) of a recording.
+
+    Returns the individual measures, `score` in [0, 1] (weakest measure,
+    1 = comfortably within every threshold), `usable` and the failed checks
+    in `reasons`.
+    """
+    th = dict(QUALITY_THRESHOLDS, **(thresholds or {}))
+    z = np.asarray(samples.az, dtype=np.float64)
+    ts = None if samples.timestamp is None else np.asarray(samples.timestamp, dtype=np.int64)
+    fs = estimate_sampling_rate(ts, fallback=DEFAULT_FS)
+    n = z.size
+    duration_s = n / fs if fs > 0 else 0.0
+
+    motion = saturation = flatline = 0.0
+    snr_db = 0.0
+    if n >= 2:
+        baseline = _centered_mean(z, max(1, int(fs)))
+        motion = float(baseline.std())
+        starts, lengths = _equal_runs(z)
+        extreme = (z[starts] == z.max()) | (z[starts] == z.min())
+        saturation = float(lengths[(lengths >= _SATURATION_RUN) & extreme].sum()) / n
+        flatline = float(lengths[lengths >= max(2, int(_FLATLINE_RUN_S * fs))].sum()) / n
+        snr_db = _cardiac_snr_db(z - baseline, fs)
+    gap_ratio = _gap_ratio(ts)
+
+    components = {
+        "duration": 1.0 if duration_s >= th["MIN_DURATION_S"] else 0.0,
+        "motion": 1.0 - motion / th["MAX_MOTION"],
+        "saturation": 1.0 - saturation / th["MAX_SATURATION"],
+        "flatline": 1.0 - flatline / th["MAX_FLATLINE"],
+        "gap": 1.0 - gap_ratio / th["MAX_GAP_RATIO"],
+        "snr": (snr_db - th["MIN_SNR_DB"]) / _SNR_SPAN_DB,
+    }
+    reasons: List[str] = [name for name, c in components.items() if c < 0.0 or (name == "duration" and c == 0.0)]
+    score = min(1.0, max(0.0, min(components.values())))
+    return {
+        "score": round(score, 3),
+        "usable": not reasons,
+        "reasons": reasons,
+        "duration_s": duration_s,
+        "sampling_rate": fs,
+        "motion": motion,
+        "saturation_ratio": saturation,
+        "flatline_ratio": flatline,
+        "gap_ratio": gap_ratio,
+        "snr_db": snr_db,
+    }
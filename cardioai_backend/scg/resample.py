@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cardioai_backend.scg.observation import SampleColumns
+
+# A step longer than this many nominal sample periods is a dropout, not jitter.
+DROPOUT_FACTOR = 2.5
+AXES = ("ax", "ay", "az")
+
+
+def _clean_timestamps(ts: np.ndarray) -> Optional[np.ndarray]:
+    """Indices that make `ts` strictly increasing (stable sort, first of each duplicate); None if already so."""
+    if ts.size < 2 or bool((np.diff(ts) > 0).all()):
+        return None
+    order = np.argsort(ts, kind="stable")
+    keep = np.concatenate(([True], np.diff(ts[order]) > 0))
+    return order[keep]
+
+
+def estimate_rate(timestamps: Any) -> Dict[str, float]:
+    """
+    True sampling rate from millisecond timestamps.
+
+    Steps longer than DROPOUT_FACTOR x the median step are dropouts; the rate
+    is the mean of the remaining steps, so jitter (e.g. 9-18 ms around 17 ms)
+    averages out and dropouts do not drag it down. Returns fs (Hz), step_ms,
+    jitter_ms (std of the regular steps), dropouts and missing_ratio (share of
+    expected samples lost in dropouts).
+    """
+    ts = np.asarray(timestamps, dtype=np.float64).ravel()
+    order = _clean_timestamps(ts)
+    if order is not None:
+        ts = ts[order]
+    steps = np.diff(ts)
+    if steps.size == 0 or float(np.median(steps)) <= 0:
+        return {"fs": 0.0, "step_ms": 0.0, "jitter_ms": 0.0, "dropouts": 0, "missing_ratio": 0.0}
+    regular = steps <= DROPOUT_FACTOR * float(np.median(steps))
+    step = float(steps[regular].mean())
+    missing = float(np.clip(np.rint(steps[~regular] / step) - 1, 0, None).sum())
+    return {
+        "fs": 1000.0 / step,
+        "step_ms": step,
+        "jitter_ms": float(steps[regular].std()),
+        "dropouts": int((~regular).sum()),
+        "missing_ratio": missing / (missing + ts.size),
+    }
+
+
+def remap_peaks(peaks: Any, timestamps: Any, fs: Optional[float] = None) -> Tuple[np.ndarray, float]:
+    """
+    Move peak sample indices of a jittery recording onto the uniform grid of
+    rate `fs` (default: estimated from `timestamps`), via each peak's actual
+    timestamp. Returns (int64 grid indices, fs).
+    """
+    ts = np.asarray(timestamps, dtype=np.float64).ravel()
+    fs = float(fs) if fs else estimate_rate(ts)["fs"]
+    idx = np.asarray(peaks, dtype=np.int64).ravel()
+    idx = idx[(idx >= 0) & (idx < ts.size)]
+    if fs <= 0 or idx.size == 0:
+        return idx, fs
+    return np.rint((ts[idx] - ts[0]) * fs / 1000.0).astype(np.int64), fs
+
+
+class StreamingResampler:
+    """
+    Linear interpolation of sample columns onto a uniform time grid, chunk by
+    chunk, so day-long recordings never need to be resident at once.
+
+    The grid is t0 + k * 1000 / fs ms, with t0 the first timestamp and fs
+    given or estimated from the first chunk. Each `add()` returns the grid
+    points covered so far (the last raw sample is carried into the next
+    chunk). Out-of-order and duplicate timestamps are dropped; grid points
+    inside dropouts are interpolated and counted in `stats()`.
+    """
+
+    def __init__(self, fs: Optional[float] = None, columns: Sequence[str] = AXES) -> None:
+        self.fs = float(fs) if fs else 0.0
+        self.columns = tuple(columns)
+        self._t0: Optional[float] = None
+        self._k = 0
+        self._carry_t: Optional[float] = None
+        self._carry: Optional[np.ndarray] = None
+        self.samples_in = 0
+        self.samples_out = 0
+        self.dropouts = 0
+        self.gap_points = 0
+
+    @property
+    def step_ms(self) -> float:
+        return 1000.0 / self.fs if self.fs > 0 else 0.0
+
+    def add(self, timestamps: Any, values: Sequence[Any]) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Feed one chunk (timestamps + one array per column); returns (grid ms, resampled float32 columns)."""
+        ts = np.asarray(timestamps, dtype=np.float64).ravel()
+        cols = np.vstack([np.asarray(v, dtype=np.float64).ravel() for v in values]) if len(values) else None
+        if cols is None or cols.shape[1] != ts.size:
+            raise ValueError("timestamps and value columns must have equal length")
+        self.samples_in += ts.size
+        order = _clean_timestamps(ts)
+        if order is not None:
+            ts, cols = ts[order], cols[:, order]
+        if self._carry_t is not None:
+            newer = ts > self._carry_t
+            ts = np.concatenate(([self._carry_t], ts[newer]))
+            cols = np.hstack((self._carry[:, None], cols[:, newer]))  # type: ignore[index]
+        if ts.size == 0:
+            return np.zeros(0), [np.zeros(0, dtype=np.float32) for _ in self.columns]
+        if self.fs <= 0:
+            self.fs = estimate_rate(ts)["fs"]
+            if self.fs <= 0:
+                raise ValueError("cannot estimate the sampling rate from the timestamps")
+        if self._t0 is None:
+            self._t0 = float(ts[0])
+
+        step = self.step_ms
+        k_end = int(np.floor((ts[-1] - self._t0) / step + 1e-9)) + 1
+        grid = self._t0 + step * np.arange(self._k, k_end, dtype=np.float64)
+        out = [np.interp(grid, ts, row).astype(np.float32) for row in cols]
+
+        gaps = np.flatnonzero(np.diff(ts) > DROPOUT_FACTOR * step)
+        if gaps.size:
+            self.dropouts += int(gaps.size)
+            inside = np.searchsorted(grid, ts[gaps + 1]) - np.searchsorted(grid, ts[gaps], side="right")
+            self.gap_points += int(inside.sum())
+
+        self._k = max(self._k, k_end)
+        self._carry_t = float(ts[-1])
+        self._carry = cols[:, -1].copy()
+        self.samples_out += grid.size
+        return grid, out
+
+    def add_columns(self, samples: SampleColumns) -> SampleColumns:
+        """`add()` for a SampleColumns chunk with timestamps; returns the resampled chunk."""
+        if samples.timestamp is None:
+            raise ValueError("resampling needs sample timestamps")
+        grid, (ax, ay, az) = self.add(samples.timestamp, [samples.ax, samples.ay, samples.az])
+        return SampleColumns(ax, ay, az, np.rint(grid).astype(np.int64))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fs": self.fs,
+            "samples_in": self.samples_in,
+            "samples_out": self.samples_out,
+            "dropouts": self.dropouts,
+            "interpolated_ratio": self.gap_points / self.samples_out if self.samples_out else 0.0,
+        }
+
+
+def resample_columns(samples: SampleColumns, fs: Optional[float] = None) -> Tuple[SampleColumns, Dict[str, Any]]:
+    """
+    Whole-recording resampling onto a uniform grid of rate `fs` (default: the
+    rate estimated from the timestamps). Returns the new columns and a report
+    with the estimated device rate (`source_fs`), jitter and dropouts.
+    """
+    if samples.timestamp is None:
+        raise ValueError("resampling needs sample timestamps")
+    rate = estimate_rate(samples.timestamp)
+    resampler = StreamingResampler(fs or rate["fs"])
+    out = resampler.add_columns(samples)
+    report = resampler.stats()
+    report.update(source_fs=rate["fs"], jitter_ms=rate["jitter_ms"], missing_ratio=rate["missing_ratio"])
+    return out, report
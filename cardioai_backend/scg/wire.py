@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import gzip
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from cardioai_backend.scg.ingest import DEFAULT_MAX_SAMPLES, SAMPLES_KEY, IngestError, IngestLimitError
+from cardioai_backend.scg.observation import SampleColumns
+
+try:  # Python 3.14+
+    from compression import zstd as _zstd  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depends on the interpreter
+    _zstd = None
+try:
+    import zstandard as _zstandard  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - zstd is optional, gzip is always available
+    _zstandard = None
+
+# Compact observation encoding accepted by /api/chat next to the JSON sample list:
+#
+#   {"format": "scg-columns/v1", "key": "az_data_array", "samples": n,
+#    "columns": [{"name": "ax", "dtype": "float32"}, ...,
+#                {"name": "timestamp", "dtype": "int16", "delta": true, "start": t0}],
+#    "compression": "gzip", "data": "<base64>", ...other observation fields}
+#
+# `data` is the little-endian columns back to back, in `columns` order. Accel
+# columns are float32, or int16 with a "scale" (value = int * scale); delta
+# timestamps are int16/int32 steps with data[0] = 0, so t = start + cumsum.
+# In a multipart upload the header travels as JSON and `data` as a binary part.
+WIRE_FORMAT = "scg-columns/v1"
+WIRE_DTYPES = {"float32": "<f4", "int16": "<i2", "int32": "<i4", "int64": "<i8"}
+WIRE_COMPRESSIONS = ("none", "gzip", "zstd")
+_HEADER_KEYS = ("format", "key", "samples", "columns", "compression", "data")
+_AXES = ("ax", "ay", "az")
+
+
+def zstd_available() -> bool:
+    return _zstd is not None or _zstandard is not None
+
+
+def is_wire_observation(observation: Any) -> bool:
+    return isinstance(observation, dict) and observation.get("format") == WIRE_FORMAT
+
+
+def _decompress(data: bytes, compression: str, expected: int) -> bytes:
+    """Decompress at most `expected` bytes, so a small body cannot inflate into a huge one."""
+    if compression == "none":
+        return data
+    if compression == "gzip":
+        d = zlib.decompressobj(wbits=31)
+        out = d.decompress(data, expected + 1)
+    elif compression == "zstd":
+        if _zstd is not None:
+            d = _zstd.ZstdDecompressor()
+            out = d.decompress(data, max_length=expected + 1)
+        elif _zstandard is not None:
+            out = _zstandard.ZstdDecompressor().decompress(data, max_output_size=expected + 1)
+        else:
+            raise IngestError("zstd compression is not supported by this server; use gzip")
+    else:
+        raise IngestError(f"unknown compression {compression!r}; expected one of {WIRE_COMPRESSIONS}")
+    if len(out) > expected:
+        raise IngestError("decompressed observation is larger than its header declares")
+    return out
+
+
+def _column_specs(header: Dict[str, Any], n: int) -> Tuple[List[Dict[str, Any]], int]:
+    columns = header.get("columns")
+    if not isinstance(columns, list) or not columns:
+        raise IngestError("encoded observation needs a 'columns' list")
+    specs: List[Dict[str, Any]] = []
+    size = 0
+    for col in columns:
+        if not isinstance(col, dict) or col.get("name") not in _AXES + ("timestamp",):
+            raise IngestError(f"invalid column spec {col!r}")
+        dtype = WIRE_DTYPES.get(str(col.get("dtype")))
+        if dtype is None:
+            raise IngestError(f"unsupported column dtype {col.get('dtype')!r}; expected one of {tuple(WIRE_DTYPES)}")
+        specs.append(dict(col, np_dtype=np.dtype(dtype), offset=size))
+        size += np.dtype(dtype).itemsize * n
+    return specs, size
+
+
+def decode_observation(
+    observation: Dict[str, Any], data: Optional[bytes] = None, *, max_samples: int = DEFAULT_MAX_SAMPLES
+) -> Dict[str, Any]:
+    """
+    Wire-format observation -> regular observation dict with a SampleColumns
+    under its sample key. `data` is the raw column bytes from a multipart
+    part; otherwise `observation["data"]` (base64) is used. float32 columns are
+    zero-copy views of the decoded buffer.
+    """
+    try:
+        n = int(observation.get("samples", -1))
+    except (TypeError, ValueError):
+        n = -1
+    if n < 0:
+        raise IngestError("encoded observation needs a non-negative 'samples' count")
+    if n > max_samples:
+        raise IngestLimitError(f"observation exceeds {max_samples} samples")
+    specs, expected = _column_specs(observation, n)
+
+    if data is None:
+        encoded = observation.get("data")
+        if not isinstance(encoded, str):
+            raise IngestError("encoded observation needs base64 'data'")
+        try:
+            data = base64.b64decode(encoded, validate=True)
+        except (binascii.Error, ValueError) as e:
+            raise IngestError(f"invalid base64 data: {e}") from e
+    try:
+        raw = _decompress(data, str(observation.get("compression", "none")), expected)
+    except IngestError:
+        raise
+    except Exception as e:  # zlib.error, or the zstd libraries' own error types
+        raise IngestError(f"invalid compressed data: {e}") from e
+    if len(raw) != expected:
+        raise IngestError(f"encoded observation has {len(raw)} bytes, header declares {expected}")
+
+    values: Dict[str, Any] = {}
+    timestamp = None
+    for spec in specs:
+        col = np.frombuffer(raw, dtype=spec["np_dtype"], count=n, offset=spec["offset"])
+        if spec["name"] == "timestamp":
+            if spec.get("delta"):
+                timestamp = np.cumsum(col, dtype=np.int64) + int(spec.get("start", 0))
+            else:
+                timestamp = col.astype(np.int64, copy=False)
+        elif "scale" in spec:
+            values[spec["name"]] = col.astype(np.float32) * np.float32(spec["scale"])
+        else:
+            values[spec["name"]] = col
+    if "az" not in values:
+        raise IngestError("encoded observation has no 'az' column")
+    zeros = np.zeros(n, dtype=np.float32)
+    samples = SampleColumns(values.get("ax", zeros), values.get("ay", zeros), values["az"], timestamp)
+
+    out = {k: v for k, v in observation.items() if k not in _HEADER_KEYS}
+    out[str(observation.get("key") or SAMPLES_KEY)] = samples
+    return out
+
+
+def encode_observation(
+    samples: Any,
+    *,
+    key: str = SAMPLES_KEY,
+    compression: str = "gzip",
+    accel_scale: Optional[float] = None,
+    binary: bool = False,
+) -> Any:
+    """
+    SampleColumns (or a list of sample dicts) -> wire-format observation, the
+    Python twin of `encodeObservation()` in the frontend `apiService.ts`.
+    `accel_scale` quantizes ax/ay/az to int16 steps of that size. With
+    `binary=True` returns (header, data bytes) for a multipart upload.
+    """
+    if not isinstance(samples, SampleColumns):
+        samples = SampleColumns.from_samples(samples)
+    n = len(samples)
+    columns: List[Dict[str, Any]] = []
+    parts: List[bytes] = []
+    for name in _AXES:
+        col = np.asarray(getattr(samples, name), dtype=np.float32)
+        if accel_scale:
+            q = np.clip(np.rint(col / accel_scale), -32768, 32767).astype("<i2")
+            columns.append({"name": name, "dtype": "int16", "scale": accel_scale})
+            parts.append(q.tobytes())
+        else:
+            columns.append({"name": name, "dtype": "float32"})
+            parts.append(col.astype("<f4", copy=False).tobytes())
+    if samples.timestamp is not None and n:
+        ts = np.asarray(samples.timestamp, dtype=np.int64)
+        deltas = np.diff(ts, prepend=ts[0])
+        small = bool(np.abs(deltas).max() <= 32767)
+        dtype = "int16" if small else "int32"
+        columns.append({"name": "timestamp", "dtype": dtype, "delta": True, "start": int(ts[0])})
+        parts.append(deltas.astype(WIRE_DTYPES[dtype]).tobytes())
+    if compression not in WIRE_COMPRESSIONS:
+        raise ValueError(f"unknown compression {compression!r}; expected one of {WIRE_COMPRESSIONS}")
+
+    data = b"".join(parts)
+    if compression == "gzip":
+        data = gzip.compress(data, compresslevel=6, mtime=0)
+    elif compression == "zstd":
+        if _zstd is not None:
+            data = _zstd.compress(data)
+        elif _zstandard is not None:
+            data = _zstandard.ZstdCompressor().compress(data)
+        else:
+            raise ValueError("zstd is not available; install `zstandard` or use gzip")
+    header = {"format": WIRE_FORMAT, "key": key, "samples": n, "columns": columns, "compression": compression}
+    if binary:
+        return header, data
+    header["data"] = base64.b64encode(data).decode("ascii")
+    return header
@@ -14,9 +14,39 @@ class ChatRequest(BaseModel):
     message: Optional[str] = None
     history: Optional[List[Message]] = []
     observation: Optional[Dict[str, Any]] = None
+    # Server-side conversation (POST /api/sessions): send no history, only the new message.
+    session_id: Optional[str] = None
+
+
+class BatchItem(ChatRequest):
+    # Echoed in the item's result line, e.g. the clinic's own measurement id.
+    id: Optional[str] = None
+
+
+class BatchAnalyzeRequest(BaseModel):
+    items: List[BatchItem]
 
 
 class ChatResponse(BaseModel):
     response: str
-    history: List[Dict[str, str]]
-
+    # Omitted in session mode: the server keeps the history.
+    history: Optional[List[Dict[str, str]]] = None
+    session_id: Optional[str] = None
+
+
+class SessionResponse(BaseModel):
+    session_id: str
+    history: List[Dict[str, str]] = []
+    measurement: Optional[str] = None
+    expires_in_s: float
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str  # queued | running | done | failed
+    # ChatResponse fields once done; {"status_code", "detail"} once failed.
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[Dict[str, Any]] = None
+    queue_ms: Optional[float] = None
+    run_ms: Optional[float] = None
+    expires_in_s: Optional[float] = None
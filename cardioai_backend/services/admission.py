@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from cardioai_backend.metrics import histogram
+from cardioai_backend.settings import AdmissionSettings, Configured, Settings
+
+# Lower value = served first. Follow-up turns (a user waiting on a short
+# answer) go ahead of new measurements (Heartscan + a long first analysis),
+# and both go ahead of bulk uploads (POST /api/analyze/batch).
+PRIORITY_FOLLOW_UP = 0
+PRIORITY_MEASUREMENT = 1
+PRIORITY_BATCH = 2
+
+# Priority of the current request; set once per request by the chat endpoints.
+request_priority: contextvars.ContextVar[int] = contextvars.ContextVar("request_priority", default=PRIORITY_FOLLOW_UP)
+
+
+class AdmissionRejected(Exception):
+    """No upstream slot: 429 when the wait queue is full, 503 when the wait exceeded its deadline or was shed."""
+
+    def __init__(self, name: str, status_code: int, retry_after_s: float, reason: str) -> None:
+        self.name = name
+        self.status_code = status_code
+        self.retry_after_s = retry_after_s
+        super().__init__(f"{name} is busy ({reason}); retry in {math.ceil(retry_after_s)} s")
+
+
+class AdmissionController:
+    """
+    At most `max_concurrent` calls to one upstream at a time; up to
+    `max_queue` more wait, best priority first, for at most
+    `queue_timeout_s`. A full queue rejects at once (429), unless the new
+    call outranks the worst waiter, which is then shed (503) instead.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        enabled: bool = True,
+        max_concurrent: int = 32,
+        max_queue: int = 64,
+        queue_timeout_s: float = 10.0,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_s = queue_timeout_s
+        self._active = 0
+        self._waiters: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._seq = itertools.count()
+        self._avg_hold_s = 1.0
+        self.queue_wait = histogram(f"admission.{name}.queue_wait_ms")
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.shed = 0
+
+    def configure(self, settings: AdmissionSettings) -> None:
+        """Apply reloaded settings; calls in flight keep their slots, added capacity goes to waiters."""
+        if not settings.enabled:
+            self.enabled = False
+            self._grant(len(self._waiters))
+            self._active = 0
+            return
+        self.enabled = True
+        self.max_concurrent = max(1, settings.max_concurrent)
+        self.max_queue = max(0, settings.max_queue)
+        self.queue_timeout_s = settings.queue_timeout_s
+        self._grant(self.max_concurrent - self._active)
+
+    def _grant(self, slots: int) -> None:
+        while slots > 0 and self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                self._active += 1
+                slots -= 1
+
+    def retry_after_s(self) -> float:
+        """Rough time until a slot frees up for a new caller: queue ahead of it x average hold time."""
+        return max(1.0, (len(self._waiters) + 1) / self.max_concurrent * self._avg_hold_s)
+
+    async def acquire(self, priority: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        priority = request_priority.get() if priority is None else priority
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            self.queue_wait.observe(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            worst = max(self._waiters) if self._waiters else None
+            if worst is None or worst[0] <= priority:
+                self.rejected_full += 1
+                raise AdmissionRejected(self.name, 429, self.retry_after_s(), "queue full")
+            self._remove(worst)
+            self.shed += 1
+            worst[2].set_exception(AdmissionRejected(self.name, 503, self.retry_after_s(), "shed for higher priority"))
+
+        fut: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), fut)
+        heapq.heappush(self._waiters, entry)
+        self.queued += 1
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait_for(fut, timeout=self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            self._remove(entry)
+            self.rejected_timeout += 1
+            raise AdmissionRejected(self.name, 503, self.retry_after_s(), "queue wait deadline") from None
+        except BaseException:
+            self._remove(entry)
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                self.release()  # granted just as the caller went away: pass the slot on
+            raise
+        self.admitted += 1
+        self.queue_wait.observe((time.perf_counter() - t0) * 1000.0)
+
+    def release(self) -> None:
+        if not self.enabled:
+            return
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)  # the slot passes straight to the best waiter
+                return
+        self._active = max(0, self._active - 1)
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None) -> AsyncIterator[None]:
+        """`async with admission.slot(): <upstream call>`; raises AdmissionRejected."""
+        await self.acquire(priority)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._avg_hold_s = 0.9 * self._avg_hold_s + 0.1 * (time.perf_counter() - t0)
+            self.release()
+
+    def _remove(self, entry: Tuple[int, int, "asyncio.Future[None]"]) -> None:
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "in_flight": self._active,
+            "queue_depth": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "shed": self.shed,
+            "avg_hold_s": round(self._avg_hold_s, 3),
+            "queue_wait_ms": self.queue_wait.snapshot(),
+        }
+
+
+def create_admission(name: str, settings: AdmissionSettings) -> AdmissionController:
+    return AdmissionController(
+        name,
+        enabled=settings.enabled,
+        max_concurrent=settings.max_concurrent,
+        max_queue=settings.max_queue,
+        queue_timeout_s=settings.queue_timeout_s,
+    )
+
+
+def _build(settings: Settings, name: str) -> AdmissionController:
+    return create_admission(name, settings.admission(name))
+
+
+def _retune(controller: AdmissionController, settings: Settings, name: str) -> None:
+    controller.configure(settings.admission(name))
+
+
+# Built from `[ADMISSION]` (overrides: `ADMISSION_*` in the upstream's section)
+# and re-tuned when config.ini changes
+_controllers: Configured[AdmissionController] = Configured(_build, _retune)
+
+
+def get_admission(name: str) -> AdmissionController:
+    """Process-wide admission controller of upstream `name` ("heartscan", "dr7"), created on first use."""
+    return _controllers.get(name)
+
+
+def set_admission(name: str, controller: Optional[AdmissionController]) -> None:
+    if controller is None:
+        _controllers.reset(name)
+    else:
+        _controllers.set(controller, name)
+
+
+def admission_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: c.stats() for name, c in sorted(_controllers.items())}
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+
+import httpx
+
+from cardioai_backend.settings import BreakerSettings, Configured, Settings
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The upstream's breaker is open: fail fast instead of waiting for a timeout."""
+
+    def __init__(self, name: str, retry_after_s: float) -> None:
+        self.name = name
+        self.retry_after_s = retry_after_s
+        super().__init__(f"{name} is temporarily unavailable; retry in {math.ceil(retry_after_s)} s")
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Errors that say the upstream is unhealthy: transport errors, timeouts, 429 and 5xx (not 4xx)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TransportError, TimeoutError))
+
+
+class CircuitBreaker:
+    """
+    Closed -> open when, over the last `window` calls (at least `min_calls`),
+    the failure share reaches `failure_rate` or the share of calls slower
+    than `slow_call_s` reaches `slow_call_rate`. Open rejects calls for
+    `open_s`, then half-open lets `half_open_probes` trial calls through:
+    all succeed -> closed, any fails -> open again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        enabled: bool = True,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_s: float = 20.0,
+        slow_call_rate: float = 0.8,
+        open_s: float = 30.0,
+        half_open_probes: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.min_calls = max(1, min_calls)
+        self.failure_rate = failure_rate
+        self.slow_call_s = slow_call_s
+        self.slow_call_rate = slow_call_rate
+        self.open_s = open_s
+        self.half_open_probes = max(1, half_open_probes)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls: Deque[Tuple[bool, bool]] = deque(maxlen=max(self.min_calls, window))  # (failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def configure(self, settings: BreakerSettings) -> None:
+        """Apply reloaded settings; the state and the recent calls are kept."""
+        with self._lock:
+            self.enabled = settings.enabled
+            self.min_calls = max(1, settings.min_calls)
+            self.failure_rate = settings.failure_rate
+            self.slow_call_s = settings.slow_call_s
+            self.slow_call_rate = settings.slow_call_rate
+            self.open_s = settings.open_s
+            self.half_open_probes = max(1, settings.half_open_probes)
+            window = max(self.min_calls, settings.window)
+            if window != self._calls.maxlen:
+                self._calls = deque(self._calls, maxlen=window)
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_s:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        return self._state
+
+    def _trip(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._calls.clear()
+        self.opened += 1
+
+    def acquire(self) -> bool:
+        """Admit a call or raise CircuitOpenError; returns True for a half-open probe."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return False
+            if state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            self.rejected += 1
+            retry_after = self.open_s - (self._clock() - self._opened_at) if state == OPEN else 1.0
+            raise CircuitOpenError(self.name, max(1.0, retry_after))
+
+    def record(self, *, failed: bool, latency_s: float, probe: bool = False) -> None:
+        if not self.enabled:
+            return
+        slow = latency_s >= self.slow_call_s
+        with self._lock:
+            if probe:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if self._state != HALF_OPEN:
+                    return
+                if failed or slow:
+                    self._trip()
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self._state = CLOSED
+                return
+            if self._state != CLOSED:
+                return
+            self._calls.append((failed, slow))
+            n = len(self._calls)
+            if n >= self.min_calls:
+                failures = sum(1 for f, _ in self._calls if f)
+                slows = sum(1 for _, s in self._calls if s)
+                if failures / n >= self.failure_rate or slows / n >= self.slow_call_rate:
+                    self._trip()
+
+    def release(self, probe: bool) -> None:
+        """A call that ended without an outcome (cancelled): free its probe slot."""
+        if probe:
+            with self._lock:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """`async with breaker.guard(): <upstream call>` - admits, times and records the call."""
+        probe = self.acquire()
+        t0 = time.perf_counter()
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            self.release(probe)
+            raise
+        except Exception as e:
+            self.record(failed=is_upstream_failure(e), latency_s=time.perf_counter() - t0, probe=probe)
+            raise
+        else:
+            self.record(failed=False, latency_s=time.perf_counter() - t0, probe=probe)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            n = len(self._calls)
+            failures = sum(1 for f, _ in self._calls if f)
+            slows = sum(1 for _, s in self._calls if s)
+            retry_after = max(0.0, self.open_s - (self._clock() - self._opened_at)) if state == OPEN else 0.0
+            return {
+                "enabled": self.enabled,
+                "state": state,
+                "calls": n,
+                "failure_rate": round(failures / n, 3) if n else 0.0,
+                "slow_call_rate": round(slows / n, 3) if n else 0.0,
+                "slow_call_s": self.slow_call_s,
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "retry_after_s": round(retry_after, 1),
+            }
+
+
+def create_breaker(name: str, settings: BreakerSettings) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        enabled=settings.enabled,
+        window=settings.window,
+        min_calls=settings.min_calls,
+        failure_rate=settings.failure_rate,
+        slow_call_s=settings.slow_call_s,
+        slow_call_rate=settings.slow_call_rate,
+        open_s=settings.open_s,
+        half_open_probes=settings.half_open_probes,
+    )
+
+
+def _build(settings: Settings, name: str) -> CircuitBreaker:
+    return create_breaker(name, settings.breaker(name))
+
+
+def _retune(breaker: CircuitBreaker, settings: Settings, name: str) -> None:
+    breaker.configure(settings.breaker(name))
+
+
+# Built from `[BREAKER]` (overrides: `BREAKER_*` in the upstream's section)
+# and re-tuned when config.ini changes
+_breakers: Configured[CircuitBreaker] = Configured(_build, _retune)
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker of upstream `name` ("heartscan", "dr7"), created on first use."""
+    return _breakers.get(name)
+
+
+def set_breaker(name: str, breaker: Optional[CircuitBreaker]) -> None:
+    if breaker is None:
+        _breakers.reset(name)
+    else:
+        _breakers.set(breaker, name)
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: b.stats() for name, b in sorted(_breakers.items())}
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-import httpx
-
-from cardioai_backend.utils import get_config, get_secret
+from cardioai_backend.metrics import histogram
+from cardioai_backend.services.admission import AdmissionController, get_admission
+from cardioai_backend.services.circuit_breaker import CircuitBreaker, get_breaker
+from cardioai_backend.services.http_clients import upstream_post, upstream_stream
+from cardioai_backend.settings import Dr7Settings, get_settings
+from cardioai_backend.utils import get_secret
 
 
 class Dr7LlmClient:
@@ -17,33 +22,75 @@ class Dr7LlmClient:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         timeout_s: Optional[float] = None,
+        settings: Optional[Dr7Settings] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        admission: Optional[AdmissionController] = None,
     ) -> None:
-        self.base_url = base_url or get_config(
-            "BASE_URL", section="DR7", fallback="https://dr7.ai/api/v1/medical/chat/completions"
-        )
+        settings = settings or get_settings().dr7
+        self.base_url = base_url or settings.base_url
         self.api_key = api_key if api_key is not None else get_secret("DR7_API_KEY")
-        self.model = model or get_config("MODEL", section="DR7", fallback="medgemma-27b-it")
-        self.temperature = float(temperature) if temperature is not None else float(
-            get_config("TEMPERATURE", section="DR7", fallback="0.7")
-        )
-        self.max_tokens = int(max_tokens) if max_tokens is not None else int(
-            float(get_config("MAX_TOKENS", section="DR7", fallback="1000"))
-        )
-        self.timeout_s = float(timeout_s) if timeout_s is not None else float(
-            get_config("TIMEOUT_S", section="DR7", fallback="60")
-        )
+        self.model = model or settings.model
+        self.temperature = float(temperature) if temperature is not None else settings.temperature
+        self.max_tokens = int(max_tokens) if max_tokens is not None else settings.max_tokens
+        self.timeout_s = float(timeout_s) if timeout_s is not None else settings.timeout_s
+        self.breaker = breaker or get_breaker("dr7")
+        self.admission = admission or get_admission("dr7")
 
-    async def chat(self, messages: List[Dict[str, str]]) -> str:
-        headers = {"Authorization": f"Bearer {self.api_key or ''}"}
-        payload: Dict[str, Any] = {
+    @property
+    def cache_namespace(self) -> str:
+        """Everything besides the messages that shapes a completion (for `services/llm_cache.py`)."""
+        return f"dr7:{self.base_url}:{self.model}:t={self.temperature!r}:max={self.max_tokens}"
+
+    def _payload(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        return {
             "model": self.model,
             "messages": messages,
             "max_tokens": self.max_tokens,
             "temperature": self.temperature,
         }
-        async with httpx.AsyncClient(timeout=self.timeout_s) as client:
-            res = await client.post(self.base_url, json=payload, headers=headers)
-        res.raise_for_status()
+
+    async def chat(self, messages: List[Dict[str, str]]) -> str:
+        headers = {"Authorization": f"Bearer {self.api_key or ''}"}
+        payload = self._payload(messages)
+        async with self.admission.slot(), self.breaker.guard():
+            res = await upstream_post("dr7", self.base_url, timeout_s=self.timeout_s, json=payload, headers=headers)
+            res.raise_for_status()
         data = res.json()
         return data["choices"][0]["message"]["content"]
 
+    async def stream_chat(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """
+        Completion with `stream: true`: yields content deltas as the
+        OpenAI-compatible SSE chunks arrive. An upstream that ignores `stream`
+        and answers with a plain JSON completion yields it as one delta.
+        Records `llm.ttft_ms` (request to first delta) and `llm.stream_ms`.
+        """
+        headers = {"Authorization": f"Bearer {self.api_key or ''}", "Accept": "text/event-stream"}
+        payload = dict(self._payload(messages), stream=True)
+        t0 = time.perf_counter()
+        first = True
+        async with self.admission.slot(), self.breaker.guard():
+            async with upstream_stream("dr7", self.base_url, timeout_s=self.timeout_s, json=payload, headers=headers) as res:
+                if res.is_error:
+                    await res.aread()
+                    res.raise_for_status()
+                if not res.headers.get("content-type", "").startswith("text/event-stream"):
+                    data = json.loads(await res.aread())
+                    histogram("llm.ttft_ms").observe((time.perf_counter() - t0) * 1000.0)
+                    yield data["choices"][0]["message"]["content"]
+                    return
+                async for line in res.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    chunk = line[5:].strip()
+                    if chunk == "[DONE]":
+                        break
+                    choices = json.loads(chunk).get("choices") or [{}]
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if not delta:
+                        continue
+                    if first:
+                        histogram("llm.ttft_ms").observe((time.perf_counter() - t0) * 1000.0)
+                        first = False
+                    yield delta
+        histogram("llm.stream_ms").observe((time.perf_counter() - t0) * 1000.0)
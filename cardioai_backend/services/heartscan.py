@@ -1,10 +1,50 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import asyncio
+import copy
+import json
+import logging
+from typing import Any, Dict, Optional, Union
 
-import httpx
+from cardioai_backend.scg.cache import MetricsCache, get_metrics_cache, observation_key
+from cardioai_backend.scg.observation import observation_to_json, record_samples
+from cardioai_backend.services.admission import AdmissionController, get_admission
+from cardioai_backend.services.circuit_breaker import CircuitBreaker, get_breaker
+from cardioai_backend.services.hedging import HedgePolicy, hedged_call
+from cardioai_backend.services.http_clients import upstream_post
+from cardioai_backend.services.single_flight import SingleFlight, get_flight
+from cardioai_backend.settings import HEARTSCAN_MODES, HeartscanSettings, get_settings
+from cardioai_backend.utils import get_secret
 
-from cardioai_backend.utils import get_config, get_secret
+logger = logging.getLogger(__name__)
+
+
+def hedge_policy_from_settings(settings: HeartscanSettings, policy: Optional[HedgePolicy] = None) -> HedgePolicy:
+    """New HedgePolicy from `[HEARTSCAN]`, or `policy` re-tuned in place (keeping its latencies and counters)."""
+    policy = policy or HedgePolicy(name="heartscan")
+    policy.enabled = settings.hedge
+    policy.percentile = settings.hedge_percentile
+    policy.initial_delay_s = settings.hedge_initial_delay_s
+    policy.min_delay_s = settings.hedge_min_delay_s
+    policy.max_delay_s = settings.timeout_s / 2
+    policy.budget = settings.hedge_budget
+    policy.retries = settings.retries
+    policy.retry_backoff_s = settings.retry_backoff_s
+    return policy
+
+
+_hedge_policy: Optional[HedgePolicy] = None
+_hedge_settings: Optional[HeartscanSettings] = None
+
+
+def get_hedge_policy() -> HedgePolicy:
+    """Process-wide hedge policy of the remote Heartscan API (latencies are shared by all requests)."""
+    global _hedge_policy, _hedge_settings
+    settings = get_settings().heartscan
+    if _hedge_policy is None or settings is not _hedge_settings:
+        _hedge_policy = hedge_policy_from_settings(settings, _hedge_policy)
+        _hedge_settings = settings
+    return _hedge_policy
 
 
 class HeartscanClient:
@@ -14,19 +54,182 @@ class HeartscanClient:
         base_url: Optional[str] = None,
         api_key: Optional[str] = None,
         timeout_s: Optional[float] = None,
+        settings: Optional[HeartscanSettings] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        admission: Optional[AdmissionController] = None,
     ) -> None:
-        self.base_url = base_url or get_config("URL", section="HEARTSCAN", fallback="").strip() or (
-            "https://heartscan-api-175148683457.us-central1.run.app/api/v1/cardiolog/realtime_analysis"
-        )
+        settings = settings or get_settings().heartscan
+        self.base_url = base_url or settings.url
         self.api_key = api_key if api_key is not None else get_secret("HEARTSCAN_API_KEY")
-        self.timeout_s = float(timeout_s) if timeout_s is not None else float(
-            get_config("TIMEOUT_S", section="HEARTSCAN", fallback="30")
-        )
+        self.timeout_s = float(timeout_s) if timeout_s is not None else settings.timeout_s
+        self.hedge_policy = hedge_policy or get_hedge_policy()
+        self.breaker = breaker or get_breaker("heartscan")
+        self.admission = admission or get_admission("heartscan")
+
+    @property
+    def cache_namespace(self) -> str:
+        return f"heartscan:remote:{self.base_url}"
+
+    async def analyze(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST the observation; `timeout_s` is the deadline for the whole call.
+        The analysis is a pure function of the body, so slow attempts are
+        hedged and transient failures retried (`services/hedging.py`).
+        """
+        headers = {"X-API-Key": self.api_key or "", "Content-Type": "application/json"}
+        body = json.dumps(observation_to_json(observation)).encode("utf-8")  # serialized once for all attempts
+
+        async def attempt(timeout_s: float) -> Dict[str, Any]:
+            res = await upstream_post("heartscan", self.base_url, timeout_s=timeout_s, content=body, headers=headers)
+            res.raise_for_status()
+            return res.json()
+
+        async with self.admission.slot(), self.breaker.guard():
+            return await hedged_call(attempt, self.hedge_policy, deadline_s=self.timeout_s)
+
+
+class LocalHeartscanClient:
+    """
+    In-process analysis: peak detection over the observation's samples plus
+    `preprocess_obs()`, with the same `analyze()` contract as HeartscanClient.
+    Runs on the app's ProcessingExecutor when one is started, so the event
+    loop is not blocked.
+    """
+
+    @property
+    def cache_namespace(self) -> str:
+        from cardioai_backend.scg.peak_detection import DETECTOR_CONFIG
+
+        return f"heartscan:local:{sorted(DETECTOR_CONFIG.items())}"
+
+    async def analyze(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+        from cardioai_backend.scg.executor import get_executor
+        from cardioai_backend.scg.peak_detection import analyze_observation
+
+        executor = get_executor()
+        if executor is not None:
+            return await executor.analyze(observation)
+        return analyze_observation(observation)
+
+
+class FallbackHeartscanClient:
+    """
+    Try the local analysis first; call the remote API only if it fails or
+    yields no usable heart rate.
+    """
+
+    def __init__(
+        self,
+        *,
+        local: Optional[LocalHeartscanClient] = None,
+        remote: Optional[HeartscanClient] = None,
+    ) -> None:
+        self.local = local or LocalHeartscanClient()
+        self.remote = remote or HeartscanClient()
+
+    @property
+    def cache_namespace(self) -> str:
+        return f"heartscan:local_fallback:{self.local.cache_namespace}|{self.remote.cache_namespace}"
 
     async def analyze(self, observation: Dict[str, Any]) -> Dict[str, Any]:
-        headers = {"X-API-Key": self.api_key or ""}
-        async with httpx.AsyncClient(timeout=self.timeout_s) as client:
-            res = await client.post(self.base_url, json=observation, headers=headers)
-        res.raise_for_status()
-        return res.json()
+        try:
+            data = await self.local.analyze(observation)
+        except Exception:
+            _fallbacks["local_errors"] += 1
+            logger.warning(
+                "Local analysis failed for observation %s; falling back to the remote API",
+                _observation_ref(observation),
+                exc_info=True,
+            )
+        else:
+            if data.get("avg_bpm"):
+                _fallbacks["local_ok"] += 1
+                return data
+            _fallbacks["local_unusable"] += 1
+        return await self.remote.analyze(observation)
+
+
+# Outcomes of the local attempt of FallbackHeartscanClient, for /api/status/heartscan
+_fallbacks = {"local_ok": 0, "local_unusable": 0, "local_errors": 0}
+
+
+def fallback_stats() -> Dict[str, int]:
+    return dict(_fallbacks)
+
+
+def _observation_ref(observation: Any) -> str:
+    """Observations carry no id of their own: the client's `id` if sent, else device and sample count."""
+    if not isinstance(observation, dict):
+        return repr(type(observation).__name__)
+    samples = record_samples(observation)
+    count = len(samples) if samples is not None else 0
+    return f"id={observation.get('id')} device={observation.get('device')} samples={count}"
+
+
+class CachedHeartscanClient:
+    """
+    Memoizes another client's `analyze()` in a MetricsCache, keyed by the
+    canonicalized observation and the inner client's `cache_namespace`
+    (mode, endpoint / detector config). Failed analyses are not cached.
+    With a SingleFlight, concurrent requests for the same key (app retries
+    on a flaky connection) share one analysis.
+    """
+
+    def __init__(self, inner: Any, cache: Optional[MetricsCache], flight: Optional[SingleFlight] = None) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.flight = flight
+
+    async def analyze(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+        key = await self._key(observation)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        if self.flight is None:
+            return await self._analyze(key, observation)
+        data = await self.flight.do(key, lambda: self._analyze(key, observation))
+        return copy.deepcopy(data)  # waiters share the flight's result
+
+    async def _key(self, observation: Dict[str, Any]) -> str:
+        namespace = self.inner.cache_namespace
+        if isinstance(record_samples(observation), list):
+            # Dict-per-sample payloads are converted to columns first, an O(n)
+            # Python pass (seconds for 24 h): keep it off the event loop.
+            return await asyncio.to_thread(observation_key, observation, namespace)
+        return observation_key(observation, namespace)
+
+    async def _analyze(self, key: str, observation: Dict[str, Any]) -> Dict[str, Any]:
+        data = await self.inner.analyze(observation)
+        if self.cache is not None:
+            self.cache.put(key, data)
+        return data
+
+
+AnyHeartscanClient = Union[HeartscanClient, LocalHeartscanClient, FallbackHeartscanClient, CachedHeartscanClient]
+
 
+def create_heartscan_client(mode: Optional[str] = None, *, cached: bool = False) -> AnyHeartscanClient:
+    """
+    Build the analysis client selected by `[HEARTSCAN] MODE` (or `mode`);
+    with `cached=True` it is wrapped in the `[CACHE]` metrics cache and the
+    `[SINGLE_FLIGHT]` coalescing of identical concurrent analyses, if enabled.
+    """
+    name = (mode or get_settings().heartscan.mode).strip().lower()
+    if name not in HEARTSCAN_MODES:
+        raise ValueError(f"Unknown [HEARTSCAN] MODE {name!r}; expected one of {HEARTSCAN_MODES}")
+    client: AnyHeartscanClient
+    if name == "local":
+        client = LocalHeartscanClient()
+    elif name == "local_fallback":
+        client = FallbackHeartscanClient()
+    else:
+        client = HeartscanClient()
+    if not cached:
+        return client
+    cache = get_metrics_cache()
+    flight = get_flight("heartscan")
+    if cache is None and not flight.enabled:
+        return client
+    return CachedHeartscanClient(client, cache, flight if flight.enabled else None)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+import httpx
+
+from cardioai_backend.metrics import Histogram, histogram
+
+T = TypeVar("T")
+
+# Statuses worth another identical attempt: overload / cold start / bad gateway.
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+# Unused budget is capped, so a quiet period cannot bank a burst of hedges.
+_BUDGET_BURST = 10.0
+# Adaptive delay needs this many successful attempts; until then `initial_delay_s`.
+_MIN_SAMPLES = 20
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Failures where repeating the (idempotent) request can help: transport errors and 429/502/503/504."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUSES
+    return isinstance(exc, httpx.TransportError)
+
+
+class HedgePolicy:
+    """
+    When to hedge and how much extra load is allowed.
+
+    The hedge delay is the `percentile` of recent successful attempt
+    latencies (clamped to [min_delay_s, max_delay_s]). Hedges and retries
+    both spend a token; every request earns `budget` tokens, so extra
+    attempts stay below `budget` x requests (plus a small burst).
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        percentile: float = 0.95,
+        initial_delay_s: float = 3.0,
+        min_delay_s: float = 0.25,
+        max_delay_s: float = 15.0,
+        budget: float = 0.1,
+        retries: int = 2,
+        retry_backoff_s: float = 0.25,
+        name: str = "upstream",
+    ) -> None:
+        self.enabled = enabled
+        self.percentile = percentile
+        self.initial_delay_s = initial_delay_s
+        self.min_delay_s = min_delay_s
+        self.max_delay_s = max_delay_s
+        self.budget = budget
+        self.retries = retries
+        self.retry_backoff_s = retry_backoff_s
+        self.name = name
+        self.latency = Histogram()
+        self._lock = threading.Lock()
+        self._tokens = 1.0
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retried = 0
+        self.budget_denied = 0
+        self.deadline_exceeded = 0
+
+    def delay_s(self) -> float:
+        if self.latency.count < _MIN_SAMPLES:
+            return self.initial_delay_s
+        p = self.latency.percentile(self.percentile) / 1000.0
+        return min(self.max_delay_s, max(self.min_delay_s, p))
+
+    def backoff_s(self, retry: int) -> float:
+        """Full jitter: uniform in [0, retry_backoff_s * 2^(retry-1)]."""
+        return random.uniform(0.0, self.retry_backoff_s * (2 ** (retry - 1)))
+
+    def _start_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(_BUDGET_BURST, self._tokens + self.budget)
+
+    def _spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            self.budget_denied += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "delay_s": round(self.delay_s(), 3),
+            "budget": self.budget,
+            "tokens": round(self._tokens, 2),
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "retries": self.retried,
+            "budget_denied": self.budget_denied,
+            "deadline_exceeded": self.deadline_exceeded,
+            "extra_load": round((self.hedges + self.retried) / self.requests, 4) if self.requests else 0.0,
+        }
+
+
+async def _timed_attempt(
+    attempt: Callable[[float], Awaitable[T]], timeout_s: float, policy: HedgePolicy, kind: str
+) -> T:
+    t0 = time.perf_counter()
+    result = await attempt(timeout_s)
+    ms = (time.perf_counter() - t0) * 1000.0
+    policy.latency.observe(ms)
+    histogram(f"{policy.name}.{kind}_attempt_ms").observe(ms)
+    return result
+
+
+async def _race(attempt: Callable[[float], Awaitable[T]], policy: HedgePolicy, deadline: float) -> T:
+    """One primary attempt plus, if it is slower than the hedge delay, one hedge; first success wins."""
+    loop = asyncio.get_running_loop()
+    remaining = deadline - loop.time()
+    primary = asyncio.ensure_future(_timed_attempt(attempt, remaining, policy, "primary"))
+    tasks: List["asyncio.Future[T]"] = [primary]
+    hedge: Optional["asyncio.Future[T]"] = None
+    try:
+        if policy.enabled:
+            done, _ = await asyncio.wait(tasks, timeout=min(policy.delay_s(), remaining))
+            remaining = deadline - loop.time()
+            if not done and remaining > policy.min_delay_s and policy._spend():
+                policy.hedges += 1
+                hedge = asyncio.ensure_future(_timed_attempt(attempt, remaining, policy, "hedge"))
+                tasks.append(hedge)
+
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0.0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        policy.hedge_wins += 1
+                    return task.result()
+                error = error or task.exception()
+        if error is not None and not pending:
+            raise error
+        raise DeadlineExceeded(f"{policy.name} did not answer within the deadline")
+    finally:
+        losers = [t for t in tasks if not t.done()]
+        for t in losers:
+            t.cancel()
+        if losers:
+            await asyncio.gather(*losers, return_exceptions=True)
+
+
+async def hedged_call(
+    attempt: Callable[[float], Awaitable[T]],
+    policy: HedgePolicy,
+    *,
+    deadline_s: float,
+    retryable: Callable[[BaseException], bool] = is_retryable,
+) -> T:
+    """
+    Run `attempt(timeout_s)` (an idempotent request) hedged and retried
+    within an overall deadline. Each attempt gets the time left until the
+    deadline as its timeout; retries use jittered exponential backoff, only
+    for `retryable` failures, and only while the hedge budget allows.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_s
+    policy._start_request()
+    t0 = time.perf_counter()
+    try:
+        retry = 0
+        while True:
+            try:
+                return await _race(attempt, policy, deadline)
+            except DeadlineExceeded:
+                policy.deadline_exceeded += 1
+                raise
+            except Exception as e:
+                if not retryable(e) or retry >= policy.retries:
+                    raise
+                retry += 1
+                backoff = policy.backoff_s(retry)
+                if loop.time() + backoff >= deadline or not policy._spend():
+                    raise
+            await asyncio.sleep(backoff)
+            policy.retried += 1
+    finally:
+        histogram(f"{policy.name}.request_ms").observe((time.perf_counter() - t0) * 1000.0)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+
+import httpx
+
+from cardioai_backend.settings import UPSTREAM_SECTIONS, Settings, get_settings
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class UpstreamSettings:
+    """Connection pool and timeout settings of one upstream's shared client."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        timeout_s: float,
+        connect_timeout_s: float = 5.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry_s: float = 30.0,
+        http2: bool = False,
+    ) -> None:
+        self.name = name
+        self.timeout_s = float(timeout_s)
+        self.connect_timeout_s = min(float(connect_timeout_s), self.timeout_s)
+        self.max_connections = max(1, int(max_connections))
+        self.max_keepalive_connections = max(0, min(int(max_keepalive_connections), self.max_connections))
+        self.keepalive_expiry_s = max(0.0, float(keepalive_expiry_s))
+        self.http2 = bool(http2)
+
+    @classmethod
+    def from_config(cls, name: str, settings: Optional[Settings] = None) -> "UpstreamSettings":
+        """Pool settings of upstream `name` ("heartscan", "dr7") from `[HTTP]` and its own section."""
+        settings = settings or get_settings()
+        pool = settings.http_pool(name)
+        return cls(
+            name,
+            timeout_s=settings.heartscan.timeout_s if name == "heartscan" else settings.dr7.timeout_s,
+            connect_timeout_s=pool.connect_timeout_s,
+            max_connections=pool.max_connections,
+            max_keepalive_connections=pool.max_keepalive_connections,
+            keepalive_expiry_s=pool.keepalive_expiry_s,
+            http2=pool.http2,
+        )
+
+
+class _CountingTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the pooled transport to count requests and new TCP connections (via
+    the httpcore `trace` extension), so connection reuse shows up in stats.
+    """
+
+    def __init__(self, inner: httpx.AsyncHTTPTransport) -> None:
+        self.inner = inner
+        self.requests = 0
+        self.failed = 0
+        self.waiting = 0
+        self.connections_opened = 0
+
+    async def _count_connects(self, event: str, info: Dict[str, Any], outer: Any = None) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        if outer is not None:
+            await outer(event, info)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        outer = request.extensions.get("trace")
+        request.extensions = dict(request.extensions, trace=lambda e, i: self._count_connects(e, i, outer))
+        self.requests += 1
+        self.waiting += 1
+        try:
+            return await self.inner.handle_async_request(request)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+    def pool_connections(self) -> Sequence[Any]:
+        pool = getattr(self.inner, "_pool", None)  # httpcore.AsyncConnectionPool
+        return list(getattr(pool, "connections", ()))
+
+
+class HttpClientRegistry:
+    """
+    One long-lived `httpx.AsyncClient` per upstream, so Heartscan and Dr7
+    calls reuse keep-alive (and, with `h2` installed, HTTP/2) connections
+    instead of paying DNS + TCP + TLS on every request. Started and closed
+    by the app lifespan; without a started registry `upstream_post()` falls
+    back to a one-off client.
+    """
+
+    def __init__(self, settings: Sequence[UpstreamSettings]) -> None:
+        self.settings = {s.name: s for s in settings}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, _CountingTransport] = {}
+
+    @property
+    def started(self) -> bool:
+        return bool(self._clients)
+
+    def start(self) -> None:
+        if self.started:
+            return
+        h2 = http2_available()
+        for name, s in self.settings.items():
+            transport = _CountingTransport(
+                httpx.AsyncHTTPTransport(
+                    limits=httpx.Limits(
+                        max_connections=s.max_connections,
+                        max_keepalive_connections=s.max_keepalive_connections,
+                        keepalive_expiry=s.keepalive_expiry_s,
+                    ),
+                    http2=s.http2 and h2,
+                )
+            )
+            self._transports[name] = transport
+            self._clients[name] = httpx.AsyncClient(
+                transport=transport, timeout=httpx.Timeout(s.timeout_s, connect=s.connect_timeout_s)
+            )
+
+    async def aclose(self) -> None:
+        clients, self._clients, self._transports = self._clients, {}, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def client(self, name: str) -> Optional[httpx.AsyncClient]:
+        return self._clients.get(name)
+
+    def stats(self) -> Dict[str, Any]:
+        h2 = http2_available()
+        out: Dict[str, Any] = {}
+        for name, s in self.settings.items():
+            transport = self._transports.get(name)
+            conns = transport.pool_connections() if transport is not None else []
+            idle = sum(1 for c in conns if c.is_idle())
+            requests = transport.requests if transport is not None else 0
+            opened = transport.connections_opened if transport is not None else 0
+            out[name] = {
+                "http2": s.http2 and h2,
+                "max_connections": s.max_connections,
+                "max_keepalive_connections": s.max_keepalive_connections,
+                "keepalive_expiry_s": s.keepalive_expiry_s,
+                "timeout_s": s.timeout_s,
+                "connect_timeout_s": s.connect_timeout_s,
+                "connections": len(conns),
+                "active": len(conns) - idle,
+                "idle": idle,
+                "utilization": (len(conns) - idle) / s.max_connections,
+                "waiting": transport.waiting if transport is not None else 0,
+                "requests": requests,
+                "failed": transport.failed if transport is not None else 0,
+                "connections_opened": opened,
+                "reuse_ratio": 1.0 - opened / requests if requests else 0.0,
+            }
+        return out
+
+
+def create_http_clients(upstreams: Sequence[str] = tuple(UPSTREAM_SECTIONS)) -> HttpClientRegistry:
+    """Build the registry configured in `[HTTP]` / the upstream sections (not started)."""
+    return HttpClientRegistry([UpstreamSettings.from_config(name) for name in upstreams])
+
+
+_current: Optional[HttpClientRegistry] = None
+
+
+def get_http_clients() -> Optional[HttpClientRegistry]:
+    """The registry started by the app lifespan, or None (callers then use one-off clients)."""
+    return _current
+
+
+def set_http_clients(registry: Optional[HttpClientRegistry]) -> None:
+    global _current
+    _current = registry
+
+
+async def upstream_post(name: str, url: str, *, timeout_s: float, **kwargs: Any) -> httpx.Response:
+    """
+    POST to an upstream on its shared pooled client (connect timeout from the
+    pool settings, `timeout_s` for the rest), or on a one-off client when no
+    registry is started (scripts, tests).
+    """
+    client = _current.client(name) if _current is not None else None
+    if client is None:
+        async with httpx.AsyncClient(timeout=timeout_s) as one_off:
+            return await one_off.post(url, **kwargs)
+    timeout = httpx.Timeout(timeout_s, connect=min(timeout_s, client.timeout.connect or timeout_s))
+    return await client.post(url, timeout=timeout, **kwargs)
+
+
+@asynccontextmanager
+async def upstream_stream(name: str, url: str, *, timeout_s: float, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+    """`upstream_post()` with the response body left unread, for streamed replies."""
+    client = _current.client(name) if _current is not None else None
+    if client is None:
+        async with httpx.AsyncClient(timeout=timeout_s) as one_off:
+            async with one_off.stream("POST", url, **kwargs) as res:
+                yield res
+        return
+    timeout = httpx.Timeout(timeout_s, connect=min(timeout_s, client.timeout.connect or timeout_s))
+    async with client.stream("POST", url, timeout=timeout, **kwargs) as res:
+        yield res
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from cardioai_backend.metrics import histogram
+from cardioai_backend.settings import Configured, JobsSettings
+
+JobFn = Callable[[], Awaitable[Dict[str, Any]]]
+
+DEFAULT_WORKERS = 8
+DEFAULT_MAX_PENDING = 256
+DEFAULT_MAX_JOBS = 1024
+DEFAULT_TTL_S = 600.0
+DEFAULT_MAX_WAIT_S = 30.0
+
+
+class JobNotFound(KeyError):
+    pass
+
+
+class JobQueueFull(Exception):
+    """Too many jobs waiting (or unfinished jobs fill the result store); retry later."""
+
+    def __init__(self, retry_after_s: float) -> None:
+        self.retry_after_s = retry_after_s
+        super().__init__(f"Job queue is full; retry in {math.ceil(retry_after_s)} s")
+
+
+class JobError(Exception):
+    """Raised by a job function to record an HTTP-style failure (status code + detail) as the job's result."""
+
+    def __init__(self, status_code: int, detail: Any) -> None:
+        self.status_code = status_code
+        self.detail = detail
+        super().__init__(str(detail))
+
+
+@dataclass
+class Job:
+    """One background analysis: `queued` -> `running` -> `done` (with `result`) or `failed` (with `error`)."""
+
+    id: str
+    status: str = "queued"
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[Dict[str, Any]] = None  # {"status_code", "detail"}
+    created: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    expires: float = math.inf  # set when the job finishes
+    _done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+class JobRunner:
+    """
+    Runs submitted job functions on `workers` asyncio tasks and keeps their
+    results for polling. At most `max_pending` jobs wait to start; the store
+    keeps at most `max_jobs` (finished jobs expire `ttl_s` after finishing,
+    the oldest finished ones are evicted first when it is full).
+
+    Used from the event loop only; workers start on the first submit in the
+    running loop and stop in `aclose()` (app shutdown).
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = DEFAULT_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+        ttl_s: float = DEFAULT_TTL_S,
+        max_wait_s: float = DEFAULT_MAX_WAIT_S,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.max_jobs = max(self.max_pending, max_jobs)
+        self.ttl_s = ttl_s
+        self.max_wait_s = max_wait_s
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional["asyncio.Queue[Tuple[Job, JobFn]]"] = None
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running = 0
+        self._avg_run_s = 1.0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def _start(self) -> "asyncio.Queue[Tuple[Job, JobFn]]":
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+        return self._queue
+
+    def _pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def retry_after_s(self) -> float:
+        """Rough time until a queued job would start: jobs ahead of it / workers x average run time."""
+        return max(1.0, (self._pending() + 1) / self.workers * self._avg_run_s)
+
+    def _purge(self, now: float) -> None:
+        expired = [job_id for job_id, job in self._jobs.items() if job.expires <= now]
+        for job_id in expired:
+            del self._jobs[job_id]
+        self.expired += len(expired)
+
+    def submit(self, fn: JobFn) -> Job:
+        """Queue `fn` and return its job at once; raises JobQueueFull."""
+        now = time.time()
+        self._purge(now)
+        queue = self._start()
+        if queue.qsize() >= self.max_pending:
+            self.rejected += 1
+            raise JobQueueFull(self.retry_after_s())
+        if len(self._jobs) >= self.max_jobs:
+            oldest = next((job_id for job_id, job in self._jobs.items() if job.is_finished), None)
+            if oldest is None:
+                self.rejected += 1
+                raise JobQueueFull(self.retry_after_s())
+            del self._jobs[oldest]
+            self.evictions += 1
+        job = Job(id=secrets.token_urlsafe(16), created=now)
+        self._jobs[job.id] = job
+        queue.put_nowait((job, fn))
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Job:
+        self._purge(time.time())
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        return job
+
+    async def wait(self, job_id: str, timeout_s: float) -> Job:
+        """The job once it has finished, or as it is after `timeout_s` (capped at `max_wait_s`): long-poll."""
+        job = self.get(job_id)
+        timeout_s = min(max(0.0, timeout_s), self.max_wait_s)
+        if not job.is_finished and timeout_s > 0:
+            try:
+                await asyncio.wait_for(job._done.wait(), timeout=timeout_s)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    async def _work(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            job, fn = await queue.get()
+            job.status, job.started = "running", time.time()
+            histogram("jobs.queue_ms").observe((job.started - job.created) * 1000.0)
+            self._running += 1
+            try:
+                job.result = await fn()
+                job.status = "done"
+                self.completed += 1
+            except JobError as e:
+                job.status, job.error = "failed", {"status_code": e.status_code, "detail": e.detail}
+                self.failed += 1
+            except asyncio.CancelledError:
+                job.status, job.error = "failed", {"status_code": 503, "detail": "Server shutting down; submit again"}
+                self.failed += 1
+                raise
+            except Exception as e:
+                job.status, job.error = "failed", {"status_code": 500, "detail": str(e)}
+                self.failed += 1
+            finally:
+                self._running -= 1
+                job.finished = time.time()
+                job.expires = job.finished + self.ttl_s
+                run_s = job.finished - job.started
+                self._avg_run_s = 0.9 * self._avg_run_s + 0.1 * run_s
+                histogram("jobs.run_ms").observe(run_s * 1000.0)
+                histogram("jobs.latency_ms").observe((job.finished - job.created) * 1000.0)
+                job._done.set()
+
+    async def aclose(self) -> None:
+        """Stop the workers; running jobs fail with 503, queued ones are dropped as failed."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._queue is not None:
+            while not self._queue.empty():
+                job, _ = self._queue.get_nowait()
+                job.status, job.error = "failed", {"status_code": 503, "detail": "Server shutting down; submit again"}
+                job.finished = time.time()
+                job.expires = job.finished + self.ttl_s
+                job._done.set()
+        self._queue, self._loop = None, None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queue_depth": self._pending(),
+            "running": self._running,
+            "jobs": len(self._jobs),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "avg_run_s": round(self._avg_run_s, 3),
+            "queue_ms": histogram("jobs.queue_ms").snapshot(),
+            "latency_ms": histogram("jobs.latency_ms").snapshot(),
+        }
+
+
+def create_job_runner(settings: JobsSettings) -> Optional[JobRunner]:
+    """Runner configured in `[JOBS]`; None when disabled."""
+    if not settings.enabled:
+        return None
+    return JobRunner(
+        workers=settings.workers,
+        max_pending=settings.max_pending,
+        max_jobs=settings.max_jobs,
+        ttl_s=settings.ttl_s,
+        max_wait_s=settings.max_wait_s,
+    )
+
+
+# Built from the snapshot on first use; changes to [JOBS] take effect on restart
+_current: Configured[Optional[JobRunner]] = Configured(lambda settings, _: create_job_runner(settings.jobs))
+
+
+def get_job_runner() -> Optional[JobRunner]:
+    """Process-wide runner, created from `[JOBS]` on first use."""
+    return _current.get()
+
+
+def set_job_runner(runner: Optional[JobRunner]) -> None:
+    _current.set(runner)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional
+
+from cardioai_backend.scg.cache import MetricsCache
+from cardioai_backend.services.single_flight import SingleFlight, get_flight
+from cardioai_backend.settings import Configured, LlmCacheSettings
+
+
+def llm_cache_key(namespace: str, messages: List[Dict[str, str]]) -> str:
+    """Exact-match key: client namespace (endpoint, model, temperature, max_tokens) + the full message list."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(namespace.encode() + b"\0")
+    h.update(json.dumps(messages, ensure_ascii=False, separators=(",", ":")).encode())
+    return h.hexdigest()
+
+
+class LlmResponseCache:
+    """
+    Completions by exact prompt, for the request classes in `classes`.
+
+    Storage is a MetricsCache (memory LRU with TTL, optional sqlite tier).
+    The system prompt is part of every key; when it changes, `sync_prompt()`
+    also drops the now unreachable entries.
+    """
+
+    def __init__(self, store: MetricsCache, classes: FrozenSet[str]) -> None:
+        self.store = store
+        self.classes = classes
+        self._prompt_hash: Optional[str] = None
+        self._lock = threading.Lock()
+        self.invalidations = 0
+
+    def enabled_for(self, request_class: Optional[str]) -> bool:
+        return request_class in self.classes
+
+    def sync_prompt(self, system_prompt: str) -> None:
+        prompt_hash = hashlib.blake2b(system_prompt.encode(), digest_size=16).hexdigest()
+        with self._lock:
+            if self._prompt_hash == prompt_hash:
+                return
+            if self._prompt_hash is not None:
+                self.store.clear()
+                self.invalidations += 1
+            self._prompt_hash = prompt_hash
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.store.get(key)
+        return entry["content"] if entry is not None else None
+
+    def put(self, key: str, content: str) -> None:
+        if content:
+            self.store.put(key, {"content": content})
+
+    def stats(self) -> Dict[str, Any]:
+        return {"classes": sorted(self.classes), "invalidations": self.invalidations, **self.store.stats()}
+
+
+class CachedLlmClient:
+    """
+    Serves `chat()` / `stream_chat()` from an LlmResponseCache when the exact
+    prompt was answered before. Only complete replies are stored: failed or
+    abandoned streams are not cached. With a SingleFlight, identical
+    concurrent `chat()` calls (app retries) share one completion; streams
+    are not coalesced.
+    """
+
+    def __init__(self, inner: Any, cache: Optional[LlmResponseCache], flight: Optional[SingleFlight] = None) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.flight = flight
+
+    def _key(self, messages: List[Dict[str, str]]) -> str:
+        return llm_cache_key(self.inner.cache_namespace, messages)
+
+    async def chat(self, messages: List[Dict[str, str]]) -> str:
+        key = self._key(messages)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        if self.flight is None:
+            return await self._chat(key, messages)
+        return await self.flight.do(key, lambda: self._chat(key, messages))
+
+    async def _chat(self, key: str, messages: List[Dict[str, str]]) -> str:
+        content = await self.inner.chat(messages)
+        if self.cache is not None:
+            self.cache.put(key, content)
+        return content
+
+    async def stream_chat(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        key = self._key(messages) if self.cache is not None else ""
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            yield cached
+            return
+        parts: List[str] = []
+        deltas = self.inner.stream_chat(messages)
+        try:
+            async for delta in deltas:
+                parts.append(delta)
+                yield delta
+        finally:
+            await deltas.aclose()
+        if self.cache is not None:
+            self.cache.put(key, "".join(parts))
+
+
+def cached_llm_client(inner: Any, request_class: Optional[str], system_prompt: str) -> Any:
+    """
+    `inner` wrapped in the `[LLM_CACHE]` cache if `request_class` is opted in,
+    and in `[SINGLE_FLIGHT]` coalescing; clients without a `cache_namespace`
+    are used as they are.
+    """
+    if getattr(inner, "cache_namespace", None) is None:
+        return inner
+    cache = get_llm_cache()
+    if cache is not None and not cache.enabled_for(request_class):
+        cache = None
+    flight = get_flight("dr7")
+    if cache is None and not flight.enabled:
+        return inner
+    if cache is not None:
+        cache.sync_prompt(system_prompt)
+    return CachedLlmClient(inner, cache, flight if flight.enabled else None)
+
+
+def create_llm_cache(settings: LlmCacheSettings) -> Optional[LlmResponseCache]:
+    """Build the cache configured in `[LLM_CACHE]`; None when disabled or no class is opted in."""
+    if not settings.enabled or not settings.classes:
+        return None
+    store = MetricsCache(
+        max_bytes=settings.max_bytes, ttl_s=settings.ttl_s, sqlite_path=settings.sqlite_path, table="llm_cache"
+    )
+    return LlmResponseCache(store, settings.classes)
+
+
+# Built from the snapshot on first use; changes to [LLM_CACHE] take effect on restart
+_current: Configured[Optional[LlmResponseCache]] = Configured(lambda settings, _: create_llm_cache(settings.llm_cache))
+
+
+def get_llm_cache() -> Optional[LlmResponseCache]:
+    """Process-wide cache, created from `[LLM_CACHE]` on first use."""
+    return _current.get()
+
+
+def set_llm_cache(cache: Optional[LlmResponseCache]) -> None:
+    _current.set(cache)
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from cardioai_backend.settings import Configured, SessionsSettings
+
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_TTL_S = 86400.0
+DEFAULT_MAX_MESSAGES = 50
+# Expired rows in the sqlite tier are purged every this many new sessions.
+_PURGE_EVERY = 100
+
+
+class SessionNotFound(KeyError):
+    pass
+
+
+@dataclass
+class Session:
+    """
+    One conversation kept server-side: its messages (user / assistant turns,
+    oldest dropped beyond the store's `max_messages`) and the Results Summary
+    of its latest measurement, stored once instead of re-sent every turn.
+    """
+
+    id: str
+    history: List[Dict[str, str]] = field(default_factory=list)
+    measurement: Optional[str] = None
+    expires: float = 0.0
+    seq: int = 0  # messages ever appended; row numbers of the sqlite tier
+
+    def copy(self) -> "Session":
+        return Session(self.id, [dict(m) for m in self.history], self.measurement, self.expires, self.seq)
+
+
+class SessionStore:
+    """
+    Conversation sessions: an LRU of at most `max_sessions` in memory, each
+    expiring `ttl_s` after its last use. With `sqlite_path`, sessions are also
+    written to an append-only message table (one row per new message, not the
+    whole history per turn), so they survive restarts and memory eviction.
+
+    Calls are thread-safe. With sqlite they block on disk I/O, so async code
+    should run them in a worker thread (see `persistent`).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        ttl_s: float = DEFAULT_TTL_S,
+        max_messages: int = DEFAULT_MAX_MESSAGES,
+        sqlite_path: Optional[Union[str, Path]] = None,
+    ) -> None:
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_s = ttl_s
+        self.max_messages = max(2, max_messages)
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.disk_loads = 0
+        self.not_found = 0
+        self.expired = 0
+        self.evictions = 0
+        self.trimmed = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if sqlite_path:
+            Path(sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(sqlite_path), check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, measurement TEXT, seq INTEGER NOT NULL, expires REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS session_messages (session_id TEXT NOT NULL, seq INTEGER NOT NULL, "
+                "role TEXT NOT NULL, content TEXT NOT NULL, PRIMARY KEY (session_id, seq))"
+            )
+            self._purge()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def persistent(self) -> bool:
+        """True with the sqlite tier: calls then do disk I/O and should not run on the event loop."""
+        return self._db is not None
+
+    def create(self) -> Session:
+        session = Session(secrets.token_urlsafe(16), expires=time.time() + self.ttl_s)
+        with self._lock:
+            self._remember(session)
+            self.created += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT INTO sessions (id, measurement, seq, expires) VALUES (?, NULL, 0, ?)",
+                    (session.id, session.expires),
+                )
+                if self.created % _PURGE_EVERY == 0:
+                    self._purge()
+            return session.copy()
+
+    def get(self, session_id: str) -> Session:
+        """The session (a copy), its TTL renewed; SessionNotFound if unknown or expired."""
+        with self._lock:
+            session = self._load(session_id)
+            if self._db is not None:
+                # Persist the renewal, or a restart would expire a session that is still in use.
+                self._db.execute("UPDATE sessions SET expires = ? WHERE id = ?", (session.expires, session.id))
+            return session.copy()
+
+    def append(self, session_id: str, messages: List[Dict[str, str]], *, measurement: Optional[str] = None) -> Session:
+        """Add turn messages (and a new measurement summary), keeping the last `max_messages`."""
+        with self._lock:
+            session = self._load(session_id)
+            first_seq = session.seq
+            session.history.extend({"role": m["role"], "content": m["content"]} for m in messages)
+            session.seq += len(messages)
+            if measurement is not None:
+                session.measurement = measurement
+            overflow = len(session.history) - self.max_messages
+            if overflow > 0:
+                del session.history[:overflow]
+                self.trimmed += overflow
+            if self._db is not None:
+                with self._transaction():
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO session_messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                        [(session.id, first_seq + i, m["role"], m["content"]) for i, m in enumerate(messages)],
+                    )
+                    self._db.execute(
+                        "DELETE FROM session_messages WHERE session_id = ? AND seq < ?",
+                        (session.id, session.seq - len(session.history)),
+                    )
+                    self._db.execute(
+                        "UPDATE sessions SET measurement = ?, seq = ?, expires = ? WHERE id = ?",
+                        (session.measurement, session.seq, session.expires, session.id),
+                    )
+            return session.copy()
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            found = self._sessions.pop(session_id, None) is not None
+            if self._db is not None:
+                with self._transaction():
+                    found = self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0 or found
+                    self._db.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            return found
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "messages": sum(len(s.history) for s in self._sessions.values()),
+                "max_messages": self.max_messages,
+                "ttl_s": self.ttl_s,
+                "created": self.created,
+                "disk_loads": self.disk_loads,
+                "not_found": self.not_found,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "trimmed": self.trimmed,
+                "sqlite": self._db is not None,
+            }
+
+    def _load(self, session_id: str) -> Session:
+        now = time.time()
+        session = self._sessions.get(session_id)
+        if session is not None and session.expires <= now:
+            self._drop(session_id)
+            self.expired += 1
+            session = None
+        if session is None and self._db is not None:
+            session = self._read(session_id, now)
+            if session is not None:
+                self._remember(session)
+                self.disk_loads += 1
+        if session is None:
+            self.not_found += 1
+            raise SessionNotFound(session_id)
+        self._sessions.move_to_end(session_id)
+        session.expires = now + self.ttl_s
+        return session
+
+    def _read(self, session_id: str, now: float) -> Optional[Session]:
+        assert self._db is not None
+        row = self._db.execute(
+            "SELECT measurement, seq FROM sessions WHERE id = ? AND expires > ?", (session_id, now)
+        ).fetchone()
+        if row is None:
+            return None
+        rows = self._db.execute(
+            "SELECT role, content FROM session_messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+            (session_id, self.max_messages),
+        ).fetchall()
+        history = [{"role": role, "content": content} for role, content in reversed(rows)]
+        return Session(session_id, history, row[0], now + self.ttl_s, int(row[1]))
+
+    def _remember(self, session: Session) -> None:
+        self._sessions[session.id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def _drop(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        if self._db is not None:
+            with self._transaction():
+                self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                self._db.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """
+        The connection is in autocommit mode, where `with connection:` opens
+        no transaction; BEGIN explicitly so the statements commit together.
+        """
+        assert self._db is not None
+        self._db.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def _purge(self) -> None:
+        assert self._db is not None
+        with self._transaction():
+            self._db.execute("DELETE FROM sessions WHERE expires <= ?", (time.time(),))
+            self._db.execute("DELETE FROM session_messages WHERE session_id NOT IN (SELECT id FROM sessions)")
+
+
+def create_session_store(settings: SessionsSettings) -> Optional[SessionStore]:
+    """Build the store configured in `[SESSIONS]`; None when disabled."""
+    if not settings.enabled:
+        return None
+    return SessionStore(
+        max_sessions=settings.max_sessions,
+        ttl_s=settings.ttl_s,
+        max_messages=settings.max_messages,
+        sqlite_path=settings.sqlite_path,
+    )
+
+
+# Built from the snapshot on first use; changes to [SESSIONS] take effect on restart
+_current: Configured[Optional[SessionStore]] = Configured(lambda settings, _: create_session_store(settings.sessions))
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """Process-wide store, created from `[SESSIONS]` on first use."""
+    return _current.get()
+
+
+def set_session_store(store: Optional[SessionStore]) -> None:
+    _current.set(store)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from cardioai_backend.settings import Configured, Settings
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future[Any]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: while `fn()` for a key is in
+    flight, further `do(key, ...)` calls await the same task instead of
+    starting their own.
+
+    The call runs as its own task, so a waiter that is cancelled (client
+    disconnected) only stops waiting; the call is cancelled once no waiter
+    is left. Failures reach every waiter and are not remembered: the next
+    call after a flight lands starts a new one. All waiters get the same
+    result object.
+    """
+
+    def __init__(self, name: str, *, enabled: bool = True) -> None:
+        self.name = name
+        self.enabled = enabled
+        # Keyed by (event loop, key): a task can only be awaited on its own loop.
+        self._flights: Dict[Tuple[Any, Hashable], _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.cancelled_waiters = 0
+        self.abandoned = 0
+        self.failed = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.enabled:
+            return await fn()
+        fkey = (asyncio.get_running_loop(), key)
+        flight = self._flights.get(fkey)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[fkey] = flight
+            flight.task.add_done_callback(lambda task, fkey=fkey, flight=flight: self._land(fkey, flight))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                self.cancelled_waiters += 1
+            raise
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self.abandoned += 1
+
+    def _land(self, fkey: Tuple[Any, Hashable], flight: _Flight) -> None:
+        if self._flights.get(fkey) is flight:
+            del self._flights[fkey]
+        if not flight.task.cancelled() and flight.task.exception() is not None:
+            self.failed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / (self.calls + self.coalesced), 4) if self.calls else 0.0,
+            "cancelled_waiters": self.cancelled_waiters,
+            "abandoned": self.abandoned,
+            "failed": self.failed,
+        }
+
+
+def _build(settings: Settings, name: str) -> SingleFlight:
+    return SingleFlight(name, enabled=settings.single_flight)
+
+
+def _retune(flight: SingleFlight, settings: Settings, name: str) -> None:
+    flight.enabled = settings.single_flight  # calls in flight still land for their waiters
+
+
+_flights: Configured[SingleFlight] = Configured(_build, _retune)
+
+
+def get_flight(name: str) -> SingleFlight:
+    """Process-wide single-flight group of upstream `name`, configured in `[SINGLE_FLIGHT]`."""
+    return _flights.get(name)
+
+
+def set_flight(name: str, flight: Optional[SingleFlight]) -> None:
+    if flight is None:
+        _flights.reset(name)
+    else:
+        _flights.set(flight, name)
+
+
+def flight_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: f.stats() for name, f in sorted(_flights.items())}
@@ -0,0 +1,580 @@
+from __future__ import annotations
+
+import configparser
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, Generic, Hashable, List, Mapping, Optional, Tuple, TypeVar
+
+# [HEARTSCAN] MODE values
+HEARTSCAN_MODES = ("remote", "local", "local_fallback")
+
+# [HEARTSCAN] ENGINE values: the metric engines of scg/processing.py
+SCG_ENGINES = ("python", "numpy")
+
+# [EXECUTOR] MODE values
+EXECUTOR_MODES = ("process", "thread", "inline")
+
+# Request classes /api/chat distinguishes; `[LLM_CACHE] CLASSES` opts them in.
+#   initial_analysis: first turn about a fresh observation (no history). The
+#     prompt is system prompt + Results Summary + a fixed question, and many
+#     measurements round to the same summary text.
+#   follow_up: anything with history; practically never repeats verbatim.
+LLM_REQUEST_CLASSES = ("initial_analysis", "follow_up")
+
+# [CONTEXT] SUMMARIZER values
+CONTEXT_SUMMARIZERS = ("llm", "local")
+
+# Upstreams and their own sections, which hold their overrides of the shared
+# [BREAKER] / [ADMISSION] / [HTTP] settings
+UPSTREAM_SECTIONS = {"heartscan": "HEARTSCAN", "dr7": "DR7"}
+
+DEFAULT_HEARTSCAN_URL = (
+    "https://heartscan-api-175148683457.us-central1.run.app/api/v1/cardiolog/realtime_analysis"
+)
+DEFAULT_DR7_URL = "https://dr7.ai/api/v1/medical/chat/completions"
+
+# How often get_settings() stats config.ini for changes; between checks a
+# lookup is a plain attribute read.
+CHECK_INTERVAL_S = 1.0
+
+_FALSE = ("0", "false", "no", "off")
+_TRUE = ("1", "true", "yes", "on")
+
+T = TypeVar("T")
+
+
+class SettingsError(ValueError):
+    """config.ini has values the service cannot run with."""
+
+
+@dataclass(frozen=True)
+class HeartscanSettings:
+    mode: str = "remote"
+    # Metric engine of the local analysis (MODE = local / local_fallback)
+    engine: str = "python"
+    url: str = DEFAULT_HEARTSCAN_URL
+    # Overall deadline of one analysis, hedges and retries included
+    timeout_s: float = 30.0
+    hedge: bool = True
+    hedge_percentile: float = 0.95
+    hedge_initial_delay_s: float = 3.0
+    hedge_min_delay_s: float = 0.25
+    hedge_budget: float = 0.1
+    retries: int = 2
+    retry_backoff_s: float = 0.25
+
+
+@dataclass(frozen=True)
+class Dr7Settings:
+    base_url: str = DEFAULT_DR7_URL
+    model: str = "medgemma-27b-it"
+    temperature: float = 0.7
+    max_tokens: int = 1000
+    timeout_s: float = 60.0
+
+
+@dataclass(frozen=True)
+class IngestSettings:
+    max_body_mb: float = 32.0
+    max_samples: int = 8640000
+
+    @property
+    def max_body_bytes(self) -> int:
+        return int(self.max_body_mb * 1024 * 1024)
+
+
+@dataclass(frozen=True)
+class ExecutorSettings:
+    mode: str = "process"
+    # 0 = one process per CPU core / min(4, CPU cores) threads
+    workers: int = 0
+    thread_workers: int = 0
+    small_job_samples: int = 30000
+
+
+@dataclass(frozen=True)
+class CacheSettings:
+    enabled: bool = True
+    max_mb: float = 64.0
+    ttl_s: float = 3600.0
+    sqlite_path: Optional[str] = None
+
+    @property
+    def max_bytes(self) -> int:
+        return int(self.max_mb * 1024 * 1024)
+
+
+@dataclass(frozen=True)
+class LlmCacheSettings(CacheSettings):
+    max_mb: float = 16.0
+    ttl_s: float = 86400.0
+    classes: FrozenSet[str] = frozenset({"initial_analysis"})
+
+
+@dataclass(frozen=True)
+class SessionsSettings:
+    enabled: bool = True
+    max_sessions: int = 10000
+    ttl_s: float = 86400.0
+    max_messages: int = 50
+    sqlite_path: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ContextSettings:
+    enabled: bool = True
+    max_prompt_tokens: int = 6000
+    keep_recent_messages: int = 6
+    summary_max_tokens: int = 400
+    low_watermark: float = 0.7
+    summarizer: str = "llm"
+
+
+@dataclass(frozen=True)
+class JobsSettings:
+    enabled: bool = True
+    workers: int = 8
+    max_pending: int = 256
+    max_jobs: int = 1024
+    ttl_s: float = 600.0
+    max_wait_s: float = 30.0
+
+
+@dataclass(frozen=True)
+class BatchSettings:
+    max_items: int = 500
+    concurrency: int = 8
+
+
+@dataclass(frozen=True)
+class BreakerSettings:
+    enabled: bool = True
+    window: int = 20
+    min_calls: int = 10
+    failure_rate: float = 0.5
+    slow_call_s: float = 20.0
+    slow_call_rate: float = 0.8
+    open_s: float = 30.0
+    half_open_probes: int = 2
+
+
+@dataclass(frozen=True)
+class AdmissionSettings:
+    enabled: bool = True
+    max_concurrent: int = 32
+    max_queue: int = 64
+    queue_timeout_s: float = 10.0
+
+
+@dataclass(frozen=True)
+class HttpSettings:
+    """Connection pool of one upstream's shared client (its read timeout is the upstream's TIMEOUT_S)."""
+
+    connect_timeout_s: float = 5.0
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry_s: float = 30.0
+    http2: bool = False
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Immutable snapshot of config.ini: typed values for the request path plus
+    the raw sections behind `utils.get_config()`. `errors` lists values that
+    failed validation (their defaults are used instead).
+    """
+
+    system_prompt: str = ""
+    heartscan: HeartscanSettings = field(default_factory=HeartscanSettings)
+    dr7: Dr7Settings = field(default_factory=Dr7Settings)
+    ingest: IngestSettings = field(default_factory=IngestSettings)
+    executor: ExecutorSettings = field(default_factory=ExecutorSettings)
+    quality_gate: bool = True
+    cache: CacheSettings = field(default_factory=CacheSettings)
+    llm_cache: LlmCacheSettings = field(default_factory=LlmCacheSettings)
+    single_flight: bool = True
+    sessions: SessionsSettings = field(default_factory=SessionsSettings)
+    context: ContextSettings = field(default_factory=ContextSettings)
+    jobs: JobsSettings = field(default_factory=JobsSettings)
+    batch: BatchSettings = field(default_factory=BatchSettings)
+    # Per upstream ("heartscan", "dr7"); read through breaker() / admission() / http_pool()
+    breakers: Mapping[str, BreakerSettings] = field(default_factory=lambda: MappingProxyType({}))
+    admissions: Mapping[str, AdmissionSettings] = field(default_factory=lambda: MappingProxyType({}))
+    http_pools: Mapping[str, HttpSettings] = field(default_factory=lambda: MappingProxyType({}))
+    sections: Mapping[str, Mapping[str, str]] = field(default_factory=lambda: MappingProxyType({}))
+    errors: Tuple[str, ...] = ()
+
+    def get(self, variable: str, section: str = "DEFAULT", fallback: str = "") -> str:
+        """`utils.get_config()` semantics: the section, then [DEFAULT], then `fallback`."""
+        key = variable.lower()  # ConfigParser lower-cases option names
+        for name in (section, "DEFAULT"):
+            values = self.sections.get(name)
+            if values is not None and key in values:
+                return values[key].strip()
+        return fallback
+
+    def breaker(self, upstream: str) -> BreakerSettings:
+        return self.breakers.get(upstream) or BreakerSettings()
+
+    def admission(self, upstream: str) -> AdmissionSettings:
+        return self.admissions.get(upstream) or AdmissionSettings()
+
+    def http_pool(self, upstream: str) -> HttpSettings:
+        return self.http_pools.get(upstream) or HttpSettings()
+
+    def validate(self) -> "Settings":
+        if self.errors:
+            raise SettingsError("Invalid cardioai_backend/config.ini:\n  " + "\n  ".join(self.errors))
+        return self
+
+
+class _Parser:
+    """Typed reads from a ConfigParser that collect problems instead of raising."""
+
+    def __init__(self, cfg: configparser.ConfigParser) -> None:
+        self.cfg = cfg
+        self.errors: List[str] = []
+
+    def text(self, section: str, key: str, default: str) -> str:
+        if section in self.cfg and key in self.cfg[section]:
+            return str(self.cfg[section][key]).strip() or default
+        return default
+
+    def number(
+        self,
+        section: str,
+        key: str,
+        default: Any,
+        cast: Callable[[float], Any] = float,
+        *,
+        lo: float = 0.0,
+        hi: Optional[float] = None,
+        positive: bool = False,
+    ) -> Any:
+        raw = self.text(section, key, "")
+        if not raw:
+            return default
+        try:
+            value = cast(float(raw))
+        except ValueError:
+            self.errors.append(f"[{section}] {key} = {raw!r} is not a number")
+            return default
+        if (positive and value <= 0) or value < lo or (hi is not None and value > hi):
+            bound = "> 0" if positive else f">= {lo}" if hi is None else f"in [{lo}, {hi}]"
+            self.errors.append(f"[{section}] {key} = {raw!r} must be {bound}")
+            return default
+        return value
+
+    def flag(self, section: str, key: str, default: bool) -> bool:
+        value = self.text(section, key, "").lower()
+        if not value:
+            return default
+        if value not in _TRUE + _FALSE:
+            self.errors.append(f"[{section}] {key} = {value!r} must be one of {_TRUE + _FALSE}")
+            return default
+        return value in _TRUE
+
+    def override(self, shared: str, upstream: str, key: str, prefix: str = "") -> Tuple[str, str]:
+        """Where to read `key` for `upstream`: `<prefix><key>` in its own section if set, else `key` in `shared`."""
+        own = UPSTREAM_SECTIONS[upstream]
+        if self.text(own, prefix + key, ""):
+            return own, prefix + key
+        return shared, key
+
+    def path(self, section: str, key: str) -> Optional[str]:
+        return self.text(section, key, "") or None
+
+    def choices(self, section: str, key: str, default: FrozenSet[str], choices: Tuple[str, ...]) -> FrozenSet[str]:
+        """Comma-separated subset of `choices`."""
+        values = frozenset(v.strip().lower() for v in self.text(section, key, "").split(",") if v.strip())
+        if not values:
+            return default
+        unknown = sorted(values - set(choices))
+        if unknown:
+            self.errors.append(f"[{section}] {key} has {', '.join(unknown)}; allowed: {', '.join(choices)}")
+            return values - set(unknown)
+        return values
+
+    def choice(self, section: str, key: str, default: str, choices: Tuple[str, ...]) -> str:
+        value = self.text(section, key, default).lower()
+        if value not in choices:
+            self.errors.append(f"[{section}] {key} = {value!r} must be one of {choices}")
+            return default
+        return value
+
+    def url(self, section: str, key: str, default: str) -> str:
+        value = self.text(section, key, default)
+        if not value.startswith(("http://", "https://")):
+            self.errors.append(f"[{section}] {key} = {value!r} is not an http(s) URL")
+            return default
+        return value
+
+
+def _cache(p: _Parser, section: str, default: CacheSettings) -> Dict[str, Any]:
+    return dict(
+        enabled=p.flag(section, "ENABLED", default.enabled),
+        max_mb=p.number(section, "MAX_MB", default.max_mb, positive=True),
+        ttl_s=p.number(section, "TTL_S", default.ttl_s, positive=True),
+        sqlite_path=p.path(section, "SQLITE_PATH"),
+    )
+
+
+def _breaker(p: _Parser, upstream: str) -> BreakerSettings:
+    def at(key: str) -> Tuple[str, str]:
+        return p.override("BREAKER", upstream, key, "BREAKER_")
+
+    return BreakerSettings(
+        enabled=p.flag(*at("ENABLED"), True),
+        window=p.number(*at("WINDOW"), 20, int, lo=1),
+        min_calls=p.number(*at("MIN_CALLS"), 10, int, lo=1),
+        failure_rate=p.number(*at("FAILURE_RATE"), 0.5, positive=True, hi=1.0),
+        slow_call_s=p.number(*at("SLOW_CALL_S"), 20.0, positive=True),
+        slow_call_rate=p.number(*at("SLOW_CALL_RATE"), 0.8, positive=True, hi=1.0),
+        open_s=p.number(*at("OPEN_S"), 30.0, positive=True),
+        half_open_probes=p.number(*at("HALF_OPEN_PROBES"), 2, int, lo=1),
+    )
+
+
+def _admission(p: _Parser, upstream: str) -> AdmissionSettings:
+    def at(key: str) -> Tuple[str, str]:
+        return p.override("ADMISSION", upstream, key, "ADMISSION_")
+
+    return AdmissionSettings(
+        enabled=p.flag(*at("ENABLED"), True),
+        max_concurrent=p.number(*at("MAX_CONCURRENT"), 32, int, lo=1),
+        max_queue=p.number(*at("MAX_QUEUE"), 64, int),
+        queue_timeout_s=p.number(*at("QUEUE_TIMEOUT_S"), 10.0, positive=True),
+    )
+
+
+def _http_pool(p: _Parser, upstream: str) -> HttpSettings:
+    def at(key: str) -> Tuple[str, str]:
+        return p.override("HTTP", upstream, key)
+
+    return HttpSettings(
+        connect_timeout_s=p.number(*at("CONNECT_TIMEOUT_S"), 5.0, positive=True),
+        max_connections=p.number(*at("MAX_CONNECTIONS"), 20, int, lo=1),
+        max_keepalive_connections=p.number(*at("MAX_KEEPALIVE_CONNECTIONS"), 10, int),
+        keepalive_expiry_s=p.number(*at("KEEPALIVE_EXPIRY_S"), 30.0),
+        http2=p.flag(*at("HTTP2"), False),
+    )
+
+
+def parse_settings(cfg: configparser.ConfigParser) -> Settings:
+    p = _Parser(cfg)
+    system_prompt = p.text("DEFAULT", "SYSTEM_PROMPT", "")
+    if not system_prompt:
+        p.errors.append("[DEFAULT] SYSTEM_PROMPT is missing")
+    heartscan = HeartscanSettings(
+        mode=p.choice("HEARTSCAN", "MODE", "remote", HEARTSCAN_MODES),
+        engine=p.choice("HEARTSCAN", "ENGINE", "python", SCG_ENGINES),
+        url=p.url("HEARTSCAN", "URL", DEFAULT_HEARTSCAN_URL),
+        timeout_s=p.number("HEARTSCAN", "TIMEOUT_S", 30.0, positive=True),
+        hedge=p.flag("HEARTSCAN", "HEDGE", True),
+        hedge_percentile=p.number("HEARTSCAN", "HEDGE_PERCENTILE", 0.95, lo=0.5, hi=0.999),
+        hedge_initial_delay_s=p.number("HEARTSCAN", "HEDGE_INITIAL_DELAY_S", 3.0, positive=True),
+        hedge_min_delay_s=p.number("HEARTSCAN", "HEDGE_MIN_DELAY_S", 0.25),
+        hedge_budget=p.number("HEARTSCAN", "HEDGE_BUDGET", 0.1, hi=1.0),
+        retries=p.number("HEARTSCAN", "RETRIES", 2, int, hi=10),
+        retry_backoff_s=p.number("HEARTSCAN", "RETRY_BACKOFF_S", 0.25),
+    )
+    dr7 = Dr7Settings(
+        base_url=p.url("DR7", "BASE_URL", DEFAULT_DR7_URL),
+        model=p.text("DR7", "MODEL", "medgemma-27b-it"),
+        temperature=p.number("DR7", "TEMPERATURE", 0.7, hi=2.0),
+        max_tokens=p.number("DR7", "MAX_TOKENS", 1000, int, lo=1),
+        timeout_s=p.number("DR7", "TIMEOUT_S", 60.0, positive=True),
+    )
+    ingest = IngestSettings(
+        max_body_mb=p.number("INGEST", "MAX_BODY_MB", 32.0, positive=True),
+        max_samples=p.number("INGEST", "MAX_SAMPLES", 8640000, int, lo=1),
+    )
+    sessions = SessionsSettings(
+        enabled=p.flag("SESSIONS", "ENABLED", True),
+        max_sessions=p.number("SESSIONS", "MAX_SESSIONS", 10000, int, lo=1),
+        ttl_s=p.number("SESSIONS", "TTL_S", 86400.0, positive=True),
+        max_messages=p.number("SESSIONS", "MAX_MESSAGES", 50, int, lo=1),
+        sqlite_path=p.path("SESSIONS", "SQLITE_PATH"),
+    )
+    context = ContextSettings(
+        enabled=p.flag("CONTEXT", "ENABLED", True),
+        max_prompt_tokens=p.number("CONTEXT", "MAX_PROMPT_TOKENS", 6000, int, lo=1),
+        keep_recent_messages=p.number("CONTEXT", "KEEP_RECENT_MESSAGES", 6, int),
+        summary_max_tokens=p.number("CONTEXT", "SUMMARY_MAX_TOKENS", 400, int, lo=1),
+        low_watermark=p.number("CONTEXT", "LOW_WATERMARK", 0.7, positive=True, hi=1.0),
+        summarizer=p.choice("CONTEXT", "SUMMARIZER", "llm", CONTEXT_SUMMARIZERS),
+    )
+    jobs = JobsSettings(
+        enabled=p.flag("JOBS", "ENABLED", True),
+        workers=p.number("JOBS", "WORKERS", 8, int, lo=1),
+        max_pending=p.number("JOBS", "MAX_PENDING", 256, int, lo=1),
+        max_jobs=p.number("JOBS", "MAX_JOBS", 1024, int, lo=1),
+        ttl_s=p.number("JOBS", "TTL_S", 600.0, positive=True),
+        max_wait_s=p.number("JOBS", "MAX_WAIT_S", 30.0),
+    )
+    sections = MappingProxyType({name: MappingProxyType(dict(cfg[name])) for name in cfg})
+    return Settings(
+        system_prompt=system_prompt,
+        heartscan=heartscan,
+        dr7=dr7,
+        ingest=ingest,
+        executor=ExecutorSettings(
+            mode=p.choice("EXECUTOR", "MODE", "process", EXECUTOR_MODES),
+            workers=p.number("EXECUTOR", "WORKERS", 0, int, hi=1024),
+            thread_workers=p.number("EXECUTOR", "THREAD_WORKERS", 0, int, hi=1024),
+            small_job_samples=p.number("EXECUTOR", "SMALL_JOB_SAMPLES", 30000, int),
+        ),
+        quality_gate=p.flag("QUALITY", "ENABLED", True),
+        cache=CacheSettings(**_cache(p, "CACHE", CacheSettings())),
+        llm_cache=LlmCacheSettings(
+            **_cache(p, "LLM_CACHE", LlmCacheSettings()),
+            classes=p.choices("LLM_CACHE", "CLASSES", LlmCacheSettings().classes, LLM_REQUEST_CLASSES),
+        ),
+        single_flight=p.flag("SINGLE_FLIGHT", "ENABLED", True),
+        sessions=sessions,
+        context=context,
+        jobs=jobs,
+        batch=BatchSettings(
+            max_items=p.number("BATCH", "MAX_ITEMS", 500, int, lo=1),
+            concurrency=p.number("BATCH", "CONCURRENCY", 8, int, lo=1),
+        ),
+        breakers=MappingProxyType({name: _breaker(p, name) for name in UPSTREAM_SECTIONS}),
+        admissions=MappingProxyType({name: _admission(p, name) for name in UPSTREAM_SECTIONS}),
+        http_pools=MappingProxyType({name: _http_pool(p, name) for name in UPSTREAM_SECTIONS}),
+        sections=sections,
+        errors=tuple(dict.fromkeys(p.errors)),  # a bad shared value is reported once, not per upstream
+    )
+
+
+def load_settings(path: Path) -> Settings:
+    cfg = configparser.ConfigParser()
+    if path.exists():
+        cfg.read(str(path), encoding="utf-8")
+    return parse_settings(cfg)
+
+
+class SettingsStore:
+    """
+    Parses config.ini once and re-parses it only when its mtime/size change,
+    checked at most every `check_interval_s`. A reload that fails validation
+    keeps serving the previous snapshot (see `stats()["last_error"]`).
+    """
+
+    def __init__(self, path: Path, *, check_interval_s: float = CHECK_INTERVAL_S) -> None:
+        self.path = Path(path)
+        self.check_interval_s = check_interval_s
+        self._lock = threading.Lock()
+        self._settings: Optional[Settings] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def get(self) -> Settings:
+        settings = self._settings
+        if settings is not None and time.monotonic() < self._next_check:
+            return settings
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval_s
+            signature = self._stat()
+            if self._settings is None or signature != self._signature:
+                self._load(signature)
+            return self._settings  # type: ignore[return-value]
+
+    def reload(self) -> Settings:
+        """Re-parse now, regardless of mtime (startup validation, tests)."""
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval_s
+            self._load(self._stat())
+            return self._settings  # type: ignore[return-value]
+
+    def _load(self, signature: Optional[Tuple[int, int]]) -> None:
+        fresh = load_settings(self.path)
+        self._signature = signature
+        if fresh.errors and self._settings is not None:
+            self.last_error = "; ".join(fresh.errors)
+            return
+        self.last_error = "; ".join(fresh.errors) or None
+        self._settings = fresh
+        self.reloads += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": str(self.path), "reloads": self.reloads, "last_error": self.last_error}
+
+
+_store = SettingsStore(Path(__file__).resolve().parent / "config.ini")
+
+
+def get_settings() -> Settings:
+    """Current config.ini snapshot; cheap enough to call per request."""
+    return _store.get()
+
+
+def get_settings_store() -> SettingsStore:
+    return _store
+
+
+def set_settings_store(store: SettingsStore) -> None:
+    global _store
+    _store = store
+
+
+class Configured(Generic[T]):
+    """
+    Process-wide objects built from the settings snapshot, one per key (an
+    upstream name, or None for a single object). `build(settings, key)`
+    makes one on first use; `retune(obj, settings, key)`, if given, applies a
+    reloaded snapshot to it on the next `get()` (without it, changes take
+    effect at restart). Objects put in with `set()` (tests, tools) are kept
+    as they are until `reset()`.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[Settings, Any], T],
+        retune: Optional[Callable[[T, Settings, Any], None]] = None,
+    ) -> None:
+        self._build = build
+        self._retune = retune
+        self._lock = threading.Lock()
+        self._items: Dict[Hashable, Tuple[T, Optional[Settings]]] = {}  # key -> (object, snapshot it follows)
+
+    def get(self, key: Hashable = None) -> T:
+        settings = get_settings()
+        item = self._items.get(key)
+        if item is not None and (item[1] is None or item[1] is settings):
+            return item[0]
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                item = (self._build(settings, key), settings)
+            elif item[1] is not None and item[1] is not settings:
+                if self._retune is not None:
+                    self._retune(item[0], settings, key)
+                item = (item[0], settings)
+            self._items[key] = item
+            return item[0]
+
+    def set(self, obj: T, key: Hashable = None) -> None:
+        with self._lock:
+            self._items[key] = (obj, None)
+
+    def reset(self, key: Hashable = None) -> None:
+        """Forget the object; the next `get()` builds a new one from the current snapshot."""
+        with self._lock:
+            self._items.pop(key, None)
+
+    def items(self) -> List[Tuple[Hashable, T]]:
+        return [(key, obj) for key, (obj, _) in list(self._items.items())]
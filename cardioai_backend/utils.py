@@ -1,20 +1,9 @@
 from __future__ import annotations
 
-import configparser
 import os
-from pathlib import Path
 from typing import Optional
 
-
-def _backend_dir() -> Path:
-    return Path(__file__).resolve().parent
-
-
-def _read_ini(path: Path) -> configparser.ConfigParser:
-    cfg = configparser.ConfigParser()
-    if path.exists():
-        cfg.read(str(path), encoding="utf-8")
-    return cfg
+from cardioai_backend.settings import get_settings
 
 
 def get_secret(variable: str, fallback: str = "") -> str:
@@ -30,14 +19,12 @@ def get_secret(variable: str, fallback: str = "") -> str:
 def get_config(variable: str, section: str = "DEFAULT", fallback: str = "") -> str:
     """
     Read a config value from `config.ini` located next to the backend package.
+
+    Served from the cached settings snapshot (`settings.py`), which re-parses
+    the file only when it changes.
     """
     try:
-        cfg = _read_ini(_backend_dir() / "config.ini")
-        if section in cfg and variable in cfg[section]:
-            return str(cfg[section].get(variable, fallback=fallback)).strip()
-        if "DEFAULT" in cfg and variable in cfg["DEFAULT"]:
-            return str(cfg["DEFAULT"].get(variable, fallback=fallback)).strip()
-        return fallback
+        return get_settings().get(variable, section=section, fallback=fallback)
     except Exception:
         return fallback
 
@@ -67,5 +54,5 @@ def get_system_prompt() -> str:
     """
     Load the system prompt from `cardioai_backend/config.ini`.
     """
-    return get_config("SYSTEM_PROMPT", section="DEFAULT", fallback="").strip()
+    return get_settings().system_prompt
 
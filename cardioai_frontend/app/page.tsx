@@ -15,6 +15,7 @@ import { Activity, Send, Trash2, Menu, X, ChevronRight, History, BarChart3 } fro
 import { storage, MeasurementEntry } from "@/lib/utils/storage";
 import MeasurementHistory from "@/components/MeasurementHistory";
 import SignalViewer from "@/components/SignalViewer";
+import { encodeObservation, EncodedObservation } from "@/app/service/apiService";
 
 // Dynamically import the measurement component to avoid SSR issues
 const ProHeartRateMeasurement = dynamic(() => import('@/components/ProHeartRateMeasurement'), {
@@ -67,7 +68,7 @@ export default function App() {
   }, [isMeasurementOpen]);
 
   // Unified function to send messages or data
-  async function callApi(userMessage: string | null, observation: Record<string, unknown> | null) {
+  async function callApi(userMessage: string | null, observation: EncodedObservation | Record<string, unknown> | null) {
     if (busy) return;
     try {
       setBusy(true);
@@ -182,9 +183,8 @@ export default function App() {
       data: chartData
     });
     
-    const observation = {
-      sensor_data: rawData
-    };
+    // Compact column encoding (float32 + delta timestamps, gzip): a fraction of the JSON size
+    const observation = await encodeObservation(rawData, "sensor_data");
     
     // Log the payload to console for verification (Vercel compatible)
     console.log('[Clinical Telemetry Capture]', {
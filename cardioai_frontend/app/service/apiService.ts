@@ -9,3 +9,115 @@ export interface DeviceInfo {
   model: string;
   platform: string;
 }
+
+// Compact observation encoding understood by the backend (cardioai_backend/scg/wire.py):
+// little-endian float32 ax/ay/az columns plus int16 (or int32) timestamp deltas,
+// back to back, optionally gzip-compressed, base64 in JSON or raw in a multipart part.
+export const WIRE_FORMAT = "scg-columns/v1";
+
+export interface WireColumn {
+  name: "ax" | "ay" | "az" | "timestamp";
+  dtype: "float32" | "int16" | "int32";
+  delta?: boolean;
+  start?: number;
+}
+
+export interface EncodedObservation {
+  format: typeof WIRE_FORMAT;
+  key: string;
+  samples: number;
+  columns: WireColumn[];
+  compression: "none" | "gzip";
+  data?: string;
+}
+
+function packColumns(points: AccelerometerDataPoint[]): { columns: WireColumn[]; bytes: Uint8Array } {
+  const n = points.length;
+  const hasTimestamps = n > 0 && points.every((p) => Number.isFinite(p.timestamp));
+  const deltas: number[] = [];
+  let wide = false;
+  if (hasTimestamps) {
+    let prev = Math.round(points[0].timestamp);
+    for (const p of points) {
+      const t = Math.round(p.timestamp);
+      const d = t - prev;
+      if (d > 32767 || d < -32768) wide = true;
+      deltas.push(d);
+      prev = t;
+    }
+  }
+
+  const columns: WireColumn[] = [
+    { name: "ax", dtype: "float32" },
+    { name: "ay", dtype: "float32" },
+    { name: "az", dtype: "float32" },
+  ];
+  const deltaSize = wide ? 4 : 2;
+  const view = new DataView(new ArrayBuffer(12 * n + (hasTimestamps ? deltaSize * n : 0)));
+  for (let i = 0; i < n; i++) {
+    view.setFloat32(4 * i, points[i].ax || 0, true);
+    view.setFloat32(4 * (n + i), points[i].ay || 0, true);
+    view.setFloat32(4 * (2 * n + i), points[i].az || 0, true);
+  }
+  if (hasTimestamps) {
+    columns.push({ name: "timestamp", dtype: wide ? "int32" : "int16", delta: true, start: Math.round(points[0].timestamp) });
+    const base = 12 * n;
+    for (let i = 0; i < n; i++) {
+      if (wide) view.setInt32(base + 4 * i, deltas[i], true);
+      else view.setInt16(base + 2 * i, deltas[i], true);
+    }
+  }
+  return { columns, bytes: new Uint8Array(view.buffer) };
+}
+
+async function gzipBytes(bytes: Uint8Array): Promise<Uint8Array | null> {
+  if (typeof CompressionStream === "undefined") return null;
+  const stream = new Blob([bytes.buffer as ArrayBuffer]).stream().pipeThrough(new CompressionStream("gzip"));
+  return new Uint8Array(await new Response(stream).arrayBuffer());
+}
+
+function toBase64(bytes: Uint8Array): string {
+  let binary = "";
+  for (let i = 0; i < bytes.length; i += 0x8000) {
+    binary += String.fromCharCode(...Array.from(bytes.subarray(i, i + 0x8000)));
+  }
+  return btoa(binary);
+}
+
+async function encodeBinary(
+  points: AccelerometerDataPoint[],
+  key: string,
+  compress: boolean
+): Promise<{ header: EncodedObservation; bytes: Uint8Array }> {
+  const { columns, bytes } = packColumns(points);
+  const gz = compress ? await gzipBytes(bytes) : null;
+  return {
+    header: { format: WIRE_FORMAT, key, samples: points.length, columns, compression: gz ? "gzip" : "none" },
+    bytes: gz ?? bytes,
+  };
+}
+
+// Observation for the JSON body of POST /api/chat: roughly 6x smaller than the
+// list of {ax, ay, az, timestamp} objects before gzip.
+export async function encodeObservation(
+  points: AccelerometerDataPoint[],
+  key = "az_data_array",
+  compress = true
+): Promise<EncodedObservation> {
+  const { header, bytes } = await encodeBinary(points, key, compress);
+  return { ...header, data: toBase64(bytes) };
+}
+
+// multipart/form-data body for POST /api/chat/upload: no base64 overhead.
+export async function encodeObservationMultipart(
+  points: AccelerometerDataPoint[],
+  request: { message?: string | null; history?: unknown[] },
+  key = "az_data_array",
+  compress = true
+): Promise<FormData> {
+  const { header, bytes } = await encodeBinary(points, key, compress);
+  const form = new FormData();
+  form.append("request", JSON.stringify({ ...request, observation: header }));
+  form.append("observation", new Blob([bytes.buffer as ArrayBuffer], { type: "application/octet-stream" }), "observation.bin");
+  return form;
+}
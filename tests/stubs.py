@@ -0,0 +1,131 @@
+"""Stand-ins shared by the endpoint tests: fake upstream clients and a local HTTP server."""
+
+import asyncio
+import json
+import threading
+from contextlib import ExitStack, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
+from unittest import mock
+
+METRICS = {"avg_bpm": 71.0, "min_bpm": 60.0, "max_bpm": 80.0, "episodes_count": 0}
+
+
+class StubAnalyzer:
+    """Heartscan client stand-in: records the observations and answers `metrics` after `delay_s`."""
+
+    cache_namespace = "stub"
+
+    def __init__(self, metrics: Optional[Dict[str, Any]] = None, delay_s: float = 0.0) -> None:
+        self.metrics = dict(METRICS if metrics is None else metrics)
+        self.delay_s = delay_s
+        self.observations: List[Dict[str, Any]] = []
+
+    async def analyze(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+        self.observations.append(observation)
+        if self.delay_s:
+            await asyncio.sleep(self.delay_s)
+        return dict(self.metrics)
+
+
+class StubChat:
+    """
+    Dr7 client stand-in: records the prompts and answers `reply` (text, or a
+    function of the prompt). With a `cache_namespace` it goes through the
+    LLM cache and single-flight wrappers like the real client.
+    """
+
+    def __init__(
+        self,
+        reply: Union[str, Callable[[List[Dict[str, str]]], str]] = "All good.",
+        delay_s: float = 0.0,
+        cache_namespace: Optional[str] = None,
+    ) -> None:
+        self.reply = reply
+        self.delay_s = delay_s
+        self.cache_namespace = cache_namespace
+        self.prompts: List[List[Dict[str, str]]] = []
+
+    async def chat(self, messages: List[Dict[str, str]]) -> str:
+        self.prompts.append(messages)
+        if self.delay_s:
+            await asyncio.sleep(self.delay_s)
+        return self.reply(messages) if callable(self.reply) else self.reply
+
+
+@contextmanager
+def chat_upstreams(
+    analyzer: Optional[StubAnalyzer] = None,
+    llm: Optional[StubChat] = None,
+    *,
+    quality_gate: bool = False,
+    heartscan_client: bool = False,
+) -> Iterator[Tuple[StubAnalyzer, StubChat]]:
+    """
+    Route the chat endpoints' Heartscan and Dr7 calls to stubs, with the LLM
+    reply cache off and (unless `quality_gate`) no local quality gate.
+    `heartscan_client` replaces the HTTP client class instead of
+    `create_heartscan_client()`, so its metrics cache and single-flight apply.
+    """
+    from cardioai_backend.services.llm_cache import get_llm_cache, set_llm_cache  # type: ignore
+
+    analyzer = analyzer or StubAnalyzer()
+    llm = llm or StubChat()
+    target = "services.heartscan.HeartscanClient" if heartscan_client else "api.chat.create_heartscan_client"
+    previous = get_llm_cache()
+    set_llm_cache(None)
+    try:
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch(f"cardioai_backend.{target}", return_value=analyzer))
+            stack.enter_context(mock.patch("cardioai_backend.api.chat.Dr7LlmClient", return_value=llm))
+            if not quality_gate:
+                gate = mock.patch("cardioai_backend.api.chat.assess_observation_quality", return_value=None)
+                stack.enter_context(gate)
+            yield analyzer, llm
+    finally:
+        set_llm_cache(previous)
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    """Keep-alive HTTP/1.1 handler base for stub servers; the server's state is on `self.server`."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def read_json(self) -> Any:
+        return json.loads(self.rfile.read(int(self.headers.get("content-length", 0))) or b"{}")
+
+    def send_json(self, status: int, body: Any) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubHttpServer:
+    """
+    `handler` on a free localhost port, served from a daemon thread inside
+    `with`. Keyword arguments become attributes of the server (`self.httpd`),
+    where the handler reads its settings and records what it saw.
+    """
+
+    def __init__(self, handler: Type[BaseHTTPRequestHandler], path: str = "", **state: Any) -> None:
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()  # type: ignore[attr-defined]
+        for key, value in state.items():
+            setattr(self.httpd, key, value)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}{path}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> Any:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,155 @@
+import asyncio
+import unittest
+from typing import Any, List
+
+from tests.stubs import chat_upstreams
+
+
+def _controller(**kwargs: Any) -> Any:
+    from cardioai_backend.services.admission import AdmissionController  # type: ignore
+
+    defaults = dict(max_concurrent=1, max_queue=2, queue_timeout_s=5.0)
+    return AdmissionController("test", **dict(defaults, **kwargs))
+
+
+class TestAdmissionController(unittest.TestCase):
+    def test_concurrency_cap_and_priority_order(self) -> None:
+        from cardioai_backend.services.admission import PRIORITY_FOLLOW_UP, PRIORITY_MEASUREMENT  # type: ignore
+
+        controller = _controller(max_concurrent=2, max_queue=4)
+        order: List[str] = []
+        peak = 0
+
+        async def call(name: str, priority: int) -> None:
+            nonlocal peak
+            async with controller.slot(priority):
+                peak = max(peak, controller.stats()["in_flight"])
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        async def main() -> None:
+            tasks = [asyncio.create_task(call(f"m{i}", PRIORITY_MEASUREMENT)) for i in range(4)]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.create_task(call("f", PRIORITY_FOLLOW_UP)))
+            await asyncio.gather(*tasks)
+
+        asyncio.run(main())
+        self.assertEqual(peak, 2)
+        self.assertEqual(order[:3], ["m0", "m1", "f"])  # the follow-up overtakes queued measurements
+        stats = controller.stats()
+        self.assertEqual((stats["admitted"], stats["queued"], stats["in_flight"], stats["queue_depth"]), (5, 3, 0, 0))
+        self.assertEqual(stats["queue_wait_ms"]["count"], 5)
+
+    def test_full_queue_rejects_or_sheds_the_worst_waiter(self) -> None:
+        from cardioai_backend.services.admission import (  # type: ignore
+            PRIORITY_FOLLOW_UP,
+            PRIORITY_MEASUREMENT,
+            AdmissionRejected,
+        )
+
+        controller = _controller(max_queue=1)
+
+        async def main() -> None:
+            await controller.acquire(PRIORITY_MEASUREMENT)
+            waiter = asyncio.create_task(controller.acquire(PRIORITY_MEASUREMENT))
+            await asyncio.sleep(0)
+            with self.assertRaises(AdmissionRejected) as full:
+                await controller.acquire(PRIORITY_MEASUREMENT)
+            self.assertEqual(full.exception.status_code, 429)
+            self.assertGreaterEqual(full.exception.retry_after_s, 1.0)
+
+            follow_up = asyncio.create_task(controller.acquire(PRIORITY_FOLLOW_UP))
+            await asyncio.sleep(0)
+            with self.assertRaises(AdmissionRejected) as shed:
+                await waiter
+            self.assertEqual(shed.exception.status_code, 503)
+            controller.release()
+            await follow_up  # got the slot
+            controller.release()
+
+        asyncio.run(main())
+        stats = controller.stats()
+        self.assertEqual((stats["rejected_full"], stats["shed"], stats["in_flight"]), (1, 1, 0))
+
+    def test_queue_deadline_and_cancelled_waiters(self) -> None:
+        from cardioai_backend.services.admission import AdmissionRejected  # type: ignore
+
+        controller = _controller(queue_timeout_s=0.05)
+
+        async def main() -> None:
+            await controller.acquire()
+            with self.assertRaises(AdmissionRejected) as timeout:
+                await controller.acquire()
+            self.assertEqual(timeout.exception.status_code, 503)
+
+            # A waiter that goes away leaves the queue; the slot goes to the next one.
+            gone = asyncio.create_task(controller.acquire())
+            stays = asyncio.create_task(controller.acquire())
+            await asyncio.sleep(0)
+            gone.cancel()
+            await asyncio.gather(gone, return_exceptions=True)
+            self.assertEqual(controller.stats()["queue_depth"], 1)
+            controller.release()
+            await stays
+            controller.release()
+
+        asyncio.run(main())
+        stats = controller.stats()
+        self.assertEqual((stats["rejected_timeout"], stats["in_flight"], stats["queue_depth"]), (1, 0, 0))
+
+    def test_disabled_controller_admits_everything(self) -> None:
+        controller = _controller(enabled=False, max_queue=0)
+
+        async def main() -> None:
+            for _ in range(5):
+                await controller.acquire()
+
+        asyncio.run(main())
+        self.assertEqual(controller.stats()["in_flight"], 0)
+
+
+    def test_reloaded_settings_grant_added_capacity(self) -> None:
+        from cardioai_backend.settings import AdmissionSettings  # type: ignore
+
+        controller = _controller(max_queue=4)
+
+        async def main() -> None:
+            await controller.acquire()
+            waiters = [asyncio.create_task(controller.acquire()) for _ in range(3)]
+            await asyncio.sleep(0)
+            controller.configure(AdmissionSettings(max_concurrent=3, max_queue=4, queue_timeout_s=5.0))
+            await asyncio.wait_for(asyncio.gather(*waiters[:2]), timeout=1)
+            self.assertFalse(waiters[2].done())
+            self.assertEqual(controller.stats()["in_flight"], 3)
+
+            controller.configure(AdmissionSettings(enabled=False))
+            await asyncio.gather(*waiters)  # disabling lets everyone through
+            self.assertEqual(controller.stats()["in_flight"], 0)
+
+        asyncio.run(main())
+
+
+class TestChatAdmission(unittest.TestCase):
+    def test_saturated_llm_answers_429_with_retry_after(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+        from cardioai_backend.services.admission import get_admission, set_admission  # type: ignore
+        from cardioai_backend.services.dr7_llm import Dr7LlmClient  # type: ignore
+
+        self.addCleanup(set_admission, "dr7", None)
+        controller = _controller(max_queue=0)
+        set_admission("dr7", controller)
+
+        client = TestClient(create_app())
+        with chat_upstreams(llm=Dr7LlmClient(api_key="k")):  # type: ignore[arg-type]
+            controller._active = controller.max_concurrent  # other requests hold every slot
+            res = client.post("/api/chat", json={"message": "hi"})
+        self.assertEqual(res.status_code, 429)
+        self.assertIn("busy", res.json()["detail"])
+        self.assertGreaterEqual(int(res.headers["Retry-After"]), 1)
+        self.assertEqual(controller.stats()["rejected_full"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
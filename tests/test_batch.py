@@ -0,0 +1,108 @@
+import asyncio
+import dataclasses
+import json
+import unittest
+from typing import Any, Dict, List
+from unittest import mock
+
+from tests.stubs import StubAnalyzer, StubChat, chat_upstreams
+
+
+def _observation(i: int) -> Dict[str, Any]:
+    return {"az_data_array": [{"az": float(i), "timestamp": 0}]}
+
+
+class TestAnalyzeBatch(unittest.TestCase):
+    def test_items_stream_back_as_they_complete(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+        from cardioai_backend.services.admission import PRIORITY_BATCH, request_priority  # type: ignore
+        from cardioai_backend.settings import BatchSettings, get_settings  # type: ignore
+
+        running = peak = 0
+        priorities: List[int] = []
+
+        class _Analyzer(StubAnalyzer):
+            async def analyze(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+                nonlocal running, peak
+                i = int(observation["az_data_array"][0]["az"])
+                priorities.append(request_priority.get())
+                running += 1
+                peak = max(peak, running)
+                try:
+                    await asyncio.sleep(0.2 if i == 0 else 0.02)
+                finally:
+                    running -= 1
+                if i == 2:
+                    raise RuntimeError("upstream down")
+                return {"avg_bpm": 0 if i == 3 else 70.0 + i, "min_bpm": 60.0, "max_bpm": 90.0}
+
+        # Echo the average heart rate from the prompt's Results Summary.
+        llm = StubChat(lambda messages: messages[1]["content"].split("Value: ")[1].split("\n")[0])
+        settings = dataclasses.replace(get_settings(), batch=BatchSettings(concurrency=2))
+        items = [{"id": f"m{i}", "observation": _observation(i)} for i in range(6)]
+        patch_settings = mock.patch("cardioai_backend.api.chat.get_settings", return_value=settings)
+        with chat_upstreams(_Analyzer(), llm), patch_settings:
+            client = TestClient(create_app())
+            res = client.post("/api/analyze/batch", json={"items": items})
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.headers["content-type"], "application/x-ndjson")
+            lines = [json.loads(line) for line in res.text.splitlines()]
+
+            missing = client.post("/api/analyze/batch", json={"items": [{"message": "hi"}]})
+            self.assertEqual(missing.status_code, 422)
+
+        results, summary = lines[:-1], lines[-1]
+        self.assertEqual(summary["done"], True)
+        self.assertEqual((summary["total"], summary["succeeded"], summary["failed"]), (6, 5, 1))
+        self.assertNotEqual(results[0]["index"], 0)  # completion order: the slow first item is not awaited
+        by_index = {r["index"]: r for r in results}
+        self.assertEqual(sorted(by_index), list(range(6)))
+        self.assertEqual(by_index[1]["id"], "m1")
+        self.assertEqual(by_index[1]["result"]["response"], "71 BPM")
+        self.assertEqual((by_index[2]["status"], by_index[2]["error"]), (502, "Math API Error: upstream down"))
+        self.assertIn("measurement again", by_index[3]["result"]["response"])
+        self.assertEqual(peak, 2)
+        self.assertEqual(set(priorities), {PRIORITY_BATCH})
+
+    def test_preprocessing_is_bounded_and_abandoned_items_unwind(self) -> None:
+        from cardioai_backend.api import chat  # type: ignore
+        from cardioai_backend.schemas import BatchItem  # type: ignore
+        from cardioai_backend.settings import get_settings  # type: ignore
+
+        preprocessing = peak = 0
+        unwound: List[str] = []
+
+        async def preprocess(item: Any) -> None:
+            nonlocal preprocessing, peak
+            preprocessing += 1
+            peak = max(peak, preprocessing)
+            await asyncio.sleep(0.01)
+            preprocessing -= 1
+
+        async def reply(item: Any, settings: Any, **kwargs: Any) -> Dict[str, Any]:
+            try:
+                await asyncio.sleep(0 if item.id == "m0" else 10)
+            finally:
+                unwound.append(item.id)
+            return {"response": "ok"}
+
+        async def main() -> Dict[str, Any]:
+            items = [BatchItem(id=f"m{i}", observation=_observation(i)) for i in range(20)]
+            lines = chat._batch_lines(items, get_settings(), 2)
+            first = json.loads(await lines.__anext__())
+            await lines.aclose()  # the client disconnected
+            self.assertEqual(unwound, ["m0", "m1"])  # the running reply was cancelled and awaited
+            return first
+
+        with mock.patch.object(chat, "_preprocess", preprocess), mock.patch.object(
+            chat, "_chat_reply", reply
+        ), mock.patch.object(chat, "_preprocess_slots", return_value=2):
+            first = asyncio.run(main())
+        self.assertEqual((first["id"], first["status"]), ("m0", 200))
+        self.assertEqual(peak, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+import asyncio
+import functools
+import json
+import threading
+import time
+import unittest
+from typing import Any, Dict, List, Tuple
+from unittest import mock
+
+from tests.stubs import JsonHandler, StubHttpServer
+
+TOKENS = ["Your ", "heart ", "rate ", "looks ", "normal. ", "This ", "advice ", "does ", "not ", "replace."]
+
+
+class _StubLlmHandler(JsonHandler):
+    """OpenAI-compatible chat completions stub: SSE chunks `delay_s` apart, or one JSON body."""
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self) -> None:
+        body = self.read_json()
+        server: Any = self.server
+        server.requests.append(body)
+        if server.status != 200:
+            self.send_json(server.status, {"error": "overloaded"})
+            return
+        if not body.get("stream") or server.json_only:
+            self.send_json(200, {"choices": [{"message": {"content": "".join(TOKENS)}}]})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self._chunk(b'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n')
+        for token in TOKENS:
+            time.sleep(server.delay_s)
+            self._chunk(f"data: {json.dumps({'choices': [{'delta': {'content': token}}]})}\n\n".encode())
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+
+class StubLlm(StubHttpServer):
+    def __init__(self, delay_s: float = 0.0, status: int = 200, json_only: bool = False) -> None:
+        super().__init__(
+            _StubLlmHandler, "/v1/chat/completions", requests=[], delay_s=delay_s, status=status, json_only=json_only
+        )
+
+    @property
+    def requests(self) -> List[Dict[str, Any]]:
+        return self.httpd.requests  # type: ignore[attr-defined]
+
+
+def _read_events(response: Any, t0: float = 0.0) -> List[Tuple[str, Dict[str, Any], float]]:
+    """(event, data, seconds since `t0`) for each SSE event."""
+    events: List[Tuple[str, Dict[str, Any], float]] = []
+    t0 = t0 or time.perf_counter()
+    event = ""
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            event = line[7:]
+        elif line.startswith("data: "):
+            events.append((event, json.loads(line[6:]), time.perf_counter() - t0))
+    return events
+
+
+class TestChatStream(unittest.TestCase):
+    def _client(self, url: str) -> Any:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+        from cardioai_backend.services.dr7_llm import Dr7LlmClient  # type: ignore
+
+        patcher = mock.patch("cardioai_backend.api.chat.Dr7LlmClient", functools.partial(Dr7LlmClient, base_url=url, api_key="k"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return TestClient(create_app())
+
+    def test_streams_deltas_then_history(self) -> None:
+        from cardioai_backend.metrics import histogram  # type: ignore
+
+        before = histogram("chat.ttft_ms").count
+        with StubLlm(delay_s=0.05) as llm:
+            client = self._client(llm.url)
+            request = {"message": "How is my heart?", "history": [{"role": "assistant", "content": "Hi"}]}
+            with client.stream("POST", "/api/chat/stream", json=request) as res:
+                self.assertEqual(res.status_code, 200)
+                self.assertTrue(res.headers["content-type"].startswith("text/event-stream"))
+                events = _read_events(res)
+        self.assertTrue(llm.requests[0]["stream"])
+
+        deltas = [data["content"] for event, data, _ in events if event == "delta"]
+        self.assertEqual(deltas, TOKENS)
+        name, done, _ = events[-1]
+        self.assertEqual(name, "done")
+        self.assertEqual(done["response"], "".join(TOKENS))
+        self.assertEqual(
+            done["history"],
+            [
+                {"role": "assistant", "content": "Hi"},
+                {"role": "user", "content": "How is my heart?"},
+                {"role": "assistant", "content": "".join(TOKENS)},
+            ],
+        )
+        self.assertLess(done["ttft_ms"], 250)
+        self.assertEqual(histogram("chat.ttft_ms").count, before + 1)
+        self.assertIn("llm.ttft_ms", client.get("/api/status/metrics").json())
+
+    def test_first_token_arrives_before_completion_over_http(self) -> None:
+        import httpx
+        import uvicorn
+
+        from cardioai_backend.app import create_app  # type: ignore
+        from cardioai_backend.scg.executor import ProcessingExecutor  # type: ignore
+        from cardioai_backend.services.dr7_llm import Dr7LlmClient  # type: ignore
+
+        with StubLlm(delay_s=0.05) as llm, mock.patch(
+            "cardioai_backend.api.chat.Dr7LlmClient", functools.partial(Dr7LlmClient, base_url=llm.url, api_key="k")
+        ), mock.patch("cardioai_backend.app.create_processing_executor", return_value=ProcessingExecutor(mode="inline")):
+            server = uvicorn.Server(uvicorn.Config(create_app(), host="127.0.0.1", port=0, log_level="warning"))
+            thread = threading.Thread(target=server.run, daemon=True)
+            thread.start()
+            try:
+                while not server.started:
+                    time.sleep(0.01)
+                port = server.servers[0].sockets[0].getsockname()[1]
+                t0 = time.perf_counter()
+                with httpx.stream("POST", f"http://127.0.0.1:{port}/api/chat/stream", json={"message": "hi"}) as res:
+                    events = _read_events(res, t0)
+            finally:
+                server.should_exit = True
+                thread.join(5)
+
+        first_at = next(t for event, _, t in events if event == "delta")
+        done_at = events[-1][2]
+        # 10 tokens 50 ms apart: the first one is on screen ~0.45 s before the reply completes.
+        self.assertLess(first_at, 0.25)
+        self.assertGreater(done_at - first_at, 0.3)
+
+    def test_upstream_error_before_first_token_keeps_status(self) -> None:
+        with StubLlm(status=503) as llm:
+            res = self._client(llm.url).post("/api/chat/stream", json={"message": "hi"})
+        self.assertEqual(res.status_code, 503)
+        self.assertIn("LLM API Error", res.json()["detail"])
+
+    def test_non_streaming_upstream_is_one_delta(self) -> None:
+        from cardioai_backend.services.dr7_llm import Dr7LlmClient  # type: ignore
+
+        async def collect(client: Any) -> List[str]:
+            return [d async for d in client.stream_chat([{"role": "user", "content": "hi"}])]
+
+        with StubLlm(json_only=True) as llm:
+            deltas = asyncio.run(collect(Dr7LlmClient(base_url=llm.url, api_key="k")))
+        self.assertEqual(deltas, ["".join(TOKENS)])
+
+    def test_upstream_stream_is_closed_when_the_client_never_reads(self) -> None:
+        from starlette.requests import ClientDisconnect
+
+        from cardioai_backend.api import chat  # type: ignore
+        from cardioai_backend.schemas import ChatRequest  # type: ignore
+
+        closed: List[bool] = []
+
+        class _Llm:
+            async def stream_chat(self, messages: List[Dict[str, str]]) -> Any:
+                try:
+                    yield "Hello"
+                    yield " there"
+                finally:
+                    closed.append(True)  # admission slot and breaker guard released
+
+        async def send(message: Dict[str, Any]) -> None:
+            raise OSError("client went away")
+
+        async def receive() -> Dict[str, Any]:
+            return {"type": "http.disconnect"}
+
+        async def main() -> None:
+            response = await chat.chat_stream(ChatRequest(message="hi"))
+            scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+            with self.assertRaises(ClientDisconnect):
+                await response(scope, receive, send)
+            # Checked before asyncio.run() finalizes leftover generators itself.
+            self.assertEqual(closed, [True])
+
+        with mock.patch.object(chat, "_llm_client", return_value=_Llm()):
+            asyncio.run(main())
+
+    def test_plain_chat_still_answers_in_one_piece(self) -> None:
+        with StubLlm() as llm:
+            res = self._client(llm.url).post("/api/chat", json={"message": "hi"})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["response"], "".join(TOKENS))
+        self.assertFalse(llm.requests[0].get("stream", False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import asyncio
+import functools
+import unittest
+from typing import Any
+from unittest import mock
+
+import httpx
+
+from tests.test_chat_stream import StubLlm
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _breaker(clock: FakeClock, **kwargs: Any) -> Any:
+    from cardioai_backend.services.circuit_breaker import CircuitBreaker  # type: ignore
+
+    defaults = dict(window=10, min_calls=4, failure_rate=0.5, slow_call_s=1.0, slow_call_rate=0.5, open_s=30, half_open_probes=2)
+    return CircuitBreaker("test", clock=clock, **dict(defaults, **kwargs))
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://upstream/")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status, request=request))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_on_failure_rate_and_recovers_through_probes(self) -> None:
+        from cardioai_backend.services.circuit_breaker import CircuitOpenError  # type: ignore
+
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        for failed in (False, True, False):
+            breaker.record(failed=failed, latency_s=0.1)
+        self.assertEqual(breaker.state, "closed")  # below min_calls
+        breaker.record(failed=True, latency_s=0.1)
+        self.assertEqual(breaker.state, "open")
+
+        with self.assertRaises(CircuitOpenError) as ctx:
+            breaker.acquire()
+        self.assertAlmostEqual(ctx.exception.retry_after_s, 30.0)
+
+        clock.now += 30
+        self.assertEqual(breaker.state, "half_open")
+        probes = [breaker.acquire(), breaker.acquire()]
+        self.assertEqual(probes, [True, True])
+        with self.assertRaises(CircuitOpenError):
+            breaker.acquire()  # probe slots are taken
+        for probe in probes:
+            breaker.record(failed=False, latency_s=0.1, probe=probe)
+        self.assertEqual(breaker.state, "closed")
+        self.assertFalse(breaker.acquire())
+        stats = breaker.stats()
+        self.assertEqual((stats["opened"], stats["rejected"]), (1, 2))
+
+    def test_failed_probe_reopens(self) -> None:
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        for _ in range(4):
+            breaker.record(failed=True, latency_s=0.1)
+        clock.now += 31
+        breaker.record(failed=True, latency_s=0.1, probe=breaker.acquire())
+        self.assertEqual(breaker.state, "open")
+        self.assertEqual(breaker.stats()["opened"], 2)
+
+    def test_slow_calls_trip_and_client_errors_do_not(self) -> None:
+        clock = FakeClock()
+        breaker = _breaker(clock)
+
+        async def call(exc: Exception) -> None:
+            async with breaker.guard():
+                raise exc
+
+        for _ in range(6):
+            with self.assertRaises(httpx.HTTPStatusError):
+                asyncio.run(call(_status_error(400)))
+        self.assertEqual(breaker.state, "closed")
+        self.assertEqual(breaker.stats()["failure_rate"], 0.0)
+
+        for _ in range(6):
+            breaker.record(failed=False, latency_s=2.0)
+        self.assertEqual(breaker.state, "open")
+
+    def test_cancelled_probe_frees_its_slot(self) -> None:
+        clock = FakeClock()
+        breaker = _breaker(clock, half_open_probes=1)
+        for _ in range(4):
+            breaker.record(failed=True, latency_s=0.1)
+        clock.now += 30
+
+        async def cancelled_probe() -> None:
+            async with breaker.guard():
+                raise asyncio.CancelledError()
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(cancelled_probe())
+        self.assertEqual(breaker.state, "half_open")
+        self.assertTrue(breaker.acquire())
+
+
+class TestBreakerSettings(unittest.TestCase):
+    def test_configured_breakers_follow_reloads(self) -> None:
+        import dataclasses
+
+        from cardioai_backend import settings as settings_mod  # type: ignore
+        from cardioai_backend.services.circuit_breaker import get_breaker, set_breaker  # type: ignore
+
+        self.addCleanup(set_breaker, "dr7", None)
+        set_breaker("dr7", None)
+        current = settings_mod.get_settings()
+        breaker = get_breaker("dr7")
+        self.assertEqual(breaker.slow_call_s, current.breaker("dr7").slow_call_s)
+        breaker.record(failed=True, latency_s=0.1)
+
+        tuned = dataclasses.replace(current.breaker("dr7"), window=3, open_s=5.0)
+        reloaded = dataclasses.replace(current, breakers={"dr7": tuned})
+        with mock.patch.object(settings_mod, "get_settings", return_value=reloaded):
+            self.assertIs(get_breaker("dr7"), breaker)  # same breaker, new settings
+            self.assertEqual((breaker.open_s, breaker.stats()["calls"]), (5.0, 1))
+            self.assertEqual(breaker._calls.maxlen, max(3, tuned.min_calls))
+
+            fixed = _breaker(FakeClock())
+            set_breaker("dr7", fixed)
+        self.assertIs(get_breaker("dr7"), fixed)  # installed breakers are left alone
+        self.assertEqual(fixed.open_s, 30)
+
+
+class TestChatFailsFast(unittest.TestCase):
+    def setUp(self) -> None:
+        from cardioai_backend.services.circuit_breaker import CircuitBreaker, set_breaker  # type: ignore
+
+        set_breaker("dr7", CircuitBreaker("dr7", window=4, min_calls=2, open_s=30))
+        self.addCleanup(set_breaker, "dr7", None)
+
+    def test_open_breaker_answers_503_without_calling_dr7(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+        from cardioai_backend.services.dr7_llm import Dr7LlmClient  # type: ignore
+
+        with StubLlm(status=503) as llm, mock.patch(
+            "cardioai_backend.api.chat.Dr7LlmClient", functools.partial(Dr7LlmClient, base_url=llm.url, api_key="k")
+        ):
+            client = TestClient(create_app())
+            for _ in range(2):
+                self.assertEqual(client.post("/api/chat", json={"message": "hi"}).status_code, 503)
+            self.assertEqual(len(llm.requests), 2)
+
+            for path in ("/api/chat", "/api/chat/stream"):
+                res = client.post(path, json={"message": "hi"})
+                self.assertEqual(res.status_code, 503)
+                self.assertIn("temporarily unavailable", res.json()["detail"])
+                self.assertLessEqual(int(res.headers["retry-after"]), 30)
+            self.assertEqual(len(llm.requests), 2)
+
+            stats = client.get("/api/status/breakers").json()["dr7"]
+        self.assertEqual(stats["state"], "open")
+        self.assertEqual(stats["rejected"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import asyncio
+import unittest
+from typing import Any, Dict, List, Optional
+
+from tests.stubs import StubChat, chat_upstreams
+
+SYSTEM = [{"role": "system", "content": "You are a heart-health assistant."}, {"role": "system", "content": "Results Summary: 72 BPM"}]
+
+
+def _history(turns: int, words: int = 15) -> List[Dict[str, str]]:
+    messages: List[Dict[str, str]] = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i}: " + "palpitations " * words})
+        messages.append({"role": "assistant", "content": f"Answer {i}: " + "rest and hydrate " * words})
+    return messages
+
+
+class _Summarizer:
+    def __init__(self, fail: bool = False) -> None:
+        self.calls: List[Any] = []
+        self.fail = fail
+
+    async def __call__(self, previous: Optional[str], messages: List[Dict[str, str]], max_tokens: int) -> str:
+        self.calls.append((previous, len(messages)))
+        if self.fail:
+            raise RuntimeError("LLM down")
+        return f"summary #{len(self.calls)} of {len(messages)} messages"
+
+
+def _budget(summarizer: Any = None, **kwargs: Any) -> Any:
+    from cardioai_backend.llm.context import ContextBudget  # type: ignore
+
+    defaults = dict(max_prompt_tokens=1200, keep_recent_messages=4, summary_max_tokens=100, low_watermark=0.7)
+    return ContextBudget(summarizer=summarizer, **dict(defaults, **kwargs))
+
+
+class TestEstimator(unittest.TestCase):
+    def test_estimates_are_in_a_plausible_range(self) -> None:
+        from cardioai_backend.llm.context import estimate_tokens  # type: ignore
+
+        prose = "The average heart rate during the measurement was within the normal range for an adult at rest."
+        self.assertTrue(18 <= estimate_tokens(prose) <= 30)
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertGreater(estimate_tokens("72, 68, 75, 80, 91, 64"), 11)  # digits split into many tokens
+
+
+class TestContextBudget(unittest.TestCase):
+    def test_short_prompts_pass_through(self) -> None:
+        from cardioai_backend.metrics import histogram  # type: ignore
+
+        before = histogram("llm.prompt_tokens_compacted").count
+        messages = SYSTEM + _history(1) + [{"role": "user", "content": "hi"}]
+        self.assertIs(asyncio.run(_budget().compact(messages)), messages)
+        self.assertEqual(histogram("llm.prompt_tokens_compacted").count, before + 1)
+
+    def test_old_turns_fold_into_a_rolling_summary(self) -> None:
+        from cardioai_backend.llm.context import SUMMARY_PREFIX, prompt_tokens  # type: ignore
+
+        summarizer = _Summarizer()
+        budget = _budget(summarizer)
+        history = _history(20)
+        new_turn = {"role": "user", "content": "What now?"}
+
+        compacted = asyncio.run(budget.compact(SYSTEM + history + [new_turn]))
+        self.assertLessEqual(prompt_tokens(compacted), 1200)
+        self.assertEqual(compacted[:2], SYSTEM)
+        self.assertEqual(compacted[-1], new_turn)
+        self.assertTrue(compacted[2]["content"].startswith(SUMMARY_PREFIX))
+        kept = compacted[3:-1]
+        self.assertEqual(kept, history[-len(kept):])  # recent turns verbatim
+        self.assertGreaterEqual(len(kept), 4)
+        self.assertEqual(kept[0]["role"], "user")
+        self.assertEqual(len(summarizer.calls), 1)
+
+        # Next turn: the cached summary still fits, nothing is re-summarized.
+        history += _history(1)
+        again = asyncio.run(budget.compact(SYSTEM + history + [new_turn]))
+        self.assertEqual(again[2], compacted[2])
+        self.assertEqual(len(summarizer.calls), 1)
+
+        # Growing further moves the fold point; the new summary extends the old one.
+        for _ in range(4):
+            history += _history(1)
+            asyncio.run(budget.compact(SYSTEM + history + [new_turn]))
+        self.assertEqual(len(summarizer.calls), 2)
+        self.assertEqual(summarizer.calls[1][0], "summary #1 of %d messages" % summarizer.calls[0][1])
+        stats = budget.stats()
+        self.assertEqual((stats["compacted"], stats["summaries_computed"]), (6, 2))
+
+    def test_failed_summarizer_falls_back_without_caching(self) -> None:
+        from cardioai_backend.llm.context import prompt_tokens  # type: ignore
+
+        summarizer = _Summarizer(fail=True)
+        budget = _budget(summarizer)
+        messages = SYSTEM + _history(20) + [{"role": "user", "content": "What now?"}]
+        compacted = asyncio.run(budget.compact(messages))
+        self.assertIn("- user: Question", compacted[2]["content"])
+        self.assertIn("- assistant: Answer", compacted[2]["content"])
+        self.assertLessEqual(prompt_tokens(compacted), 1200)
+        asyncio.run(budget.compact(messages))
+        self.assertEqual(len(summarizer.calls), 2)  # retried, the fallback was not cached
+        self.assertEqual(budget.stats()["summary_failures"], 2)
+
+
+class TestChatCompactsPrompts(unittest.TestCase):
+    def test_long_history_reaches_the_llm_within_budget(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+        from cardioai_backend.llm.context import get_context_budget, prompt_tokens, set_context_budget  # type: ignore
+
+        self.addCleanup(set_context_budget, get_context_budget())
+        set_context_budget(_budget(max_prompt_tokens=2500))
+        history = _history(40)
+        with chat_upstreams(llm=StubChat("ok")) as (_, llm):
+            client = TestClient(create_app())
+            res = client.post("/api/chat", json={"message": "What now?", "history": history})
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.json()["history"][:-2], history)  # the client's history is untouched
+            metrics = client.get("/api/status/metrics").json()
+        self.assertLessEqual(prompt_tokens(llm.prompts[0]), 2500)
+        self.assertLess(metrics["llm.prompt_tokens_compacted"]["max"], metrics["llm.prompt_tokens"]["max"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import asyncio
+import collections
+import time
+import unittest
+from typing import Any, Callable, List, Optional
+
+import httpx
+
+from tests.stubs import JsonHandler, StubHttpServer
+
+
+class _LatencyHandler(JsonHandler):
+    """
+    Heartscan stand-in: the n-th hit sleeps `latency(n, request_id, attempt)` s
+    and answers `status(n)`; `attempt` counts the hits carrying the body's "id".
+    """
+
+    def do_POST(self) -> None:
+        request_id = self.read_json().get("id")
+        server: Any = self.server
+        with server.lock:
+            n = server.count
+            server.count += 1
+            attempt = server.attempts[request_id]
+            server.attempts[request_id] += 1
+        time.sleep(server.latency(n, request_id, attempt))
+        status = server.status(n)
+        try:
+            self.send_json(status, {"avg_bpm": 72.0} if status == 200 else {"detail": "unavailable"})
+        except OSError:
+            pass  # the client gave up on this attempt (hedge loser / deadline)
+
+
+class LatencyStub(StubHttpServer):
+    def __init__(
+        self,
+        latency: Callable[[int, Optional[int], int], float],
+        status: Callable[[int], int] = lambda n: 200,
+    ) -> None:
+        super().__init__(
+            _LatencyHandler, "/analyze", count=0, attempts=collections.Counter(), latency=latency, status=status
+        )
+
+    @property
+    def count(self) -> int:
+        return self.httpd.count  # type: ignore[attr-defined]
+
+
+def _policy(**kwargs: Any) -> Any:
+    from cardioai_backend.services.hedging import HedgePolicy  # type: ignore
+
+    defaults = dict(initial_delay_s=0.1, min_delay_s=0.05, budget=0.5, retries=2, retry_backoff_s=0.01, name="test")
+    return HedgePolicy(**dict(defaults, **kwargs))
+
+
+def _run(url: str, policy: Any, n: int, concurrency: int = 4, timeout_s: float = 5.0) -> List[float]:
+    from cardioai_backend.services.heartscan import HeartscanClient  # type: ignore
+    from cardioai_backend.services.http_clients import (  # type: ignore
+        HttpClientRegistry,
+        UpstreamSettings,
+        set_http_clients,
+    )
+
+    async def main() -> List[float]:
+        registry = HttpClientRegistry([UpstreamSettings("heartscan", timeout_s=timeout_s)])
+        registry.start()
+        set_http_clients(registry)
+        try:
+            return await requests()
+        finally:
+            set_http_clients(None)
+            await registry.aclose()
+
+    async def requests() -> List[float]:
+        client = HeartscanClient(base_url=url, api_key="k", timeout_s=timeout_s, hedge_policy=policy)
+        sem = asyncio.Semaphore(concurrency)
+        latencies: List[float] = []
+
+        async def one(i: int) -> None:
+            async with sem:
+                t0 = time.perf_counter()
+                await client.analyze({"id": i, "az_data_array": []})
+                latencies.append(time.perf_counter() - t0)
+
+        await asyncio.gather(*(one(i) for i in range(n)))
+        return sorted(latencies)
+
+    return asyncio.run(main())
+
+
+class TestHedgedHeartscan(unittest.TestCase):
+    def test_hedging_cuts_tail_latency(self) -> None:
+        def cold_starts(n: int, request_id: Optional[int], attempt: int) -> float:
+            # The first attempt of every 10th request hits a cold instance; its hedge does not.
+            return 0.6 if request_id is not None and request_id % 10 == 9 and attempt == 0 else 0.02
+
+        # The delay sits well above the fast attempts, so only the cold ones are hedged.
+        policy = _policy(initial_delay_s=0.2, min_delay_s=0.2)
+        with LatencyStub(cold_starts) as stub:
+            latencies = _run(stub.url, policy, 40)
+            self.assertEqual(stub.count, 44)
+
+        self.assertEqual(len(latencies), 40)
+        stats = policy.stats()
+        self.assertEqual(stats["hedges"], 4)
+        self.assertEqual(stats["hedge_wins"], 4)
+        self.assertEqual(stats["retries"], 0)
+        self.assertEqual(stats["budget_denied"], 0)
+
+    def test_budget_caps_extra_load(self) -> None:
+        policy = _policy(budget=0.0)
+        with LatencyStub(lambda *hit: 0.2) as stub:
+            _run(stub.url, policy, 5, concurrency=1)
+            requests_seen = stub.count
+        stats = policy.stats()
+        self.assertEqual(stats["hedges"], 1)  # only the initial token
+        self.assertEqual(stats["budget_denied"], 4)
+        self.assertEqual(requests_seen, 6)
+
+    def test_retries_transient_failures_only(self) -> None:
+        policy = _policy(enabled=False, budget=1.0)
+        with LatencyStub(lambda *hit: 0.0, status=lambda n: 503 if n < 2 else 200) as stub:
+            self.assertEqual(len(_run(stub.url, policy, 1)), 1)
+            self.assertEqual(stub.count, 3)
+        self.assertEqual(policy.stats()["retries"], 2)
+
+        policy = _policy(enabled=False, budget=1.0)
+        with LatencyStub(lambda *hit: 0.0, status=lambda n: 400) as stub:
+            with self.assertRaises(httpx.HTTPStatusError):
+                _run(stub.url, policy, 1)
+            self.assertEqual(stub.count, 1)
+
+    def test_deadline_bounds_the_whole_call(self) -> None:
+        from cardioai_backend.services.hedging import DeadlineExceeded  # type: ignore
+
+        policy = _policy()
+        with LatencyStub(lambda *hit: 1.0) as stub:
+            t0 = time.perf_counter()
+            with self.assertRaises((DeadlineExceeded, httpx.TimeoutException)):
+                _run(stub.url, policy, 1, timeout_s=0.3)
+            self.assertLess(time.perf_counter() - t0, 0.8)
+
+    def test_adaptive_delay_tracks_latency_percentile(self) -> None:
+        policy = _policy(initial_delay_s=2.0, min_delay_s=0.01)
+        self.assertEqual(policy.delay_s(), 2.0)
+        for i in range(100):
+            policy.latency.observe(10.0 + i)  # ms
+        self.assertAlmostEqual(policy.delay_s(), 0.104, places=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import asyncio
+import time
+import unittest
+from typing import Any, Dict
+from unittest import mock
+
+from tests.stubs import JsonHandler, StubHttpServer
+
+
+class _StubHandler(JsonHandler):
+    """Heartscan / Dr7 stand-in: keep-alive HTTP/1.1, counts TCP connections."""
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:  # type: ignore[attr-defined]
+            self.server.connections += 1  # type: ignore[attr-defined]
+
+    def do_POST(self) -> None:
+        body = self.read_json()
+        self.server.bodies.append(body)  # type: ignore[attr-defined]
+        time.sleep(self.server.delay_s)  # type: ignore[attr-defined]
+        if self.path == "/dr7":
+            self.send_json(200, {"choices": [{"message": {"content": f"reply to {len(body['messages'])} messages"}}]})
+        else:
+            self.send_json(200, {"avg_bpm": 72.0, "episodes_count": 0})
+
+
+class StubServer(StubHttpServer):
+    def __init__(self, delay_s: float = 0.0) -> None:
+        super().__init__(_StubHandler, connections=0, bodies=[], delay_s=delay_s)
+
+    @property
+    def connections(self) -> int:
+        return self.httpd.connections  # type: ignore[attr-defined]
+
+
+def _registry(**kwargs: Any) -> Any:
+    from cardioai_backend.services.http_clients import HttpClientRegistry, UpstreamSettings  # type: ignore
+
+    return HttpClientRegistry(
+        [UpstreamSettings("heartscan", timeout_s=5, **kwargs), UpstreamSettings("dr7", timeout_s=5, **kwargs)]
+    )
+
+
+class TestHttpClientRegistry(unittest.TestCase):
+    def tearDown(self) -> None:
+        from cardioai_backend.services.http_clients import set_http_clients  # type: ignore
+
+        set_http_clients(None)
+
+    def test_shared_client_reuses_connections(self) -> None:
+        from cardioai_backend.services.dr7_llm import Dr7LlmClient  # type: ignore
+        from cardioai_backend.services.heartscan import HeartscanClient  # type: ignore
+        from cardioai_backend.services.http_clients import set_http_clients  # type: ignore
+
+        async def run(url: str) -> Dict[str, Any]:
+            registry = _registry()
+            registry.start()
+            set_http_clients(registry)
+            try:
+                heartscan = HeartscanClient(base_url=f"{url}/heartscan", api_key="k")
+                for _ in range(5):
+                    self.assertEqual((await heartscan.analyze({"az_data_array": []}))["avg_bpm"], 72.0)
+                llm = Dr7LlmClient(base_url=f"{url}/dr7", api_key="k")
+                for _ in range(3):
+                    self.assertEqual(await llm.chat([{"role": "user", "content": "hi"}]), "reply to 1 messages")
+                return registry.stats()
+            finally:
+                set_http_clients(None)
+                await registry.aclose()
+
+        with StubServer() as server:
+            stats = asyncio.run(run(server.url))
+            self.assertEqual(server.connections, 2)  # one keep-alive connection per upstream
+        self.assertEqual(stats["heartscan"]["requests"], 5)
+        self.assertEqual(stats["heartscan"]["connections_opened"], 1)
+        self.assertAlmostEqual(stats["heartscan"]["reuse_ratio"], 0.8)
+        self.assertEqual((stats["heartscan"]["connections"], stats["heartscan"]["idle"]), (1, 1))
+        self.assertEqual(stats["dr7"]["requests"], 3)
+
+    def test_without_registry_each_call_connects(self) -> None:
+        from cardioai_backend.services.heartscan import HeartscanClient  # type: ignore
+
+        async def run(url: str) -> None:
+            client = HeartscanClient(base_url=f"{url}/heartscan", api_key="k")
+            for _ in range(3):
+                await client.analyze({"az_data_array": []})
+
+        with StubServer() as server:
+            asyncio.run(run(server.url))
+            self.assertEqual(server.connections, 3)
+
+    def test_pool_limit_caps_concurrent_connections(self) -> None:
+        from cardioai_backend.services.heartscan import HeartscanClient  # type: ignore
+        from cardioai_backend.services.http_clients import set_http_clients  # type: ignore
+
+        async def run(url: str) -> None:
+            registry = _registry(max_connections=2)
+            registry.start()
+            set_http_clients(registry)
+            try:
+                client = HeartscanClient(base_url=f"{url}/heartscan", api_key="k")
+                results = await asyncio.gather(*(client.analyze({"az_data_array": []}) for _ in range(6)))
+                self.assertEqual(len(results), 6)
+            finally:
+                set_http_clients(None)
+                await registry.aclose()
+
+        with StubServer(delay_s=0.05) as server:
+            asyncio.run(run(server.url))
+            self.assertEqual(server.connections, 2)
+
+    def test_settings_from_config(self) -> None:
+        from cardioai_backend.services.http_clients import UpstreamSettings  # type: ignore
+
+        s = UpstreamSettings.from_config("dr7")
+        self.assertEqual(s.timeout_s, 60.0)
+        self.assertLessEqual(s.connect_timeout_s, s.timeout_s)
+        self.assertLessEqual(s.max_keepalive_connections, s.max_connections)
+
+    def test_lifespan_starts_registry_and_reports_stats(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+        from cardioai_backend.scg.executor import ProcessingExecutor  # type: ignore
+        from cardioai_backend.services.http_clients import get_http_clients  # type: ignore
+
+        with mock.patch(
+            "cardioai_backend.app.create_processing_executor", return_value=ProcessingExecutor(mode="inline")
+        ):
+            with TestClient(create_app()) as client:
+                body = client.get("/api/status/http").json()
+                self.assertTrue(body["started"])
+                self.assertEqual(set(body["upstreams"]), {"heartscan", "dr7"})
+                self.assertEqual(body["upstreams"]["dr7"]["requests"], 0)
+            self.assertIsNone(get_http_clients())
+
+
+if __name__ == "__main__":
+    unittest.main()
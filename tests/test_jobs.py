@@ -0,0 +1,114 @@
+import asyncio
+import unittest
+from typing import Any, Dict, List
+from unittest import mock
+
+from tests.stubs import StubAnalyzer, StubChat, chat_upstreams
+
+OBSERVATION = {"az_data_array": [{"az": 0.1, "timestamp": 0}]}
+
+
+class TestJobRunner(unittest.TestCase):
+    def test_jobs_run_in_the_background_and_can_be_awaited(self) -> None:
+        from cardioai_backend.services.jobs import JobError, JobRunner  # type: ignore
+
+        runner = JobRunner(workers=2, max_pending=8)
+        peak = running = 0
+
+        def job(i: int) -> Any:
+            async def run() -> Dict[str, Any]:
+                nonlocal peak, running
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+                if i == 3:
+                    raise JobError(502, "Math API Error: down")
+                return {"response": f"r{i}"}
+
+            return run
+
+        async def main() -> List[Any]:
+            jobs = [runner.submit(job(i)) for i in range(4)]
+            self.assertEqual([j.status for j in jobs], ["queued"] * 4)  # submit returns at once
+            self.assertEqual((await runner.wait(jobs[0].id, 0)).status, "queued")  # no wait: current state
+            done = [await runner.wait(j.id, 5) for j in jobs]
+            await runner.aclose()
+            return done
+
+        done = asyncio.run(main())
+        self.assertEqual(peak, 2)
+        self.assertEqual([j.result for j in done[:3]], [{"response": f"r{i}"} for i in range(3)])
+        self.assertEqual((done[3].status, done[3].error), ("failed", {"status_code": 502, "detail": "Math API Error: down"}))
+        stats = runner.stats()
+        self.assertEqual((stats["submitted"], stats["completed"], stats["failed"], stats["running"]), (4, 3, 1, 0))
+
+    def test_bounded_queue_and_result_store(self) -> None:
+        from cardioai_backend.services.jobs import JobNotFound, JobQueueFull, JobRunner  # type: ignore
+
+        runner = JobRunner(workers=1, max_pending=2, max_jobs=3, ttl_s=60)
+
+        async def main() -> None:
+            release = asyncio.Event()
+
+            async def blocked() -> Dict[str, Any]:
+                await release.wait()
+                return {}
+
+            first = runner.submit(blocked)
+            await asyncio.sleep(0)  # the worker picks it up
+            runner.submit(blocked)
+            runner.submit(blocked)
+            with self.assertRaises(JobQueueFull) as full:
+                runner.submit(blocked)
+            self.assertGreaterEqual(full.exception.retry_after_s, 1.0)
+
+            release.set()
+            await runner.wait(first.id, 5)
+            await asyncio.sleep(0.01)
+            # The store is full of finished jobs: the oldest one makes room.
+            last = runner.submit(blocked)
+            with self.assertRaises(JobNotFound):
+                runner.get(first.id)
+            await runner.wait(last.id, 5)
+
+            with mock.patch("cardioai_backend.services.jobs.time.time", return_value=10**12):
+                with self.assertRaises(JobNotFound):
+                    runner.get(last.id)  # expired
+            await runner.aclose()
+
+        asyncio.run(main())
+        stats = runner.stats()
+        self.assertEqual((stats["rejected"], stats["evictions"], stats["expired"], stats["jobs"]), (1, 1, 3, 0))
+
+
+class TestAnalyzeEndpoint(unittest.TestCase):
+    def test_analysis_job_is_polled_until_done(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+        from cardioai_backend.services.jobs import JobRunner, get_job_runner, set_job_runner  # type: ignore
+
+        self.addCleanup(set_job_runner, get_job_runner())
+        set_job_runner(JobRunner(workers=2))
+
+        with chat_upstreams(StubAnalyzer(delay_s=0.05), StubChat("Your rhythm looks regular.")):
+            with TestClient(create_app()) as client:
+                res = client.post("/api/analyze", json={"observation": OBSERVATION})
+                self.assertEqual(res.status_code, 202)
+                job = res.json()
+                self.assertEqual(job["status"], "queued")
+                self.assertEqual(res.headers["Location"], f"/api/jobs/{job['job_id']}")
+
+                done = client.get(f"/api/jobs/{job['job_id']}", params={"wait": 5}).json()
+                self.assertEqual(done["status"], "done")
+                self.assertEqual(done["result"]["response"], "Your rhythm looks regular.")
+                self.assertGreaterEqual(done["run_ms"], 50)
+                self.assertEqual(client.get("/api/status/jobs").json()["completed"], 1)
+
+                self.assertEqual(client.post("/api/analyze", json={"message": "hi"}).status_code, 422)
+                self.assertEqual(client.get("/api/jobs/unknown").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
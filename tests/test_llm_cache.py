@@ -0,0 +1,131 @@
+import asyncio
+import functools
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest import mock
+
+from tests.test_chat_stream import TOKENS, StubLlm
+
+OBSERVATION = {"az_data_array": [{"az": 0.1, "timestamp": 0}]}
+SUMMARY = {"avg_bpm": 71.0, "min_bpm": 60.0, "max_bpm": 80.0, "episodes_count": 0}
+
+
+def _cache(**kwargs: Any) -> Any:
+    from cardioai_backend.scg.cache import MetricsCache  # type: ignore
+    from cardioai_backend.services.llm_cache import LlmResponseCache  # type: ignore
+
+    return LlmResponseCache(MetricsCache(ttl_s=60, table="llm_cache", **kwargs), frozenset({"initial_analysis"}))
+
+
+class _Analyzer:
+    async def analyze(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(SUMMARY)
+
+
+class TestLlmResponseCache(unittest.TestCase):
+    def test_repeated_prompt_skips_the_llm(self) -> None:
+        from cardioai_backend.services.dr7_llm import Dr7LlmClient  # type: ignore
+        from cardioai_backend.services.llm_cache import CachedLlmClient  # type: ignore
+
+        messages = [{"role": "system", "content": "prompt"}, {"role": "user", "content": "Analyze"}]
+
+        async def run(client: Any) -> List[Any]:
+            first = await client.chat(messages)
+            second = await client.chat(messages)
+            streamed = [d async for d in client.stream_chat(messages)]
+            other = await client.chat(messages + [{"role": "user", "content": "more"}])
+            return [first, second, streamed, other]
+
+        cache = _cache()
+        with StubLlm() as llm:
+            client = CachedLlmClient(Dr7LlmClient(base_url=llm.url, api_key="k"), cache)
+            first, second, streamed, other = asyncio.run(run(client))
+            self.assertEqual(len(llm.requests), 2)
+        self.assertEqual(first, "".join(TOKENS))
+        self.assertEqual((second, streamed, other), (first, [first], first))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (2, 2, 2))
+
+        cache.sync_prompt("prompt")
+        cache.sync_prompt("edited prompt")
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+    def test_streamed_reply_is_stored_only_when_complete(self) -> None:
+        from cardioai_backend.services.dr7_llm import Dr7LlmClient  # type: ignore
+        from cardioai_backend.services.llm_cache import CachedLlmClient  # type: ignore
+
+        messages = [{"role": "user", "content": "hi"}]
+
+        async def abandon(client: Any) -> None:
+            deltas = client.stream_chat(messages)
+            await deltas.__anext__()
+            await deltas.aclose()
+
+        async def drain(client: Any) -> List[str]:
+            return [d async for d in client.stream_chat(messages)]
+
+        cache = _cache()
+        with StubLlm() as llm:
+            client = CachedLlmClient(Dr7LlmClient(base_url=llm.url, api_key="k"), cache)
+            asyncio.run(abandon(client))
+            self.assertEqual(len(cache.store), 0)
+            self.assertEqual(asyncio.run(drain(client)), TOKENS)
+            self.assertEqual(asyncio.run(drain(client)), ["".join(TOKENS)])
+            self.assertEqual(len(llm.requests), 2)
+
+    def test_sqlite_tier_shares_a_file_with_the_metrics_cache(self) -> None:
+        from cardioai_backend.scg.cache import MetricsCache  # type: ignore
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "cache.sqlite"
+            metrics = MetricsCache(ttl_s=60, sqlite_path=path)
+            metrics.put("k", {"avg_bpm": 70.0})
+            llm = _cache(sqlite_path=path)
+            llm.put("k", "Looks normal.")
+            llm.store.close()
+            self.assertEqual(_cache(sqlite_path=path).get("k"), "Looks normal.")
+            self.assertEqual(metrics.get("k"), {"avg_bpm": 70.0})
+            metrics.close()
+
+
+class TestChatUsesLlmCache(unittest.TestCase):
+    def setUp(self) -> None:
+        from cardioai_backend.services.llm_cache import set_llm_cache  # type: ignore
+
+        self.cache = _cache()
+        set_llm_cache(self.cache)
+        self.addCleanup(set_llm_cache, None)
+
+    def test_only_initial_analysis_turns_are_cached(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+        from cardioai_backend.services.dr7_llm import Dr7LlmClient  # type: ignore
+
+        with StubLlm() as llm, mock.patch(
+            "cardioai_backend.api.chat.create_heartscan_client", return_value=_Analyzer()
+        ), mock.patch(
+            "cardioai_backend.api.chat.Dr7LlmClient", functools.partial(Dr7LlmClient, base_url=llm.url, api_key="k")
+        ), mock.patch(
+            "cardioai_backend.api.chat.assess_observation_quality", return_value=None
+        ):
+            client = TestClient(create_app())
+            replies = [client.post("/api/chat", json={"observation": OBSERVATION}).json() for _ in range(3)]
+            self.assertEqual(len(llm.requests), 1)
+            self.assertEqual(replies[0], replies[2])
+
+            history = replies[0]["history"]
+            for _ in range(2):
+                res = client.post("/api/chat", json={"message": "And now?", "history": history})
+                self.assertEqual(res.status_code, 200)
+            self.assertEqual(len(llm.requests), 3)
+
+            status = client.get("/api/status/llm_cache").json()
+        self.assertEqual((status["hits"], status["misses"]), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import time
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+PAYLOADS_PATH = REPO_ROOT / "tests" / "data" / "cardiolog_payloads.json"
+
+
+def _die_in_worker() -> str:
+    """Kills a process-pool worker (like an OOM kill); the thread-pool retry returns."""
+    if multiprocessing.parent_process() is not None:
+        os._exit(1)
+    return "retried on a thread"
+
+
+class TestLocalPeakDetection(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.payloads: List[Dict[str, Any]] = json.loads(PAYLOADS_PATH.read_text(encoding="utf-8"))
+
+    def test_accuracy_against_expected_bpm(self) -> None:
+        from cardioai_backend.scg.peak_detection import analyze_observation  # type: ignore
+
+        errors = []
+        for p in self.payloads:
+            metrics = analyze_observation(p["request_body"])
+            self.assertAlmostEqual(metrics["sampling_rate"], 100.0)
+            errors.append(abs(float(metrics["avg_bpm"]) - float(p["metadata"]["expected_bpm"])))
+        self.assertLessEqual(statistics.median(errors), 3.0)
+        self.assertGreaterEqual(sum(e <= 5.0 for e in errors), 5)
+
+    def test_flat_signal_yields_no_heart_rate(self) -> None:
+        from cardioai_backend.scg.peak_detection import detect_peaks  # type: ignore
+
+        self.assertEqual(detect_peaks([9.81] * 2000).size, 0)
+        self.assertEqual(detect_peaks([9.81] * 10).size, 0)
+
+    def test_refractory_window(self) -> None:
+        import numpy as np
+
+        from cardioai_backend.scg.peak_detection import detect_peaks  # type: ignore
+
+        fs = 100.0
+        t = np.arange(3000) / fs
+        # sharp 1.2 Hz (72 BPM) beats on top of gravity
+        z = 9.81 + 0.5 * np.exp(-(((t % (1 / 1.2)) - 0.1) ** 2) / 0.0005)
+        peaks = detect_peaks(z, t * 1000.0, fs=fs)
+        self.assertGreater(peaks.size, 20)
+        self.assertGreaterEqual(int(np.diff(peaks).min()), 40)
+        self.assertAlmostEqual(60.0 * fs / float(np.median(np.diff(peaks))), 72.0, delta=2.0)
+
+
+class _StubClient:
+    def __init__(self, result: Any) -> None:
+        self.result = result
+        self.calls = 0
+
+    async def analyze(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+class TestHeartscanClientSelection(unittest.TestCase):
+    def test_mode_switch(self) -> None:
+        from cardioai_backend.services.heartscan import (  # type: ignore
+            FallbackHeartscanClient,
+            HeartscanClient,
+            LocalHeartscanClient,
+            create_heartscan_client,
+        )
+
+        self.assertIsInstance(create_heartscan_client("remote"), HeartscanClient)
+        self.assertIsInstance(create_heartscan_client("local"), LocalHeartscanClient)
+        self.assertIsInstance(create_heartscan_client("local_fallback"), FallbackHeartscanClient)
+        with self.assertRaises(ValueError):
+            create_heartscan_client("carrier-pigeon")
+
+    def test_fallback_only_when_local_unusable(self) -> None:
+        from cardioai_backend.services.heartscan import FallbackHeartscanClient  # type: ignore
+
+        remote = _StubClient({"avg_bpm": 70.0, "source": "remote"})
+        client = FallbackHeartscanClient(local=_StubClient({"avg_bpm": 64.0}), remote=remote)  # type: ignore[arg-type]
+        self.assertEqual(asyncio.run(client.analyze({}))["avg_bpm"], 64.0)
+        self.assertEqual(remote.calls, 0)
+
+        for local_result in ({"avg_bpm": 0}, ValueError("no samples")):
+            client = FallbackHeartscanClient(local=_StubClient(local_result), remote=remote)  # type: ignore[arg-type]
+            self.assertEqual(asyncio.run(client.analyze({}))["source"], "remote")
+        self.assertEqual(remote.calls, 2)
+
+    def test_local_errors_are_logged_and_counted(self) -> None:
+        from cardioai_backend.services.heartscan import FallbackHeartscanClient, fallback_stats  # type: ignore
+
+        before = fallback_stats()
+        client = FallbackHeartscanClient(
+            local=_StubClient(ValueError("detector bug")), remote=_StubClient({"avg_bpm": 70.0})  # type: ignore[arg-type]
+        )
+        with self.assertLogs("cardioai_backend.services.heartscan", "WARNING") as logs:
+            asyncio.run(client.analyze({"id": "m7", "az_data_array": [{"az": 1.0}]}))
+        self.assertIn("id=m7", logs.output[0])
+        self.assertIn("ValueError: detector bug", logs.output[0])
+        self.assertEqual(fallback_stats()["local_errors"], before["local_errors"] + 1)
+
+
+class TestProcessingExecutor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        from cardioai_backend.scg.observation import SampleColumns  # type: ignore
+
+        payload = json.loads(PAYLOADS_PATH.read_text(encoding="utf-8"))[0]["request_body"]
+        cls.observation = {"az_data_array": SampleColumns.from_samples(payload["az_data_array"])}
+
+    def _analyze(self, **kwargs: Any) -> Dict[str, Any]:
+        from cardioai_backend.scg.executor import ProcessingExecutor  # type: ignore
+
+        executor = ProcessingExecutor(**kwargs)
+        executor.start()
+        try:
+            result = asyncio.run(executor.analyze(self.observation))
+            stats = executor.stats()
+        finally:
+            executor.shutdown()
+        return {"result": result, "stats": stats}
+
+    def test_pools_match_inline_analysis(self) -> None:
+        from cardioai_backend.scg.peak_detection import analyze_observation  # type: ignore
+
+        expected = analyze_observation(self.observation)
+        # small_job_samples=0 sends the job to the process pool as packed buffers
+        for kwargs in ({"mode": "process", "workers": 1, "small_job_samples": 0}, {"mode": "thread"}):
+            out = self._analyze(**kwargs)
+            self.assertEqual(out["result"], expected)
+            kind = "process" if out["stats"]["mode"] == "process" else "thread"
+            pool = out["stats"][kind]
+            self.assertEqual((pool["submitted"], pool["completed"], pool["in_flight"]), (1, 1, 0))
+            self.assertGreaterEqual(pool["latency_ms"]["p50"], pool["run_ms"]["p50"])
+
+    def test_small_jobs_stay_on_threads(self) -> None:
+        stats = self._analyze(mode="process", workers=1, small_job_samples=10**9)["stats"]
+        self.assertEqual(stats["process"]["submitted"], 0)
+        self.assertEqual(stats["thread"]["completed"], 1)
+
+    def test_broken_process_pool_is_replaced(self) -> None:
+        from cardioai_backend.scg.executor import ProcessingExecutor  # type: ignore
+
+        executor = ProcessingExecutor(mode="process", workers=1, small_job_samples=0)
+        executor.start()
+        try:
+            if executor.mode != "process":
+                self.skipTest("no process pool in this environment")
+            self.assertEqual(asyncio.run(executor.run(_die_in_worker, size=1)), "retried on a thread")
+            result = asyncio.run(executor.analyze(self.observation))
+            stats = executor.stats()
+        finally:
+            executor.shutdown()
+        self.assertGreater(result["avg_bpm"], 0)
+        self.assertEqual((stats["mode"], stats["process_restarts"]), ("process", 1))
+        self.assertEqual((stats["process"]["workers"], stats["process"]["completed"]), (1, 2))
+
+    def test_queue_depth_counts_jobs_waiting_for_a_worker(self) -> None:
+        from cardioai_backend.scg.executor import ProcessingExecutor  # type: ignore
+
+        async def main() -> Dict[str, Any]:
+            jobs = [asyncio.ensure_future(executor.run(time.sleep, 0.2)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            stats = executor.stats()["thread"]
+            await asyncio.gather(*jobs)
+            return stats
+
+        executor = ProcessingExecutor(mode="thread", thread_workers=1)
+        executor.start()
+        try:
+            stats = asyncio.run(main())
+            after = executor.stats()["thread"]
+        finally:
+            executor.shutdown()
+        self.assertEqual((stats["in_flight"], stats["queue_depth"]), (3, 2))
+        self.assertEqual((after["in_flight"], after["queue_depth"]), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
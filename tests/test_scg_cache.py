@@ -0,0 +1,119 @@
+import asyncio
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from typing import Any, Dict
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+RECORDS_PATH = REPO_ROOT / "resp_example" / "heart_rate_first10_responses.json"
+
+
+class _CountingClient:
+    cache_namespace = "stub"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def analyze(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        return {"avg_bpm": 70.0 + self.calls}
+
+
+class TestMetricsCache(unittest.TestCase):
+    def test_lru_byte_budget_and_ttl(self) -> None:
+        from cardioai_backend.scg.cache import MetricsCache  # type: ignore
+
+        value = {"avg_bpm": 70.0, "pad": "x" * 100}
+        size = len(json.dumps(value, separators=(",", ":")))
+        cache = MetricsCache(max_bytes=3 * size, ttl_s=60)
+        for key in "abc":
+            cache.put(key, value)
+        self.assertEqual(cache.get("a"), value)  # "a" is now most recent
+        cache.put("d", value)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 3)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 1, 1))
+        self.assertLessEqual(stats["bytes"], 3 * size)
+
+        cached = cache.get("a")
+        cached["avg_bpm"] = 0  # callers get copies
+        self.assertEqual(cache.get("a"), value)
+
+        with mock.patch("cardioai_backend.scg.cache.time.time", return_value=10**12):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["expired"], 1)
+
+    def test_sqlite_tier_survives_restart(self) -> None:
+        from cardioai_backend.scg.cache import MetricsCache  # type: ignore
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "metrics.sqlite"
+            first = MetricsCache(ttl_s=60, sqlite_path=path)
+            first.put("k", {"avg_bpm": 61.5})
+            first.close()
+            second = MetricsCache(ttl_s=60, sqlite_path=path)
+            self.assertEqual(second.get("k"), {"avg_bpm": 61.5})
+            self.assertEqual(second.get("k"), {"avg_bpm": 61.5})
+            self.assertEqual((second.stats()["disk_hits"], second.stats()["hits"]), (1, 1))
+            second.close()
+
+    def test_cached_preprocess_obs(self) -> None:
+        from cardioai_backend.scg.cache import MetricsCache, cached_preprocess_obs  # type: ignore
+        from cardioai_backend.scg.observation import PeakObservation  # type: ignore
+        from cardioai_backend.scg.processing import normalize_observation, preprocess_obs  # type: ignore
+
+        record = json.loads(RECORDS_PATH.read_text(encoding="utf-8"))[0]
+        obs, fs = normalize_observation(record)
+        cache = MetricsCache()
+        expected = preprocess_obs(obs, fs=fs)
+        self.assertEqual(cached_preprocess_obs(obs, fs=fs, cache=cache), expected)
+        # the compact form of the same peaks hits the same entry
+        self.assertEqual(cached_preprocess_obs(PeakObservation.from_record(record), cache=cache), expected)
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (1, 1))
+        cached_preprocess_obs(obs, fs=fs * 2, cache=cache)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_cached_heartscan_client(self) -> None:
+        from cardioai_backend.scg.cache import MetricsCache  # type: ignore
+        from cardioai_backend.scg.observation import SampleColumns  # type: ignore
+        from cardioai_backend.services.heartscan import CachedHeartscanClient  # type: ignore
+
+        samples = [{"ax": 0.1, "ay": 0.2, "az": 9.8 + i % 7, "timestamp": 10 * i} for i in range(50)]
+        inner = _CountingClient()
+        client = CachedHeartscanClient(inner, MetricsCache())
+        first = asyncio.run(client.analyze({"az_data_array": samples}))
+        again = asyncio.run(client.analyze({"az_data_array": SampleColumns.from_samples(samples)}))
+        self.assertEqual(first, again)
+        self.assertEqual(inner.calls, 1)
+
+        changed = [dict(s) for s in samples]
+        changed[3]["az"] = 1.0
+        asyncio.run(client.analyze({"az_data_array": changed}))
+        self.assertEqual(inner.calls, 2)
+
+    def test_dict_payload_keys_are_computed_off_the_event_loop(self) -> None:
+        from cardioai_backend.scg import cache as cache_mod  # type: ignore
+        from cardioai_backend.scg.observation import SampleColumns  # type: ignore
+        from cardioai_backend.services import heartscan  # type: ignore
+
+        threads = []
+
+        def key(observation: Dict[str, Any], namespace: str) -> str:
+            threads.append(threading.current_thread())
+            return cache_mod.observation_key(observation, namespace)
+
+        samples = [{"ax": 0.0, "ay": 0.0, "az": float(i % 5), "timestamp": 10 * i} for i in range(20)]
+        client = heartscan.CachedHeartscanClient(_CountingClient(), cache_mod.MetricsCache())
+        with mock.patch.object(heartscan, "observation_key", key):
+            asyncio.run(client.analyze({"az_data_array": samples}))
+            asyncio.run(client.analyze({"az_data_array": SampleColumns.from_samples(samples)}))
+        self.assertIsNot(threads[0], threading.main_thread())
+        self.assertIs(threads[1], threading.main_thread())  # columns hash with numpy, cheap enough inline
+
+
+if __name__ == "__main__":
+    unittest.main()
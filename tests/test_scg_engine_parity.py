@@ -0,0 +1,386 @@
+import json
+import math
+import random
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest import mock
+
+from cardioai_backend.scg.observation import PeakObservation, SampleColumns  # type: ignore
+from cardioai_backend.scg.processing import (  # type: ignore
+    RRAccumulator,
+    WindowedRRMetrics,
+    batch_to_records,
+    filter_peaks,
+    normalize_observation,
+    normalize_observations,
+    preprocess_batch,
+    preprocess_long_recording,
+    preprocess_obs,
+    resolve_engine,
+)
+
+try:
+    import numpy  # noqa: F401
+
+    HAVE_NUMPY = True
+except ImportError:  # pragma: no cover
+    HAVE_NUMPY = False
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SAMPLE_PATH = REPO_ROOT / "resp_example" / "heart_rate_first10_responses.json"
+
+
+def _synthetic_peaks(rng: random.Random, n: int, fs: float, bpm: float = 65.0) -> List[Dict[str, Any]]:
+    """Jittered beat train with occasional ectopic beats and double detections."""
+    peaks: List[Dict[str, Any]] = []
+    x = float(rng.randint(0, 50))
+    period = 60.0 / bpm * fs
+    for _ in range(n):
+        x += period * rng.uniform(0.85, 1.15)
+        if rng.random() < 0.05:
+            # premature beat followed by a compensatory pause
+            x -= period * 0.4
+        peaks.append({"x": int(x), "y": 1.0})
+        if rng.random() < 0.04:
+            # spurious double detection inside the relaxation zone
+            peaks.append({"x": int(x) + rng.randint(1, int(period * 0.3)), "y": 1.0})
+    return peaks
+
+
+class _MetricsAssertions(unittest.TestCase):
+    def assertSameMetrics(self, ref: Any, vec: Any, path: str = "") -> None:
+        """Same keys, types and values; floats may differ only by rounding."""
+        if isinstance(ref, float) or isinstance(vec, float):
+            self.assertIsInstance(vec, type(ref), path)
+            self.assertTrue(math.isclose(ref, vec, rel_tol=1e-9, abs_tol=1e-9), f"{path}: {ref} != {vec}")
+        elif isinstance(ref, dict):
+            self.assertIsInstance(vec, dict, path)
+            self.assertEqual(set(ref), set(vec), path)
+            for k in ref:
+                self.assertSameMetrics(ref[k], vec[k], f"{path}.{k}")
+        elif isinstance(ref, list):
+            self.assertIsInstance(vec, list, path)
+            self.assertEqual(len(ref), len(vec), path)
+            for i, (a, b) in enumerate(zip(ref, vec)):
+                self.assertSameMetrics(a, b, f"{path}[{i}]")
+        else:
+            self.assertEqual(type(ref), type(vec), path)
+            self.assertEqual(ref, vec, path)
+
+
+@unittest.skipUnless(HAVE_NUMPY, "numpy is not installed")
+class TestScgEngineParity(_MetricsAssertions):
+    def assertParity(self, obs: Dict[str, Any], fs: float) -> None:
+        ref = preprocess_obs(obs, fs=fs, engine="python")
+        vec = preprocess_obs(obs, fs=fs, engine="numpy")
+        self.assertSameMetrics(ref, vec)
+
+    def test_engine_selection(self) -> None:
+        self.assertEqual(resolve_engine("python"), "python")
+        self.assertEqual(resolve_engine("NumPy"), "numpy")
+        self.assertEqual(resolve_engine(None), "python")  # numpy is opt-in: floats differ in the last bits
+        with self.assertRaises(ValueError):
+            resolve_engine("fortran")
+
+    def test_local_analysis_uses_the_configured_engine(self) -> None:
+        import numpy as np
+
+        from cardioai_backend.scg import peak_detection  # type: ignore
+        from cardioai_backend.settings import HeartscanSettings, Settings  # type: ignore
+
+        az = np.sin(np.arange(3000) * 2 * np.pi * 1.1 / 100.0).astype(np.float32)
+        settings = Settings(heartscan=HeartscanSettings(engine="numpy"))
+        with mock.patch.object(peak_detection, "get_settings", return_value=settings), mock.patch.object(
+            peak_detection, "preprocess_obs", wraps=preprocess_obs
+        ) as spy:
+            peak_detection.analyze_samples(az)
+        self.assertEqual(spy.call_args.kwargs["engine"], "numpy")
+
+    def test_recorded_responses(self) -> None:
+        records = json.loads(SAMPLE_PATH.read_text(encoding="utf-8"))
+        for i, record in enumerate(records):
+            with self.subTest(record=i):
+                obs, fs = normalize_observation(record)
+                self.assertParity(obs, fs)
+                self.assertEqual(
+                    filter_peaks(obs["peaks"], engine="python"), filter_peaks(obs["peaks"], engine="numpy")
+                )
+
+    def test_synthetic_recordings(self) -> None:
+        rng = random.Random(1234)
+        for case in range(40):
+            fs = rng.choice([50.0, 99.0, 100.0, 200.0, 416.0])
+            n = rng.choice([3, 10, 70, 600, 5000])
+            bpm = rng.uniform(40.0, 150.0)
+            peaks = _synthetic_peaks(rng, n, fs, bpm)
+            with self.subTest(case=case, fs=fs, n=n):
+                self.assertParity({"peaks": peaks}, fs)
+
+    def test_filter_peaks_explicit_threshold(self) -> None:
+        rng = random.Random(99)
+        for case in range(30):
+            peaks = _synthetic_peaks(rng, 200, 100.0)
+            n_thr = rng.choice([0.0, 10.0, 10.5, 37.25, 80.0, 1e9, -5.0])
+            with self.subTest(case=case, N=n_thr):
+                self.assertEqual(
+                    filter_peaks(peaks, N=n_thr, engine="python"), filter_peaks(peaks, N=n_thr, engine="numpy")
+                )
+
+    def test_unsorted_and_duplicate_peaks(self) -> None:
+        rng = random.Random(7)
+        for case in range(20):
+            xs = [rng.randint(0, 6000) for _ in range(rng.randint(2, 80))]
+            if case % 2:
+                xs = sorted(xs + xs[:5])
+            peaks = [{"x": x} for x in xs]
+            with self.subTest(case=case):
+                self.assertEqual(filter_peaks(peaks, engine="python"), filter_peaks(peaks, engine="numpy"))
+                self.assertParity({"peaks": peaks}, 100.0)
+
+    def test_degenerate_inputs(self) -> None:
+        cases = [
+            ({"peaks": []}, 100.0),
+            ({"peaks": [{"x": 10}]}, 100.0),
+            ({"peaks": [{"x": 10}, {"x": 10}]}, 100.0),
+            ({"peaks": [{"x": 10}, {"x": 110}]}, 0.0),
+            ({"peaks": [{"x": "bad"}, {"y": 1}, {"x": 5.7}, {"x": 105}, {"x": 207}]}, 100.0),
+            ({"peaks": [{"x": i * 100} for i in range(30)]}, 100.0),
+            ({}, 100.0),
+        ]
+        for i, (obs, fs) in enumerate(cases):
+            with self.subTest(case=i):
+                self.assertParity(obs, fs)
+
+
+@unittest.skipUnless(HAVE_NUMPY, "numpy is not installed")
+class TestScgBatch(_MetricsAssertions):
+    def assertBatchParity(self, observations: List[Dict[str, Any]], fs: List[float]) -> None:
+        flat: List[int] = []
+        offsets = [0]
+        for obs in observations:
+            flat.extend(int(p["x"]) for p in obs["peaks"])
+            offsets.append(len(flat))
+        batch = preprocess_batch(flat, offsets, fs, with_series=True)
+        expected = [preprocess_obs(obs, fs=f, engine="python") for obs, f in zip(observations, fs)]
+        self.assertSameMetrics(expected, batch_to_records(batch))
+
+    def test_recorded_responses(self) -> None:
+        records = json.loads(SAMPLE_PATH.read_text(encoding="utf-8"))
+        obs, fs = normalize_observations(records)
+        self.assertEqual(obs["offsets"].size, len(records) + 1)
+
+        singles = [normalize_observation(r) for r in records]
+        for i, (single, single_fs) in enumerate(singles):
+            lo, hi = obs["offsets"][i], obs["offsets"][i + 1]
+            self.assertEqual(obs["peaks"][lo:hi].tolist(), [p["x"] for p in single["peaks"]])
+            self.assertEqual(fs[i], single_fs)
+            self.assertEqual(obs["bpm"][i], single.get("bpm"))
+            self.assertEqual(obs["confidence"][i], single.get("confidence"))
+
+        batch = preprocess_batch(obs["peaks"], obs["offsets"], fs, with_series=True)
+        expected = [preprocess_obs(o, fs=f, engine="python") for o, f in singles]
+        self.assertSameMetrics(expected, batch_to_records(batch))
+
+    def test_synthetic_ragged_batch(self) -> None:
+        rng = random.Random(2024)
+        observations: List[Dict[str, Any]] = []
+        fs: List[float] = []
+        for _ in range(60):
+            f = rng.choice([0.0, 50.0, 99.0, 100.0, 200.0])
+            n = rng.choice([0, 1, 2, 5, 80, 700])
+            peaks = _synthetic_peaks(rng, n, f or 100.0, rng.uniform(40.0, 150.0))
+            if rng.random() < 0.1:
+                rng.shuffle(peaks)
+            observations.append({"peaks": peaks})
+            fs.append(f)
+        self.assertBatchParity(observations, fs)
+
+    def test_summary_without_series(self) -> None:
+        rng = random.Random(5)
+        observations = [{"peaks": _synthetic_peaks(rng, 120, 100.0)} for _ in range(4)]
+        flat = [p["x"] for obs in observations for p in obs["peaks"]]
+        offsets = [0]
+        for obs in observations:
+            offsets.append(offsets[-1] + len(obs["peaks"]))
+        batch = preprocess_batch(flat, offsets, 100.0)
+        self.assertNotIn("instantaneous_bpm", batch)
+        self.assertEqual(batch["avg_bpm"].shape, (4,))
+        for i, obs in enumerate(observations):
+            ref = preprocess_obs(obs, fs=100.0, engine="python")
+            self.assertAlmostEqual(batch["avg_bpm"][i], ref["avg_bpm"], places=9)
+            self.assertEqual(int(batch["episodes_count"][i]), ref["episodes_count"])
+
+    def test_invalid_offsets(self) -> None:
+        with self.assertRaises(ValueError):
+            preprocess_batch([1, 2, 3], [0, 2], 100.0)
+        with self.assertRaises(ValueError):
+            preprocess_batch([1, 2, 3], [0, 2, 1, 3], 100.0)
+
+
+class TestRRAccumulator(_MetricsAssertions):
+    def _feed(self, acc: RRAccumulator, peaks: List[Any], rng: random.Random) -> None:
+        i = 0
+        while i < len(peaks):
+            step = rng.randint(1, 25)
+            acc.add_peaks(peaks[i : i + step])
+            i += step
+
+    def test_finalize_matches_batch(self) -> None:
+        rng = random.Random(11)
+        records = json.loads(SAMPLE_PATH.read_text(encoding="utf-8"))
+        inputs = [normalize_observation(r) for r in records]
+        inputs += [({"peaks": _synthetic_peaks(rng, 300, 100.0, rng.uniform(45, 140))}, 100.0) for _ in range(10)]
+        engines = ["python"] + (["numpy"] if HAVE_NUMPY else [])
+        for i, (obs, fs) in enumerate(inputs):
+            for engine in engines:
+                with self.subTest(case=i, engine=engine):
+                    acc = RRAccumulator(fs=fs, engine=engine)
+                    self._feed(acc, obs["peaks"], rng)
+                    self.assertSameMetrics(preprocess_obs(obs, fs=fs, engine="python"), acc.finalize())
+
+    def test_accepts_plain_ints(self) -> None:
+        xs = [18, 107, 209, 300, "bad", 398, 501]
+        acc = RRAccumulator(fs=99.0, engine="python")
+        acc.add_peaks(xs)
+        expected = preprocess_obs({"peaks": [{"x": x} for x in xs]}, fs=99.0, engine="python")
+        self.assertSameMetrics(expected, acc.finalize())
+
+    def test_live_summary_tracks_clean_recording(self) -> None:
+        rng = random.Random(3)
+        peaks = [100 * i + rng.randint(-8, 8) for i in range(1, 80)]
+        acc = RRAccumulator(fs=100.0, engine="python")
+        self.assertEqual(acc.snapshot()["avg_bpm"], 0)
+        self._feed(acc, peaks, rng)
+        live = acc.snapshot()
+        final = acc.finalize()
+        self.assertEqual(acc.beats, len(final["instantaneous_bpm"]))
+        self.assertAlmostEqual(live["avg_bpm"], final["avg_bpm"], places=9)
+        self.assertAlmostEqual(live["min_bpm"], final["min_bpm"], places=9)
+        self.assertAlmostEqual(live["max_bpm"], final["max_bpm"], places=9)
+        self.assertEqual(live["instantaneous_bpm"], [])
+
+    def test_live_episodes_for_irregular_rhythm(self) -> None:
+        peaks: List[int] = []
+        x = 0
+        for i in range(120):
+            x += 55 if i % 10 == 5 else 100
+            peaks.append(x)
+        acc = RRAccumulator(fs=100.0, engine="python")
+        acc.add_peaks(peaks)
+        live = acc.snapshot()
+        self.assertGreaterEqual(live["episodes_count"], 4)
+        self.assertEqual(len(live["episodes_timestamps"]), live["episodes_count"])
+
+
+class TestCompactObservation(_MetricsAssertions):
+    def test_record_roundtrip_matches_normalize_observation(self) -> None:
+        records = json.loads(SAMPLE_PATH.read_text(encoding="utf-8"))
+        for i, record in enumerate(records):
+            with self.subTest(record=i):
+                legacy, fs = normalize_observation(record)
+                compact = PeakObservation.from_record(record)
+                self.assertEqual(compact.fs, fs)
+                self.assertEqual(compact.to_dict(), legacy)
+                self.assertEqual(PeakObservation.from_dict(legacy, fs).peaks_list(), compact.peaks_list())
+
+    def test_processing_accepts_compact_observation(self) -> None:
+        records = json.loads(SAMPLE_PATH.read_text(encoding="utf-8"))
+        engines = ["python"] + (["numpy"] if HAVE_NUMPY else [])
+        for i, record in enumerate(records):
+            legacy, fs = normalize_observation(record)
+            compact = PeakObservation.from_record(record)
+            expected = preprocess_obs(legacy, fs=fs, engine="python")
+            for engine in engines:
+                with self.subTest(record=i, engine=engine):
+                    self.assertSameMetrics(expected, preprocess_obs(compact, engine=engine))
+                    self.assertEqual(filter_peaks(legacy["peaks"], engine="python"), filter_peaks(compact, engine=engine))
+
+    def test_malformed_peaks_are_skipped(self) -> None:
+        obs = PeakObservation([18, "107", None, 209.9, "x"], fs=99)
+        self.assertEqual(obs.peaks_list(), [18, 107, 209])
+        self.assertEqual(len(PeakObservation.from_record({"response": {"base_peaks": "nope"}})), 0)
+        self.assertEqual(preprocess_obs(PeakObservation([10, 110, 210], fs=0.0))["avg_bpm"], 0)
+
+    def test_sample_columns_roundtrip(self) -> None:
+        samples = [{"ax": 0.5, "ay": -0.25, "az": 9.75, "timestamp": 1743256991352 + 10 * i} for i in range(50)]
+        cols = SampleColumns.from_samples(samples)
+        self.assertEqual(len(cols), 50)
+        self.assertEqual(cols.to_samples(), samples)
+        self.assertIsNone(SampleColumns.from_samples([{"ax": 0, "ay": 0, "az": 1}]).timestamp)
+        with self.assertRaises(ValueError):
+            SampleColumns([1.0], [1.0], [1.0, 2.0])
+
+
+@unittest.skipUnless(HAVE_NUMPY, "numpy is not installed")
+class TestWindowedRRMetrics(_MetricsAssertions):
+    SUMMARY_KEYS = ("avg_bpm", "min_bpm", "max_bpm", "episodes_count", "episodes_per_hour", "episodes_timestamps")
+
+    def test_single_window_matches_preprocess_obs(self) -> None:
+        rng = random.Random(21)
+        records = json.loads(SAMPLE_PATH.read_text(encoding="utf-8"))
+        inputs = [normalize_observation(r) for r in records]
+        inputs += [({"peaks": _synthetic_peaks(rng, 900, 100.0, rng.uniform(45, 140))}, 100.0) for _ in range(5)]
+        for i, (obs, fs) in enumerate(inputs):
+            with self.subTest(case=i):
+                acc = WindowedRRMetrics(fs=fs, window_s=24 * 3600)
+                xs = [p["x"] for p in obs["peaks"]]
+                for j in range(0, len(xs), 17):
+                    self.assertEqual(acc.add_peaks(xs[j : j + 17]), [])
+                summary = acc.finalize()
+                expected = preprocess_obs(obs, fs=fs, engine="python")
+                self.assertSameMetrics({k: expected[k] for k in self.SUMMARY_KEYS}, {k: summary[k] for k in self.SUMMARY_KEYS})
+                self.assertEqual(summary["beats"], len(expected["instantaneous_bpm"]))
+                self.assertEqual(summary["windows_count"], 1)
+
+    def test_chunking_does_not_change_result(self) -> None:
+        rng = random.Random(8)
+        xs = [p["x"] for p in _synthetic_peaks(rng, 6000, 100.0, 70.0)]
+        results = []
+        for chunk in (1, 250, 100000):
+            results.append(preprocess_long_recording(iter([xs[i : i + chunk] for i in range(0, len(xs), chunk)]), fs=100.0, window_s=60.0))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+        self.assertGreater(len(results[0]["windows"]), 50)
+        self.assertEqual(sum(w["beats"] for w in results[0]["windows"]), results[0]["summary"]["beats"])
+
+    def test_episode_across_window_boundary_is_merged(self) -> None:
+        # regular 60 BPM with a 6-beat fast run straddling the 60 s boundary, repeated for enough episodes
+        xs: List[int] = []
+        x = 0
+        fast_at = {5700, 11700, 17700, 23700, 29700}
+        while x < 36000:
+            xs.append(x)
+            x += 50 if any(s <= x < s + 300 for s in fast_at) else 100
+        result = preprocess_long_recording(xs, fs=100.0, window_s=60.0)
+        summary = result["summary"]
+        per_window = sum(w["episodes_count"] for w in result["windows"])
+        self.assertEqual(summary["episodes_count"], 5)
+        self.assertGreater(per_window, summary["episodes_count"])
+        for start, end in summary["episodes_timestamps"]:
+            self.assertLess(start, end)
+
+    def test_reads_text_and_npy_files(self) -> None:
+        import numpy as np
+
+        rng = random.Random(4)
+        xs = [p["x"] for p in _synthetic_peaks(rng, 3000, 100.0, 80.0)]
+        expected = preprocess_long_recording(xs, fs=100.0, window_s=120.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            txt = Path(tmp) / "peaks.txt"
+            txt.write_text(",\n".join(str(x) for x in xs), encoding="utf-8")
+            npy = Path(tmp) / "peaks.npy"
+            np.save(npy, np.asarray(xs, dtype=np.int32))
+            self.assertEqual(preprocess_long_recording(txt, fs=100.0, window_s=120.0, chunk_size=100), expected)
+            self.assertEqual(preprocess_long_recording(npy, fs=100.0, window_s=120.0, chunk_size=100), expected)
+
+    def test_empty_recording(self) -> None:
+        summary = preprocess_long_recording([], fs=100.0)["summary"]
+        self.assertEqual(summary["avg_bpm"], 0)
+        self.assertEqual(summary["windows_count"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+import json
+import random
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List
+
+from cardioai_backend.scg.ingest import (  # type: ignore
+    IngestError,
+    IngestLimitError,
+    ObservationStreamParser,
+)
+from cardioai_backend.scg.observation import SampleColumns  # type: ignore
+from tests.stubs import chat_upstreams
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+PAYLOADS_PATH = REPO_ROOT / "tests" / "data" / "cardiolog_payloads.json"
+DATA_FULL_PATH = REPO_ROOT / "tests" / "data_full.json"
+
+
+def _parse_in_chunks(body: bytes, rng: random.Random, **limits: Any) -> Dict[str, Any]:
+    parser = ObservationStreamParser(**limits)
+    i = 0
+    while i < len(body):
+        step = rng.choice([1, 7, 64, 1000, 65536])
+        parser.feed(body[i : i + step])
+        i += step
+    return parser.close()
+
+
+class TestObservationStreamParser(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.payloads: List[Dict[str, Any]] = json.loads(PAYLOADS_PATH.read_text(encoding="utf-8"))
+
+    def assertColumnsEqual(self, cols: SampleColumns, samples: List[Dict[str, Any]]) -> None:
+        self.assertIsInstance(cols, SampleColumns)
+        self.assertEqual(cols.to_samples(), SampleColumns.from_samples(samples).to_samples())
+
+    def test_bare_observation_any_chunking(self) -> None:
+        rng = random.Random(0)
+        for i, p in enumerate(self.payloads[:4]):
+            body = p["request_body"]
+            raw = json.dumps(body, indent=i % 2 or None).encode("utf-8")
+            with self.subTest(payload=i):
+                doc = _parse_in_chunks(raw, rng)
+                self.assertEqual(doc["device"], body["device"])
+                self.assertColumnsEqual(doc["az_data_array"], body["az_data_array"])
+
+    def test_chat_request_body(self) -> None:
+        rng = random.Random(1)
+        body = {
+            "message": "Что это значит? ❤",
+            "history": [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}],
+            "observation": dict(self.payloads[0]["request_body"], sampling_rate=100),
+        }
+        doc = _parse_in_chunks(json.dumps(body, ensure_ascii=False).encode("utf-8"), rng)
+        self.assertEqual(doc["message"], body["message"])
+        self.assertEqual(doc["history"], body["history"])
+        self.assertEqual(doc["observation"]["sampling_rate"], 100)
+        self.assertColumnsEqual(doc["observation"]["az_data_array"], body["observation"]["az_data_array"])
+
+        samples = body["observation"]["az_data_array"]
+        doc = _parse_in_chunks(json.dumps({"observation": {"sensor_data": samples}}).encode("utf-8"), rng)
+        self.assertColumnsEqual(doc["observation"]["sensor_data"], samples)
+
+    def test_numbers_split_across_chunks(self) -> None:
+        parser = ObservationStreamParser()
+        for piece in (b'{"az_data_array": [{"ax": 1, "ay": 2, "az": 9.8', b"125, \"timestamp\": 17432", b"56991352}], \"n\": 12", b"34}"):
+            parser.feed(piece)
+        doc = parser.close()
+        self.assertEqual(doc["n"], 1234)
+        self.assertEqual(int(doc["az_data_array"].timestamp[0]), 1743256991352)
+        self.assertAlmostEqual(float(doc["az_data_array"].az[0]), 9.8125)
+
+    def test_missing_timestamps(self) -> None:
+        doc = _parse_in_chunks(b'{"az_data_array": [{"ax": 0, "ay": 0, "az": 1}]}', random.Random(2))
+        self.assertIsNone(doc["az_data_array"].timestamp)
+        self.assertEqual(len(doc["az_data_array"]), 1)
+
+    def test_limits(self) -> None:
+        raw = json.dumps(self.payloads[0]["request_body"]).encode("utf-8")
+        with self.assertRaises(IngestLimitError):
+            _parse_in_chunks(raw, random.Random(3), max_samples=100)
+        with self.assertRaises(IngestLimitError):
+            _parse_in_chunks(raw, random.Random(3), max_body_bytes=10_000)
+
+    def test_malformed_bodies(self) -> None:
+        for raw in (b"[1, 2]", b'{"az_data_array": [1, 2]}', b'{"a": 1', b'{"a": 1} x', b'{"az_data_array": [{"az": 1},]}'):
+            with self.subTest(raw=raw):
+                with self.assertRaises(IngestError):
+                    _parse_in_chunks(raw, random.Random(4))
+
+
+class TestChatUploadEndpoint(unittest.TestCase):
+    def test_upload_runs_chat_pipeline_with_columns(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+
+        payload = json.loads(PAYLOADS_PATH.read_text(encoding="utf-8"))[0]["request_body"]
+        with chat_upstreams(quality_gate=True) as (analyzer, llm):
+            client = TestClient(create_app())
+            res = client.post("/api/chat/upload", content=json.dumps({"observation": payload}))
+            self.assertEqual(res.status_code, 200, res.text)
+            self.assertEqual(res.json()["response"], "All good.")
+            samples = analyzer.observations[0]["az_data_array"]
+            self.assertIsInstance(samples, SampleColumns)
+            self.assertEqual(len(samples), len(payload["az_data_array"]))
+            self.assertIn("71 BPM", llm.prompts[0][1]["content"])
+
+            self.assertEqual(client.post("/api/chat/upload", content=b'{"observation": {').status_code, 422)
+
+
+class TestWireFormat(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        payloads = json.loads(PAYLOADS_PATH.read_text(encoding="utf-8"))
+        cls.samples: List[Dict[str, Any]] = json.loads(DATA_FULL_PATH.read_text(encoding="utf-8"))
+        cls.payload: Dict[str, Any] = payloads[0]["request_body"]
+
+    def test_round_trip(self) -> None:
+        import numpy as np
+
+        from cardioai_backend.scg.wire import decode_observation, encode_observation  # type: ignore
+
+        expected = SampleColumns.from_samples(self.samples)
+        for compression in ("none", "gzip"):
+            with self.subTest(compression=compression):
+                encoded = encode_observation(self.samples, key="sensor_data", compression=compression)
+                self.assertLess(len(encoded["data"]), len(json.dumps(self.samples)) / 3)
+                decoded = decode_observation(dict(encoded, device="iPhone13,2"))
+                self.assertEqual(decoded["device"], "iPhone13,2")
+                cols = decoded["sensor_data"]
+                self.assertEqual(cols.to_samples(), expected.to_samples())
+                self.assertFalse(cols.az.flags.owndata)  # a view of the decoded buffer
+
+        header, data = encode_observation(expected, accel_scale=0.001, binary=True)
+        cols = decode_observation(header, data)["az_data_array"]
+        self.assertLess(float(np.abs(cols.az - expected.az).max()), 0.0006)
+        np.testing.assert_array_equal(cols.timestamp, expected.timestamp)
+
+        gappy = SampleColumns([0.0] * 3, [0.0] * 3, [1.0, 2.0, 3.0], [0, 10, 100000])
+        self.assertEqual(decode_observation(encode_observation(gappy))["az_data_array"].timestamp.tolist(), [0, 10, 100000])
+
+    def test_rejects_bad_or_oversized_payloads(self) -> None:
+        import base64
+        import gzip
+
+        from cardioai_backend.scg.wire import decode_observation, encode_observation  # type: ignore
+
+        good = encode_observation(self.samples)
+        bomb = dict(good, data=base64.b64encode(gzip.compress(b"\0" * (10 * len(self.samples) * 14))).decode())
+        with self.assertRaises(IngestLimitError):
+            decode_observation(good, max_samples=10)
+        for bad in (
+            bomb,  # inflation stops at the declared size
+            dict(good, data="not base64!"),
+            dict(good, samples=len(self.samples) + 1),
+            dict(good, compression="lz4"),
+            dict(good, columns=[{"name": "az", "dtype": "float16"}]),
+            dict(good, data=base64.b64encode(b"garbage").decode()),
+        ):
+            with self.assertRaises(IngestError):
+                decode_observation(bad)
+
+    def test_chat_endpoints_accept_compact_observations(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+        from cardioai_backend.scg.wire import encode_observation  # type: ignore
+
+        samples = self.payload["az_data_array"]
+        header, data = encode_observation(samples, binary=True)
+        with chat_upstreams(quality_gate=True) as (analyzer, _):
+            client = TestClient(create_app())
+            res = client.post("/api/chat", json={"message": "hi", "observation": encode_observation(samples)})
+            self.assertEqual(res.status_code, 200, res.text)
+            res = client.post(
+                "/api/chat/upload",
+                data={"request": json.dumps({"observation": header})},
+                files={"observation": ("observation.bin", data, "application/octet-stream")},
+            )
+            self.assertEqual(res.status_code, 200, res.text)
+            for observation in analyzer.observations:
+                self.assertEqual(observation["az_data_array"].to_samples(), SampleColumns.from_samples(samples).to_samples())
+
+            bad = dict(encode_observation(samples), samples=1)
+            self.assertEqual(client.post("/api/chat", json={"observation": bad}).status_code, 422)
+
+
+    def test_frontend_sensor_data_runs_quality_gate_and_local_analysis(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+        from cardioai_backend.scg.wire import encode_observation  # type: ignore
+        from cardioai_backend.services.heartscan import LocalHeartscanClient  # type: ignore
+
+        # What cardioai_frontend sends: encodeObservation(rawData, "sensor_data").
+        observation = encode_observation(self.payload["az_data_array"], key="sensor_data")
+        analyzer = LocalHeartscanClient()
+        with chat_upstreams(analyzer, quality_gate=True) as (_, llm):  # type: ignore[arg-type]
+            client = TestClient(create_app())
+            res = client.post("/api/chat", json={"message": "hi", "observation": observation})
+            self.assertEqual(res.status_code, 200, res.text)
+            self.assertEqual(len(llm.prompts), 1)
+            self.assertIn("[Metric: Signal Quality]", llm.prompts[0][1]["content"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+PAYLOADS_PATH = REPO_ROOT / "tests" / "data" / "cardiolog_payloads.json"
+
+
+class TestSignalQuality(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        from cardioai_backend.scg.observation import SampleColumns  # type: ignore
+
+        cls.payloads: List[Dict[str, Any]] = json.loads(PAYLOADS_PATH.read_text(encoding="utf-8"))
+        cls.columns = [SampleColumns.from_samples(p["request_body"]["az_data_array"]) for p in cls.payloads]
+
+    def _quality(self, az: Any, timestamps: Any) -> Dict[str, Any]:
+        from cardioai_backend.scg.observation import SampleColumns  # type: ignore
+        from cardioai_backend.scg.quality import assess_quality  # type: ignore
+
+        zeros = [0.0] * len(az)
+        return assess_quality(SampleColumns(zeros, zeros, az, timestamps))
+
+    def test_recorded_payloads_pass(self) -> None:
+        from cardioai_backend.scg.quality import assess_quality  # type: ignore
+
+        for i, samples in enumerate(self.columns):
+            with self.subTest(payload=i):
+                quality = assess_quality(samples)
+                self.assertTrue(quality["usable"], quality)
+                self.assertGreater(quality["score"], 0.0)
+
+    def test_hopeless_recordings_are_rejected(self) -> None:
+        import numpy as np
+
+        good = self.columns[7]
+        z = good.az.astype(np.float64)
+        ts = good.timestamp
+        rng = np.random.default_rng(0)
+        cases = {
+            "flatline": (np.full(z.size, 9.81), ts),
+            "motion": (z + np.cumsum(rng.normal(0, 0.2, z.size)), ts),
+            "saturation": (np.clip(z, None, np.percentile(z, 60)), ts),
+            "gap": (z, np.r_[np.arange(z.size // 2), np.arange(z.size // 2) + z.size] * 10),
+            "duration": (z[:300], ts[:300]),
+        }
+        for reason, (az, timestamps) in cases.items():
+            with self.subTest(reason=reason):
+                quality = self._quality(az, timestamps)
+                self.assertFalse(quality["usable"])
+                self.assertIn(reason, quality["reasons"])
+                self.assertEqual(quality["score"], 0.0)
+
+    def test_chat_skips_upstreams_for_unusable_recording(self) -> None:
+        from cardioai_backend.api import chat as chat_api  # type: ignore
+        from cardioai_backend.schemas import ChatRequest  # type: ignore
+
+        calls: List[str] = []
+
+        class _Upstream:
+            async def analyze(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+                calls.append("heartscan")
+                return {"avg_bpm": 70.0}
+
+            async def chat(self, messages: List[Dict[str, str]]) -> str:
+                calls.append("llm")
+                return messages[1]["content"]
+
+        flat = [{"ax": 0.0, "ay": 0.0, "az": 9.81, "timestamp": 10 * i} for i in range(2000)]
+        good = self.payloads[7]["request_body"]
+        with mock.patch.object(chat_api, "create_heartscan_client", return_value=_Upstream()), mock.patch.object(
+            chat_api, "Dr7LlmClient", return_value=_Upstream()
+        ):
+            rejected = asyncio.run(chat_api.chat(ChatRequest(observation={"az_data_array": flat})))
+            self.assertEqual(rejected["response"], chat_api.MEASUREMENT_ERROR_MESSAGE)
+            self.assertEqual(calls, [])
+
+            accepted = asyncio.run(chat_api.chat(ChatRequest(observation=good)))
+            self.assertEqual(calls, ["heartscan", "llm"])
+            self.assertIn("[Metric: Signal Quality]", accepted["response"])
+
+
+if __name__ == "__main__":
+    unittest.main()
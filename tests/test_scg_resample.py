@@ -0,0 +1,96 @@
+import json
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+PAYLOADS_PATH = REPO_ROOT / "tests" / "data" / "cardiolog_payloads.json"
+DATA_FULL_PATH = REPO_ROOT / "tests" / "data_full.json"
+
+
+def _jittered_timestamps(n: int, fs: float, jitter_ms: float, seed: int = 0) -> np.ndarray:
+    """Monotonic ms timestamps around a true rate `fs`, with two dropouts."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) * 1000.0 / fs + rng.uniform(-jitter_ms, jitter_ms, n)
+    t[n // 3 :] += 200.0  # ~12 samples lost at 60 Hz
+    t[2 * n // 3 :] += 500.0
+    return np.rint(np.maximum.accumulate(t)).astype(np.int64)
+
+
+class TestResample(unittest.TestCase):
+    def test_rate_estimate_ignores_jitter_and_dropouts(self) -> None:
+        from cardioai_backend.scg.resample import estimate_rate  # type: ignore
+
+        rate = estimate_rate(_jittered_timestamps(6000, 58.8, 4.0))
+        self.assertAlmostEqual(rate["fs"], 58.8, delta=0.1)
+        self.assertEqual(rate["dropouts"], 2)
+        self.assertGreater(rate["missing_ratio"], 0.0)
+
+        samples = json.loads(DATA_FULL_PATH.read_text(encoding="utf-8"))
+        rate = estimate_rate([s["timestamp"] for s in samples])
+        self.assertLess(abs(rate["fs"] - 60.0), 3.0)  # an iPhone nominally reporting 99 Hz
+
+    def test_resampled_signal_and_streaming_chunks(self) -> None:
+        from cardioai_backend.scg.observation import SampleColumns  # type: ignore
+        from cardioai_backend.scg.resample import StreamingResampler, resample_columns  # type: ignore
+
+        ts = _jittered_timestamps(3000, 60.0, 3.0)
+        signal = np.sin(2 * np.pi * 1.2 * ts / 1000.0)
+        zeros = np.zeros(ts.size)
+        samples = SampleColumns(zeros, zeros, signal, ts)
+        out, report = resample_columns(samples, fs=100.0)
+        self.assertTrue(bool((np.diff(out.timestamp) >= 9).all()) and bool((np.diff(out.timestamp) <= 11).all()))
+        grid = ts[0] + np.arange(len(out)) * 10.0
+        right = np.clip(np.searchsorted(ts, grid), 1, ts.size - 1)
+        covered = (ts[right] - ts[right - 1]) <= 40  # skip points interpolated across the dropouts
+        error = np.abs(out.az - np.sin(2 * np.pi * 1.2 * grid / 1000.0))[covered]
+        self.assertLess(float(error.max()), 0.05)
+        self.assertEqual(report["dropouts"], 2)
+        self.assertGreater(report["interpolated_ratio"], 0.0)
+
+        resampler = StreamingResampler(100.0)
+        parts = []
+        for lo in range(0, ts.size, 777):
+            hi = lo + 777
+            parts.append(resampler.add_columns(SampleColumns(zeros[lo:hi], zeros[lo:hi], signal[lo:hi], ts[lo:hi])))
+        np.testing.assert_array_equal(np.concatenate([p.az for p in parts]), out.az)
+        np.testing.assert_array_equal(np.concatenate([p.timestamp for p in parts]), out.timestamp)
+
+    def test_downstream_uses_corrected_fs(self) -> None:
+        from cardioai_backend.scg.observation import PeakObservation  # type: ignore
+        from cardioai_backend.scg.processing import normalize_observation, preprocess_obs  # type: ignore
+
+        # one beat per second on a ~58.8 Hz clock that claims 99 Hz
+        ts = _jittered_timestamps(3600, 58.8, 4.0, seed=1)
+        beats = np.searchsorted(ts, np.arange(ts[0] + 500, ts[-1], 1000))
+        record = {"sampling_rate": 99, "response": {"base_peaks": beats.tolist()}}
+
+        obs, fs = normalize_observation(record)
+        self.assertGreater(preprocess_obs(obs, fs=fs)["avg_bpm"], 95.0)  # nominal rate: wrong
+
+        record["timestamps"] = ts.tolist()
+        obs, fs = normalize_observation(record)
+        self.assertAlmostEqual(fs, 58.8, delta=0.1)
+        self.assertAlmostEqual(preprocess_obs(obs, fs=fs)["avg_bpm"], 60.0, delta=0.5)
+        compact = PeakObservation.from_record(record)
+        self.assertEqual(compact.fs, fs)
+        self.assertEqual(compact.peaks_list(), [p["x"] for p in obs["peaks"]])
+
+    def test_jittered_upload_analyzes_like_the_clean_one(self) -> None:
+        from cardioai_backend.scg.peak_detection import analyze_samples  # type: ignore
+
+        payload = json.loads(PAYLOADS_PATH.read_text(encoding="utf-8"))[7]["request_body"]["az_data_array"]
+        az = np.array([s["az"] for s in payload])
+        clean = analyze_samples(az, [s["timestamp"] for s in payload])
+        # same recording delivered by a 10 ms +/- 4 ms clock, then resampled back
+        rng = np.random.default_rng(2)
+        true_t = np.arange(az.size) * 10.0
+        jitter_t = np.rint(true_t + rng.uniform(-4, 4, az.size)).astype(np.int64)
+        jittered = analyze_samples(np.interp(jitter_t, true_t, az), jitter_t)
+        self.assertAlmostEqual(jittered["sampling_rate"], 100.0, delta=0.5)
+        self.assertAlmostEqual(jittered["avg_bpm"], clean["avg_bpm"], delta=2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
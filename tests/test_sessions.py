@@ -0,0 +1,192 @@
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest import mock
+
+from tests.stubs import StubChat, chat_upstreams
+
+OBSERVATION = {"az_data_array": [{"az": 0.1, "timestamp": 0}]}
+
+
+def _turn(i: int) -> List[Dict[str, str]]:
+    return [{"role": "user", "content": f"q{i}"}, {"role": "assistant", "content": f"a{i}"}]
+
+
+class TestSessionStore(unittest.TestCase):
+    def test_history_is_bounded_and_sessions_expire(self) -> None:
+        from cardioai_backend.services.sessions import SessionNotFound, SessionStore  # type: ignore
+
+        store = SessionStore(max_sessions=2, ttl_s=60, max_messages=4)
+        session = store.create()
+        for i in range(3):
+            store.append(session.id, _turn(i), measurement="summary" if i == 0 else None)
+        stored = store.get(session.id)
+        self.assertEqual([m["content"] for m in stored.history], ["q1", "a1", "q2", "a2"])
+        self.assertEqual((stored.measurement, stored.seq), ("summary", 6))
+        stored.history.clear()  # callers get copies
+        self.assertEqual(len(store.get(session.id).history), 4)
+
+        with mock.patch("cardioai_backend.services.sessions.time.time", return_value=10**12):
+            with self.assertRaises(SessionNotFound):
+                store.get(session.id)
+        self.assertEqual(store.stats()["expired"], 1)
+
+        ids = [store.create().id for _ in range(3)]
+        with self.assertRaises(SessionNotFound):
+            store.get(ids[0])  # least recently used, dropped from memory
+        self.assertEqual((len(store), store.stats()["evictions"]), (2, 1))
+
+    def test_sqlite_tier_survives_restart_and_eviction(self) -> None:
+        from cardioai_backend.services.sessions import SessionNotFound, SessionStore  # type: ignore
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "sessions.sqlite"
+            first = SessionStore(max_sessions=1, ttl_s=60, max_messages=4, sqlite_path=path)
+            session = first.create()
+            for i in range(3):
+                first.append(session.id, _turn(i), measurement=f"summary {i}")
+            first.create()  # evicts `session` from memory
+            self.assertEqual(len(first.get(session.id).history), 4)
+            self.assertEqual(first.stats()["disk_loads"], 1)
+            first.close()
+
+            second = SessionStore(ttl_s=60, max_messages=4, sqlite_path=path)
+            restored = second.get(session.id)
+            self.assertEqual([m["content"] for m in restored.history], ["q1", "a1", "q2", "a2"])
+            self.assertEqual(restored.measurement, "summary 2")
+            second.append(session.id, _turn(3))
+            rows = second._db.execute("SELECT seq FROM session_messages WHERE session_id = ?", (session.id,)).fetchall()
+            self.assertEqual(sorted(r[0] for r in rows), [4, 5, 6, 7])  # appended, oldest trimmed
+
+            self.assertTrue(second.delete(session.id))
+            with self.assertRaises(SessionNotFound):
+                second.get(session.id)
+            second.close()
+
+    def test_sqlite_turns_commit_atomically_and_renewals_persist(self) -> None:
+        from cardioai_backend.services.sessions import SessionStore  # type: ignore
+
+        class _FailingUpdate:
+            """Connection proxy whose session row update fails, after the message rows were written."""
+
+            def __init__(self, db: sqlite3.Connection) -> None:
+                self.db = db
+
+            def execute(self, sql: str, *args: Any) -> Any:
+                if sql.startswith("UPDATE sessions SET measurement"):
+                    raise sqlite3.OperationalError("disk I/O error")
+                return self.db.execute(sql, *args)
+
+            def executemany(self, sql: str, *args: Any) -> Any:
+                return self.db.executemany(sql, *args)
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch("cardioai_backend.services.sessions.time.time") as now:
+            path = Path(tmp) / "sessions.sqlite"
+            now.return_value = 1000.0
+            first = SessionStore(ttl_s=60, max_messages=4, sqlite_path=path)
+            session = first.create()
+            first.append(session.id, _turn(0))
+            db = first._db
+            first._db = _FailingUpdate(db)
+            with self.assertRaises(sqlite3.OperationalError):
+                first.append(session.id, _turn(1))
+            first._db = db
+            rows = db.execute("SELECT seq FROM session_messages WHERE session_id = ?", (session.id,)).fetchall()
+            self.assertEqual(sorted(r[0] for r in rows), [0, 1])  # the half-written turn was rolled back
+
+            now.return_value = 1050.0
+            first.get(session.id)  # renewed until 1110
+            first.close()
+            now.return_value = 1100.0
+            second = SessionStore(ttl_s=60, max_messages=4, sqlite_path=path)
+            self.assertEqual([m["content"] for m in second.get(session.id).history], ["q0", "a0"])
+            second.close()
+
+
+class TestChatSessions(unittest.TestCase):
+    def setUp(self) -> None:
+        from cardioai_backend.services.sessions import SessionStore, get_session_store, set_session_store  # type: ignore
+
+        self.addCleanup(set_session_store, get_session_store())
+        set_session_store(SessionStore(ttl_s=60))
+
+    def test_turns_send_only_the_new_message(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+
+        llm = StubChat(lambda messages: f"answer {len(llm.prompts)}")
+        prompts = llm.prompts
+        with chat_upstreams(llm=llm):
+            client = TestClient(create_app())
+            res = client.post("/api/sessions")
+            self.assertEqual(res.status_code, 201)
+            session_id = res.json()["session_id"]
+
+            first = client.post("/api/chat", json={"session_id": session_id, "observation": OBSERVATION}).json()
+            self.assertEqual(first, {"response": "answer 1", "session_id": session_id})
+            second = client.post("/api/chat", json={"session_id": session_id, "message": "Is that normal?"}).json()
+            self.assertEqual(second, {"response": "answer 2", "session_id": session_id})
+
+            # The Results Summary was analyzed once and is part of every later prompt.
+            self.assertEqual([m["role"] for m in prompts[1]], ["system", "system", "user", "assistant", "user"])
+            self.assertIn("71 BPM", prompts[1][1]["content"])
+            self.assertEqual(prompts[1][-1]["content"], "Is that normal?")
+
+            stored = client.get(f"/api/sessions/{session_id}").json()
+            self.assertEqual(
+                [m["content"] for m in stored["history"]],
+                ["Analyze my heart rhythm measurement.", "answer 1", "Is that normal?", "answer 2"],
+            )
+            self.assertIn("71 BPM", stored["measurement"])
+
+            history = [{"role": "user", "content": "hi"}]
+            self.assertEqual(
+                client.post("/api/chat", json={"session_id": session_id, "message": "x", "history": history}).status_code,
+                422,
+            )
+            self.assertEqual(client.delete(f"/api/sessions/{session_id}").status_code, 204)
+            self.assertEqual(client.post("/api/chat", json={"session_id": session_id, "message": "x"}).status_code, 404)
+
+            stateless = client.post("/api/chat", json={"message": "hi"}).json()
+            self.assertEqual(set(stateless), {"response", "history"})
+
+    def test_sqlite_calls_run_off_the_event_loop(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from cardioai_backend.app import create_app  # type: ignore
+        from cardioai_backend.services.sessions import SessionStore, set_session_store  # type: ignore
+
+        on_loop: List[bool] = []
+
+        def record(method: Any) -> Any:
+            def call(*args: Any, **kwargs: Any) -> Any:
+                try:
+                    asyncio.get_running_loop()
+                    on_loop.append(True)
+                except RuntimeError:
+                    on_loop.append(False)
+                return method(*args, **kwargs)
+
+            return call
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SessionStore(ttl_s=60, sqlite_path=Path(tmp) / "sessions.sqlite")
+            self.addCleanup(store.close)
+            set_session_store(store)
+            for name in ("create", "get", "append", "delete"):
+                setattr(store, name, record(getattr(store, name)))
+            with chat_upstreams(llm=StubChat(lambda messages: "answer")):
+                client = TestClient(create_app())
+                session_id = client.post("/api/sessions").json()["session_id"]
+                self.assertEqual(client.post("/api/chat", json={"session_id": session_id, "message": "hi"}).status_code, 200)
+                self.assertEqual(client.get(f"/api/sessions/{session_id}").status_code, 200)
+                self.assertEqual(client.delete(f"/api/sessions/{session_id}").status_code, 204)
+        self.assertEqual(on_loop, [False] * 5)  # create, get + append (chat), get, delete
+
+
+if __name__ == "__main__":
+    unittest.main()
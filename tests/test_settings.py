@@ -0,0 +1,200 @@
+import dataclasses
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, List
+from unittest import mock
+
+CONFIG = """[DEFAULT]
+SYSTEM_PROMPT = You are a test cardiologist.
+
+[HEARTSCAN]
+MODE = local
+URL = http://127.0.0.1:9/analyze
+TIMEOUT_S = 12
+
+[DR7]
+MODEL = test-model
+TEMPERATURE = 0.2
+MAX_TOKENS = 256
+"""
+
+
+class TestSettings(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = Path(self._dir.name) / "config.ini"
+        self.path.write_text(CONFIG, encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def _rewrite(self, text: str) -> None:
+        self.path.write_text(text, encoding="utf-8")
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_typed_immutable_snapshot(self) -> None:
+        from cardioai_backend.settings import load_settings  # type: ignore
+
+        s = load_settings(self.path).validate()
+        self.assertEqual((s.heartscan.mode, s.heartscan.timeout_s), ("local", 12.0))
+        self.assertEqual((s.dr7.model, s.dr7.temperature, s.dr7.max_tokens, s.dr7.timeout_s), ("test-model", 0.2, 256, 60.0))
+        self.assertEqual(s.get("MODEL", section="DR7"), "test-model")
+        self.assertEqual(s.get("SYSTEM_PROMPT", section="DR7"), "You are a test cardiologist.")
+        self.assertEqual(s.get("MISSING", section="DR7", fallback="x"), "x")
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            s.dr7.model = "other"  # type: ignore[misc]
+        with self.assertRaises(TypeError):
+            s.sections["DR7"]["model"] = "other"  # type: ignore[index]
+
+    def test_invalid_values_fail_validation(self) -> None:
+        from cardioai_backend.settings import SettingsError, load_settings  # type: ignore
+
+        bad = CONFIG.replace("MODE = local", "MODE = cloud").replace("TEMPERATURE = 0.2", "TEMPERATURE = hot")
+        self._rewrite(bad.replace("TIMEOUT_S = 12", "TIMEOUT_S = 0"))
+        s = load_settings(self.path)
+        self.assertEqual(len(s.errors), 3)
+        self.assertEqual((s.heartscan.mode, s.heartscan.timeout_s, s.dr7.temperature), ("remote", 30.0, 0.7))
+        with self.assertRaises(SettingsError):
+            s.validate()
+
+    def test_breaker_settings_with_upstream_overrides(self) -> None:
+        from cardioai_backend.settings import SettingsError, load_settings  # type: ignore
+
+        shared = "\n[BREAKER]\nWINDOW = 30\nOPEN_S = 10\n"
+        self._rewrite(CONFIG.replace("MAX_TOKENS = 256", "MAX_TOKENS = 256\nBREAKER_OPEN_S = 5") + shared)
+        s = load_settings(self.path).validate()
+        self.assertEqual((s.breaker("heartscan").window, s.breaker("heartscan").open_s), (30, 10.0))
+        self.assertEqual((s.breaker("dr7").window, s.breaker("dr7").open_s), (30, 5.0))
+
+        self._rewrite(CONFIG + shared.replace("WINDOW = 30", "WINDOW = 32x") + "ENABLED = ture\n")
+        s = load_settings(self.path)
+        self.assertEqual(len(s.errors), 2)  # reported once, not per upstream
+        self.assertEqual((s.breaker("dr7").window, s.breaker("dr7").enabled), (20, True))
+        with self.assertRaises(SettingsError):
+            s.validate()
+
+    def test_admission_and_http_pool_settings(self) -> None:
+        from cardioai_backend.settings import load_settings  # type: ignore
+
+        extra = "\n[ADMISSION]\nMAX_CONCURRENT = 8\nMAX_QUEUE = lots\n\n[HTTP]\nMAX_CONNECTIONS = 40\nHTTP2 = on\n"
+        overrides = "TIMEOUT_S = 12\nADMISSION_MAX_CONCURRENT = 2\nMAX_CONNECTIONS = 4"
+        self._rewrite(CONFIG.replace("TIMEOUT_S = 12", overrides) + extra)
+        s = load_settings(self.path)
+        self.assertEqual(s.errors, ("[ADMISSION] MAX_QUEUE = 'lots' is not a number",))
+        self.assertEqual((s.admission("heartscan").max_concurrent, s.admission("dr7").max_concurrent), (2, 8))
+        self.assertEqual((s.http_pool("heartscan").max_connections, s.http_pool("dr7").max_connections), (4, 40))
+        self.assertTrue(s.http_pool("dr7").http2)
+
+    def test_executor_settings(self) -> None:
+        from cardioai_backend.scg.executor import create_processing_executor  # type: ignore
+        from cardioai_backend.settings import load_settings  # type: ignore
+
+        self._rewrite(CONFIG + "\n[EXECUTOR]\nMODE = Thread\nTHREAD_WORKERS = 2\n")
+        executor = create_processing_executor(load_settings(self.path).validate().executor)
+        self.assertEqual((executor.mode, executor.thread_workers, executor.small_job_samples), ("thread", 2, 30000))
+
+        self._rewrite(CONFIG + "\n[EXECUTOR]\nMODE = proces\nWORKERS = -1\n")
+        s = load_settings(self.path)
+        self.assertEqual(len(s.errors), 2)
+        self.assertEqual((s.executor.mode, s.executor.workers), ("process", 0))
+
+    def test_service_sections(self) -> None:
+        from cardioai_backend.llm.context import create_context_budget  # type: ignore
+        from cardioai_backend.services.llm_cache import create_llm_cache  # type: ignore
+        from cardioai_backend.services.sessions import create_session_store  # type: ignore
+        from cardioai_backend.settings import load_settings  # type: ignore
+
+        extra = (
+            "\n[LLM_CACHE]\nCLASSES = follow_up, initial_analysis\nSQLITE_PATH = \n"
+            "\n[SESSIONS]\nENABLED = no\n\n[CONTEXT]\nSUMMARIZER = local\nMAX_PROMPT_TOKENS = 900\n"
+        )
+        self._rewrite(CONFIG + extra)
+        s = load_settings(self.path).validate()
+        self.assertEqual(create_llm_cache(s.llm_cache).classes, {"follow_up", "initial_analysis"})
+        self.assertIsNone(s.llm_cache.sqlite_path)
+        self.assertIsNone(create_session_store(s.sessions))
+        budget = create_context_budget(s.context)
+        self.assertEqual((budget.max_prompt_tokens, budget.summarizer), (900, None))
+
+        bad = extra.replace("follow_up,", "followup,").replace("= local", "= gpt") + "\n[JOBS]\nWORKERS = 8x\n"
+        self._rewrite(CONFIG + bad)
+        s = load_settings(self.path)
+        self.assertEqual(len(s.errors), 3)
+        self.assertEqual((s.llm_cache.classes, s.context.summarizer, s.jobs.workers), ({"initial_analysis"}, "llm", 8))
+
+    def test_configured_objects_follow_the_snapshot(self) -> None:
+        from cardioai_backend import settings as settings_mod  # type: ignore
+
+        first, second = settings_mod.Settings(), settings_mod.Settings(single_flight=False)
+        retuned: List[Any] = []
+        objects = settings_mod.Configured(
+            lambda settings, key: {"key": key, "on": settings.single_flight},
+            lambda obj, settings, key: retuned.append((key, settings.single_flight)),
+        )
+        with mock.patch.object(settings_mod, "get_settings", return_value=first):
+            a = objects.get("a")
+            self.assertIs(objects.get("a"), a)
+            objects.set("fixed", "b")
+        with mock.patch.object(settings_mod, "get_settings", return_value=second):
+            self.assertIs(objects.get("a"), a)
+            self.assertEqual(objects.get("b"), "fixed")  # installed objects are not re-tuned
+            objects.get("a")
+            objects.reset("a")
+            self.assertEqual(objects.get("a"), {"key": "a", "on": False})
+        self.assertEqual(retuned, [("a", False)])
+        self.assertEqual(sorted(key for key, _ in objects.items()), ["a", "b"])
+
+    def test_store_reloads_on_mtime_change_only(self) -> None:
+        from cardioai_backend import settings as settings_mod  # type: ignore
+
+        store = settings_mod.SettingsStore(self.path, check_interval_s=0)
+        with mock.patch.object(settings_mod, "load_settings", wraps=settings_mod.load_settings) as load:
+            first = store.get()
+            for _ in range(50):
+                self.assertIs(store.get(), first)
+            self.assertEqual(load.call_count, 1)
+
+            self._rewrite(CONFIG.replace("MAX_TOKENS = 256", "MAX_TOKENS = 512"))
+            self.assertEqual(store.get().dr7.max_tokens, 512)
+            self.assertEqual(first.dr7.max_tokens, 256)  # old snapshots stay as they were
+            self.assertEqual(load.call_count, 2)
+
+        # An edit that fails validation keeps the last good snapshot.
+        good = store.get()
+        self._rewrite(CONFIG.replace("MAX_TOKENS = 256", "MAX_TOKENS = many"))
+        self.assertIs(store.get(), good)
+        self.assertIn("MAX_TOKENS", store.stats()["last_error"])
+        self.assertEqual(store.stats()["reloads"], 2)
+
+    def test_check_interval_skips_stat(self) -> None:
+        from cardioai_backend.settings import SettingsStore  # type: ignore
+
+        store = SettingsStore(self.path, check_interval_s=3600)
+        first = store.get()
+        self._rewrite(CONFIG.replace("MAX_TOKENS = 256", "MAX_TOKENS = 512"))
+        with mock.patch("cardioai_backend.settings.os.stat") as stat:
+            self.assertIs(store.get(), first)
+            stat.assert_not_called()
+        self.assertEqual(store.reload().dr7.max_tokens, 512)
+
+    def test_services_use_the_snapshot(self) -> None:
+        from cardioai_backend import settings as settings_mod  # type: ignore
+        from cardioai_backend.services.dr7_llm import Dr7LlmClient  # type: ignore
+        from cardioai_backend.services.heartscan import LocalHeartscanClient, create_heartscan_client  # type: ignore
+        from cardioai_backend.utils import get_config  # type: ignore
+
+        original = settings_mod.get_settings_store()
+        settings_mod.set_settings_store(settings_mod.SettingsStore(self.path))
+        try:
+            self.assertEqual(Dr7LlmClient().max_tokens, 256)
+            self.assertIsInstance(create_heartscan_client(), LocalHeartscanClient)
+            self.assertEqual(get_config("TIMEOUT_S", section="HEARTSCAN"), "12")
+        finally:
+            settings_mod.set_settings_store(original)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import asyncio
+import unittest
+from typing import Any, Dict, List
+
+import httpx
+
+from tests.stubs import StubAnalyzer, StubChat, chat_upstreams
+
+OBSERVATION = {"az_data_array": [{"az": 0.1, "timestamp": 0}]}
+
+
+def _flight(**kwargs: Any) -> Any:
+    from cardioai_backend.services.single_flight import SingleFlight  # type: ignore
+
+    return SingleFlight("test", **kwargs)
+
+
+class _Upstream:
+    """Slow upstream counting started and cancelled calls."""
+
+    def __init__(self, delay_s: float = 0.1, fail: bool = False) -> None:
+        self.delay_s = delay_s
+        self.fail = fail
+        self.started = 0
+        self.cancelled = 0
+
+    async def __call__(self) -> Dict[str, Any]:
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delay_s)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise httpx.ConnectError("down")
+        return {"avg_bpm": 72.0}
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_duplicates_share_one_call(self) -> None:
+        flight, upstream = _flight(), _Upstream()
+
+        async def main() -> List[Any]:
+            same = [flight.do("obs", upstream) for _ in range(5)]
+            return await asyncio.gather(*same, flight.do("other", upstream))
+
+        results = asyncio.run(main())
+        self.assertEqual(upstream.started, 2)
+        self.assertTrue(all(r == {"avg_bpm": 72.0} for r in results))
+        stats = flight.stats()
+        self.assertEqual((stats["calls"], stats["coalesced"], stats["in_flight"]), (2, 4, 0))
+
+        asyncio.run(main())  # landed flights are not reused
+        self.assertEqual(upstream.started, 4)
+
+    def test_cancelled_waiter_does_not_cancel_the_others(self) -> None:
+        flight, upstream = _flight(), _Upstream()
+
+        async def main() -> Any:
+            first = asyncio.ensure_future(flight.do("obs", upstream))
+            second = asyncio.ensure_future(flight.do("obs", upstream))
+            await asyncio.sleep(0.02)
+            first.cancel()  # the client that started the call disconnects
+            result = await second
+            with self.assertRaises(asyncio.CancelledError):
+                await first
+            return result
+
+        self.assertEqual(asyncio.run(main()), {"avg_bpm": 72.0})
+        self.assertEqual((upstream.started, upstream.cancelled), (1, 0))
+        self.assertEqual(flight.stats()["cancelled_waiters"], 1)
+
+    def test_call_is_cancelled_when_every_waiter_left(self) -> None:
+        flight, upstream = _flight(), _Upstream(delay_s=5.0)
+
+        async def main() -> None:
+            waiters = [asyncio.ensure_future(flight.do("obs", upstream)) for _ in range(2)]
+            await asyncio.sleep(0.02)
+            for w in waiters:
+                w.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+            await asyncio.sleep(0)
+
+        asyncio.run(main())
+        self.assertEqual(upstream.cancelled, 1)
+        stats = flight.stats()
+        self.assertEqual((stats["abandoned"], stats["cancelled_waiters"], stats["in_flight"]), (1, 2, 0))
+
+    def test_failure_reaches_every_waiter(self) -> None:
+        flight, upstream = _flight(), _Upstream(fail=True)
+
+        async def main() -> List[Any]:
+            return await asyncio.gather(*(flight.do("obs", upstream) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(r, httpx.ConnectError) for r in results))
+        self.assertEqual((upstream.started, flight.stats()["failed"]), (1, 1))
+
+
+class TestDuplicateChatRequests(unittest.TestCase):
+    def setUp(self) -> None:
+        from cardioai_backend.scg.cache import get_metrics_cache, set_metrics_cache  # type: ignore
+        from cardioai_backend.services import single_flight  # type: ignore
+
+        # Caches off, so the duplicates can only be absorbed by coalescing.
+        self.addCleanup(set_metrics_cache, get_metrics_cache())
+        set_metrics_cache(None)
+        for name in ("heartscan", "dr7"):
+            single_flight.set_flight(name, single_flight.SingleFlight(name))
+            self.addCleanup(single_flight.set_flight, name, None)
+
+    def test_retried_requests_share_heartscan_and_llm_calls(self) -> None:
+        from cardioai_backend.app import create_app  # type: ignore
+
+        async def main() -> List[httpx.Response]:
+            transport = httpx.ASGITransport(app=create_app())
+            async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+                send = [client.post("/api/chat", json={"observation": OBSERVATION}) for _ in range(4)]
+                responses = await asyncio.gather(*send)
+                responses.append(await client.get("/api/status/single_flight"))
+                return responses
+
+        analyzer, llm = StubAnalyzer(delay_s=0.2), StubChat(delay_s=0.2, cache_namespace="stub")
+        with chat_upstreams(analyzer, llm, heartscan_client=True):
+            *replies, status = asyncio.run(main())
+
+        self.assertEqual([r.json()["response"] for r in replies], ["All good."] * 4)
+        self.assertEqual((len(analyzer.observations), len(llm.prompts)), (1, 1))
+        stats = status.json()
+        self.assertEqual((stats["heartscan"]["coalesced"], stats["dr7"]["coalesced"]), (3, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Tail latency of remote Heartscan calls with and without hedging
+(`cardioai_backend/services/hedging.py`), against a local stub whose
+latency distribution is injectable:
+
+  - cold_start: lognormal ~80 ms, plus a 1.5 s cold start on `--cold-rate` of requests
+  - lognormal:  heavy-tailed lognormal around 80 ms (sigma 0.9)
+  - bimodal:    80 ms or 800 ms, 10% of requests slow
+
+Both runs use the pooled upstream client (as under the app lifespan).
+
+Usage:
+  - Run: python tools/bench_heartscan_hedging.py [--dist cold_start] [--requests 400] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+from cardioai_backend.services.hedging import HedgePolicy  # noqa: E402
+from cardioai_backend.services.heartscan import HeartscanClient  # noqa: E402
+from cardioai_backend.services.http_clients import HttpClientRegistry, UpstreamSettings, set_http_clients  # noqa: E402
+
+
+def distributions(cold_rate: float) -> Dict[str, Callable[[random.Random], float]]:
+    return {
+        "cold_start": lambda r: r.lognormvariate(-2.5, 0.3) + (1.5 if r.random() < cold_rate else 0.0),
+        "lognormal": lambda r: r.lognormvariate(-2.5, 0.9),
+        "bimodal": lambda r: 0.8 if r.random() < 0.1 else 0.08,
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        server: Any = self.server
+        with server.lock:
+            delay = server.latency(server.rng)
+        time.sleep(delay)
+        data = json.dumps({"avg_bpm": 72.0}).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except OSError:
+            pass  # cancelled hedge loser
+
+
+def start_stub(latency: Callable[[random.Random], float], seed: int) -> ThreadingHTTPServer:
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    server: Any = httpd
+    server.lock = threading.Lock()
+    server.rng = random.Random(seed)
+    server.latency = latency
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+async def run(url: str, policy: HedgePolicy, requests: int, concurrency: int) -> List[float]:
+    registry = HttpClientRegistry([UpstreamSettings("heartscan", timeout_s=30, max_connections=4 * concurrency)])
+    registry.start()
+    set_http_clients(registry)
+    client = HeartscanClient(base_url=url, api_key="bench", timeout_s=30, hedge_policy=policy)
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one() -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            await client.analyze({"az_data_array": []})
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    try:
+        await asyncio.gather(*(one() for _ in range(requests)))
+    finally:
+        set_http_clients(None)
+        await registry.aclose()
+    return sorted(latencies)
+
+
+def pct(xs: List[float], q: float) -> float:
+    return xs[min(len(xs) - 1, int(round((len(xs) - 1) * q)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dist", choices=["cold_start", "lognormal", "bimodal"], default="cold_start")
+    parser.add_argument("--cold-rate", type=float, default=0.05)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--budget", type=float, default=0.1)
+    args = parser.parse_args()
+
+    latency = distributions(args.cold_rate)[args.dist]
+    print(f"{args.dist}: {args.requests} requests, concurrency {args.concurrency}, hedge budget {args.budget}")
+    print(f"{'mode':<10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'extra load':>11} {'hedge wins':>11}")
+    for hedge in (False, True):
+        policy = HedgePolicy(enabled=hedge, budget=args.budget, initial_delay_s=0.5, min_delay_s=0.05, name="bench")
+        stub = start_stub(latency, seed=1)
+        try:
+            xs = asyncio.run(run(f"http://127.0.0.1:{stub.server_address[1]}/analyze", policy, args.requests, args.concurrency))
+        finally:
+            stub.shutdown()
+            stub.server_close()
+        stats = policy.stats()
+        print(
+            f"{'hedged' if hedge else 'single':<10} {statistics.median(xs):>8.1f} {pct(xs, 0.95):>8.1f} "
+            f"{pct(xs, 0.99):>8.1f} {xs[-1]:>8.1f} {stats['extra_load']:>11.3f} {stats['hedge_wins']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Throughput and latency of background analysis jobs (POST /api/analyze +
+long-polled GET /api/jobs/{id}) against synchronous POST /api/chat, with
+local stub upstreams (no network, no API keys):
+
+  - Heartscan stub: lognormal around `--heartscan-ms`
+  - Dr7 stub:       lognormal around `--llm-ms`
+
+Each client submits an observation and waits for the reply; the app runs
+in-process (httpx ASGITransport). Reported: requests/s, end-to-end p50/p95,
+and for jobs the time the submit request stayed open and the queue wait.
+
+Usage:
+  - Run: python tools/bench_jobs.py [--requests 200] [--clients 32] [--workers 8]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+import httpx  # noqa: E402
+
+from cardioai_backend.app import create_app  # noqa: E402
+from cardioai_backend.metrics import histogram  # noqa: E402
+from cardioai_backend.services.jobs import JobRunner, set_job_runner  # noqa: E402
+from cardioai_backend.services.llm_cache import set_llm_cache  # noqa: E402
+
+
+class _StubHeartscan:
+    def __init__(self, median_ms: float, rng: random.Random) -> None:
+        self.median_s, self.rng = median_ms / 1000.0, rng
+
+    async def analyze(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(self.rng.lognormvariate(0, 0.4) * self.median_s)
+        return {"avg_bpm": 72.0, "min_bpm": 58.0, "max_bpm": 95.0, "episodes_count": 0}
+
+
+class _StubLlm:
+    def __init__(self, median_ms: float, rng: random.Random) -> None:
+        self.median_s, self.rng = median_ms / 1000.0, rng
+
+    async def chat(self, messages: List[Dict[str, str]]) -> str:
+        await asyncio.sleep(self.rng.lognormvariate(0, 0.4) * self.median_s)
+        return "Your heart rhythm looks regular."
+
+
+def _observation(i: int) -> Dict[str, Any]:
+    return {"az_data_array": [{"az": 0.001 * i, "timestamp": 0}]}
+
+
+async def run(mode: str, requests: int, clients: int) -> Tuple[List[float], List[float], float]:
+    """(end-to-end ms, submit ms, wall s) per request."""
+    transport = httpx.ASGITransport(app=create_app())
+    sem = asyncio.Semaphore(clients)
+    e2e: List[float] = []
+    submit: List[float] = []
+
+    async def one(client: httpx.AsyncClient, i: int) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            if mode == "chat":
+                res = await client.post("/api/chat", json={"observation": _observation(i)})
+                res.raise_for_status()
+            else:
+                res = await client.post("/api/analyze", json={"observation": _observation(i)})
+                res.raise_for_status()
+                submit.append((time.perf_counter() - t0) * 1000.0)
+                job = res.json()
+                while job["status"] not in ("done", "failed"):
+                    job = (await client.get(f"/api/jobs/{job['job_id']}", params={"wait": 10})).json()
+            e2e.append((time.perf_counter() - t0) * 1000.0)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(requests)))
+        wall = time.perf_counter() - t0
+    return sorted(e2e), sorted(submit), wall
+
+
+def pct(xs: List[float], q: float) -> float:
+    return xs[min(len(xs) - 1, int(round((len(xs) - 1) * q)))] if xs else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--heartscan-ms", type=float, default=200.0)
+    parser.add_argument("--llm-ms", type=float, default=400.0)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    set_llm_cache(None)  # every request goes to the stub LLM
+    print(
+        f"{args.requests} requests, {args.clients} clients, {args.workers} job workers, "
+        f"stubs: Heartscan ~{args.heartscan_ms:.0f} ms, Dr7 ~{args.llm_ms:.0f} ms"
+    )
+    print(f"{'mode':<6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'submit p95':>11} {'queue p95':>10}")
+    with mock.patch("cardioai_backend.api.chat.create_heartscan_client", return_value=_StubHeartscan(args.heartscan_ms, rng)), mock.patch(
+        "cardioai_backend.api.chat.Dr7LlmClient", return_value=_StubLlm(args.llm_ms, rng)
+    ), mock.patch("cardioai_backend.api.chat.assess_observation_quality", return_value=None):
+        for mode in ("chat", "jobs"):
+            runner = JobRunner(workers=args.workers, max_pending=max(args.requests, 1))
+            set_job_runner(runner)
+            e2e, submit, wall = asyncio.run(run(mode, args.requests, args.clients))
+            queue = histogram("jobs.queue_ms").snapshot() if mode == "jobs" else {}
+            print(
+                f"{mode:<6} {len(e2e) / wall:>7.1f} {statistics.median(e2e):>8.1f} {pct(e2e, 0.95):>8.1f} "
+                f"{pct(submit, 0.95):>11.1f} {queue.get('p95', 0.0):>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Accuracy and speed of the in-process SCG peak detector against the recorded
+Heartscan payloads (`expected_bpm` comes from the remote analysis API).
+
+Usage:
+  - Run: python tools/bench_peak_detection.py [--repeat 20]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+from cardioai_backend.scg.peak_detection import analyze_observation  # noqa: E402
+
+PAYLOADS = REPO_ROOT / "tests" / "data" / "cardiolog_payloads.json"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = json.loads(PAYLOADS.read_text(encoding="utf-8"))
+    errors = []
+    timings_ms = []
+    print(f"{'expected':>9} {'local':>7} {'error':>7} {'ms':>7}  source")
+    for p in payloads:
+        body = p["request_body"]
+        expected = float(p["metadata"]["expected_bpm"])
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            metrics = analyze_observation(body)
+        ms = (time.perf_counter() - t0) * 1000.0 / args.repeat
+        err = abs(float(metrics["avg_bpm"]) - expected)
+        errors.append(err)
+        timings_ms.append(ms)
+        print(f"{expected:9.1f} {metrics['avg_bpm']:7.1f} {err:7.1f} {ms:7.2f}  {p['metadata']['source_file']}")
+
+    print()
+    print(f"median abs error: {statistics.median(errors):.2f} BPM")
+    print(f"within 5 BPM:     {sum(e <= 5.0 for e in errors)}/{len(errors)}")
+    print(f"median latency:   {statistics.median(timings_ms):.2f} ms per recording")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Latency of the local signal-quality gate (`scg/quality.py`) and what it saves
+on recordings it rejects: the Heartscan round-trip (and the LLM call) that
+`/api/chat` used to pay before answering "measure again".
+
+Cases are the recorded payloads plus degraded copies of one of them (flat,
+moved, clipped, gappy, too short) and long synthetic recordings.
+
+Usage:
+  - Run:                      python tools/bench_quality_gate.py [--repeat 50]
+  - Include remote Heartscan: HEARTSCAN_API_KEY=... python tools/bench_quality_gate.py --remote
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+from cardioai_backend.scg.observation import SampleColumns  # noqa: E402
+from cardioai_backend.scg.peak_detection import analyze_observation  # noqa: E402
+from cardioai_backend.scg.quality import assess_quality  # noqa: E402
+
+PAYLOADS = REPO_ROOT / "tests" / "data" / "cardiolog_payloads.json"
+
+
+def _columns(az: np.ndarray, ts: np.ndarray) -> SampleColumns:
+    zeros = np.zeros(az.size, dtype=np.float32)
+    return SampleColumns(zeros, zeros, az, ts)
+
+
+def build_cases() -> List[Tuple[str, SampleColumns]]:
+    payloads = json.loads(PAYLOADS.read_text(encoding="utf-8"))
+    cases = [
+        (f"recorded_{i}", SampleColumns.from_samples(p["request_body"]["az_data_array"]))
+        for i, p in enumerate(payloads)
+    ]
+    good = cases[7][1]
+    z, ts = good.az.astype(np.float64), good.timestamp
+    rng = np.random.default_rng(0)
+    cases += [
+        ("flat", _columns(np.full(z.size, 9.81), ts)),
+        ("moved", _columns(z + np.cumsum(rng.normal(0, 0.2, z.size)), ts)),
+        ("clipped", _columns(np.clip(z, None, np.percentile(z, 60)), ts)),
+        ("gappy", _columns(z, np.r_[np.arange(z.size // 2), np.arange(z.size // 2) + z.size] * 10)),
+        ("short", _columns(z[:300], ts[:300])),
+    ]
+    for label, reps in (("synthetic_60s", 3), ("synthetic_1h", 180)):
+        cases.append((label, _columns(np.tile(z, reps), np.arange(z.size * reps, dtype=np.int64) * 10)))
+    return cases
+
+
+def time_ms(fn: Callable[[], Any], repeat: int) -> float:
+    fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000.0
+
+
+def remote_ms(samples: SampleColumns) -> float:
+    from cardioai_backend.services.heartscan import HeartscanClient
+
+    client = HeartscanClient()
+    t0 = time.perf_counter()
+    try:
+        asyncio.run(client.analyze({"az_data_array": samples}))
+    except Exception:
+        pass  # a rejected/failed upstream call still costs the round-trip
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--remote", action="store_true", help="also time the remote Heartscan call per rejected case")
+    args = parser.parse_args()
+
+    print(f"{'case':<16} {'samples':>8} {'usable':>6} {'score':>6} {'gate ms':>8} {'local ms':>9} {'remote ms':>10}  reasons")
+    saved: Dict[str, List[float]] = {"local": [], "remote": []}
+    for name, samples in build_cases():
+        quality = assess_quality(samples)
+        repeat = max(1, args.repeat // max(1, len(samples) // 6000))
+        gate = time_ms(lambda: assess_quality(samples), repeat)
+        local = time_ms(lambda: analyze_observation({"az_data_array": samples}), repeat)
+        remote = remote_ms(samples) if args.remote and not quality["usable"] else float("nan")
+        if not quality["usable"]:
+            saved["local"].append(local - gate)
+            if args.remote:
+                saved["remote"].append(remote - gate)
+        print(
+            f"{name:<16} {len(samples):>8} {str(quality['usable']):>6} {quality['score']:>6.2f} {gate:>8.2f} "
+            f"{local:>9.2f} {remote:>10.1f}  {','.join(quality['reasons'])}"
+        )
+
+    print()
+    if saved["local"]:
+        print(f"rejected recordings:            {len(saved['local'])}")
+        print(f"saved vs local analysis:        {statistics.median(saved['local']):.2f} ms median")
+    if saved["remote"]:
+        print(f"saved vs remote Heartscan call: {statistics.median(saved['remote']):.1f} ms median (plus the LLM call)")
+    elif not args.remote:
+        print("remote Heartscan + LLM round-trips are saved too; pass --remote to measure the Heartscan part")
+
+
+if __name__ == "__main__":
+    main()
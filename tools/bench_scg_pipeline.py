@@ -0,0 +1,239 @@
+"""
+Benchmark suite for the SCG processing pipeline with regression gates.
+
+Runs normalize_observation / filter_peaks / preprocess_obs (both engines) on
+recorded responses and on synthetic recordings from 1 minute to 24 hours,
+and reports throughput (beats/s), latency percentiles and peak memory
+(tracemalloc). Results can be stored as a JSON baseline and later compared
+against it; the run fails when a case regresses beyond the threshold.
+
+The gate compares the best-of-runs latency (the most stable estimator on a
+shared box) normalized by a fixed pure-Python calibration loop, so a baseline
+recorded on one Linux box stays meaningful on a faster or slower one. Every
+case runs at least MIN_REPEAT times, however long it takes. The 24h inputs
+are reported and memory-gated but not latency-gated: they are bound by memory
+bandwidth, which the calibration loop does not track, and their best-of-runs
+still varies by 2x between runs on a shared box.
+
+Usage:
+  - Run:            python tools/bench_scg_pipeline.py
+  - Save baseline:  python tools/bench_scg_pipeline.py --save-baseline
+  - Gate (CI):      python tools/bench_scg_pipeline.py --check [--threshold 0.25]
+  - Quick smoke:    python tools/bench_scg_pipeline.py --quick
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+from cardioai_backend.scg.processing import ENGINES, filter_peaks, normalize_observation, preprocess_obs  # noqa: E402
+from cardioai_backend.scg.processing import np as _np  # noqa: E402
+
+RECORDS_PATH = REPO_ROOT / "resp_example" / "heart_rate_first10_responses.json"
+BASELINE_PATH = REPO_ROOT / "tools" / "baselines" / "scg_pipeline.json"
+
+DURATIONS_S = {"1min": 60, "10min": 600, "1h": 3600, "24h": 86400}
+QUICK_DURATIONS = ("1min", "10min")
+FS = 100.0
+MIN_REPEAT = 15
+
+
+def synthetic_record(duration_s: int, seed: int, fs: float = FS, bpm: float = 68.0) -> Dict[str, Any]:
+    """A `heart_rate_first10_responses.json`-style record with jittered beats and some double detections."""
+    rng = random.Random(seed)
+    period = 60.0 / bpm * fs
+    peaks: List[int] = []
+    x = rng.uniform(0, period)
+    end = duration_s * fs
+    while x < end:
+        peaks.append(int(x))
+        if rng.random() < 0.03:
+            peaks.append(int(x) + rng.randint(1, int(period * 0.3)))
+        x += period * rng.uniform(0.85, 1.15)
+    return {"sampling_rate": fs, "response": {"bpm": bpm, "confidence": 0.9, "base_peaks": peaks}}
+
+
+def calibrate(rounds: int = 7) -> float:
+    """Seconds for a fixed pure-Python workload (best of a few rounds)."""
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        acc = 0.0
+        for i in range(200_000):
+            acc += math.sqrt(i) * 0.5
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def measure(
+    fn: Callable[[], Any], min_time_s: float, max_repeat: int, min_repeat: int = MIN_REPEAT
+) -> Tuple[List[float], int]:
+    fn()  # warm-up
+    samples: List[float] = []
+    started = time.perf_counter()
+    while len(samples) < max_repeat and (len(samples) < min_repeat or time.perf_counter() - started < min_time_s):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return samples, peak
+
+
+def percentile(sorted_xs: List[float], q: float) -> float:
+    if not sorted_xs:
+        return 0.0
+    k = (len(sorted_xs) - 1) * q
+    lo, hi = math.floor(k), math.ceil(k)
+    return sorted_xs[lo] + (sorted_xs[hi] - sorted_xs[lo]) * (k - lo)
+
+
+def build_cases(quick: bool) -> List[Tuple[str, int, Callable[[], Any]]]:
+    """(name, beats, callable) for every benchmarked call."""
+    inputs: List[Tuple[str, Dict[str, Any]]] = []
+    records = json.loads(RECORDS_PATH.read_text(encoding="utf-8"))
+    inputs.append(("recorded0", records[0]))
+    for i, (label, seconds) in enumerate(DURATIONS_S.items()):
+        if quick and label not in QUICK_DURATIONS:
+            continue
+        inputs.append((f"synthetic_{label}", synthetic_record(seconds, seed=i)))
+
+    engines = [e for e in ENGINES if e != "numpy" or _np is not None]
+    cases: List[Tuple[str, int, Callable[[], Any]]] = []
+    for label, record in inputs:
+        obs, fs = normalize_observation(record)
+        beats = len(obs["peaks"])
+        cases.append((f"normalize_observation/{label}", beats, lambda r=record: normalize_observation(r)))
+        for engine in engines:
+            cases.append(
+                (f"filter_peaks[{engine}]/{label}", beats, lambda o=obs, e=engine: filter_peaks(o["peaks"], engine=e))
+            )
+            cases.append(
+                (
+                    f"preprocess_obs[{engine}]/{label}",
+                    beats,
+                    lambda o=obs, f=fs, e=engine: preprocess_obs(o, fs=f, engine=e),
+                )
+            )
+    return cases
+
+
+def run(quick: bool = False, min_time_s: float = 0.5, max_repeat: int = 200) -> Dict[str, Any]:
+    calibration_s = calibrate()
+    results: Dict[str, Any] = {}
+    for name, beats, fn in build_cases(quick):
+        # Calibrate next to each case too, so load drift on a shared box cancels out.
+        local_cal_s = calibrate(rounds=3)
+        samples, peak = measure(fn, min_time_s=min_time_s, max_repeat=max_repeat)
+        local_cal_s = min(local_cal_s, calibrate(rounds=3))
+        xs = sorted(samples)
+        p50 = percentile(xs, 0.50)
+        results[name] = {
+            "beats": beats,
+            "runs": len(xs),
+            "p50_ms": p50 * 1000.0,
+            "p95_ms": percentile(xs, 0.95) * 1000.0,
+            "p99_ms": percentile(xs, 0.99) * 1000.0,
+            "beats_per_s": beats / p50 if p50 > 0 else 0.0,
+            "min_ms": xs[0] * 1000.0,
+            "peak_mem_kb": peak / 1024.0,
+            # best-of-runs latency in units of the calibration loop: comparable across machines
+            "min_norm": xs[0] / local_cal_s,
+        }
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "numpy": getattr(_np, "__version__", None),
+            "calibration_ms": calibration_s * 1000.0,
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+# Sub-millisecond timings are dominated by timer/scheduler noise and tiny
+# allocations by interpreter bookkeeping; gate only above these floors.
+MIN_GATED_MS = 0.5
+MEM_SLACK_KB = 16.0
+# Inputs too large for a stable latency gate (see the module docstring).
+LATENCY_UNGATED_INPUTS = ("synthetic_24h",)
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, mem_threshold: Optional[float] = None
+) -> List[str]:
+    """Regression messages for cases slower (calibrated best-of-runs) or hungrier (peak memory) than the baseline."""
+    mem_threshold = threshold if mem_threshold is None else mem_threshold
+    failures: List[str] = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        gated = base["min_ms"] >= MIN_GATED_MS and name.rsplit("/", 1)[-1] not in LATENCY_UNGATED_INPUTS
+        if gated and base["min_norm"] > 0 and cur["min_norm"] > base["min_norm"] * (1.0 + threshold):
+            failures.append(
+                f"{name}: latency {cur['min_norm']:.3f} vs baseline {base['min_norm']:.3f} (calibrated best-of-runs)"
+            )
+        if cur["peak_mem_kb"] > base["peak_mem_kb"] * (1.0 + mem_threshold) + MEM_SLACK_KB:
+            failures.append(f"{name}: peak memory {cur['peak_mem_kb']:.0f} KiB vs baseline {base['peak_mem_kb']:.0f} KiB")
+    return failures
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    meta = report["meta"]
+    print(f"python {meta['python']}  numpy {meta['numpy']}  calibration {meta['calibration_ms']:.1f} ms")
+    print(f"{'case':<48} {'beats':>7} {'beats/s':>12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'mem KiB':>9}")
+    for name, r in report["results"].items():
+        print(
+            f"{name:<48} {r['beats']:>7} {r['beats_per_s']:>12.0f} {r['p50_ms']:>9.3f} "
+            f"{r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['peak_mem_kb']:>9.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quick", action="store_true", help="skip the 1h/24h inputs")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regression vs the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--mem-threshold", type=float, default=0.10, help="allowed relative peak-memory growth")
+    parser.add_argument("--output", type=Path, help="also write this run's JSON here")
+    args = parser.parse_args()
+
+    report = run(quick=args.quick)
+    print_report(report)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nBaseline written to {args.baseline}")
+    if args.check:
+        if not args.baseline.exists():
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+            sys.exit(2)
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        failures = compare(report, baseline, args.threshold, args.mem_threshold)
+        if failures:
+            print("\nREGRESSIONS")
+            for f in failures:
+                print(f"  {f}")
+            sys.exit(1)
+        print("\nOK: no regressions beyond threshold")
+
+
+if __name__ == "__main__":
+    main()
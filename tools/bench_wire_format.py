@@ -0,0 +1,103 @@
+"""
+Bytes on the wire and server-side decode time of an observation: the JSON
+list of {ax, ay, az, timestamp} objects vs the compact column encoding
+(`cardioai_backend/scg/wire.py`, `encodeObservation()` in the frontend).
+
+Decode time is what `/api/chat` spends turning the body into SampleColumns:
+json.loads + SampleColumns.from_samples for JSON, json.loads +
+decode_observation for the compact form (multipart: decode of the raw part).
+
+Usage:
+  - Run: python tools/bench_wire_format.py [--repeat 20]
+"""
+
+import argparse
+import gzip
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+from cardioai_backend.scg.observation import SampleColumns  # noqa: E402
+from cardioai_backend.scg.wire import decode_observation, encode_observation, zstd_available  # noqa: E402
+
+DATA_FULL = REPO_ROOT / "tests" / "data_full.json"
+
+
+def recording(seconds: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Phone-like samples: ~100 Hz jittered ms timestamps, 1-decimal accel values."""
+    rng = np.random.default_rng(seed)
+    n = seconds * 100
+    ts = 1743256991352 + np.cumsum(rng.integers(8, 13, n))
+    t = np.arange(n) / 100.0
+    az = 9.8 + 0.3 * np.sin(2 * np.pi * 1.2 * t) + rng.normal(0, 0.05, n)
+    ax = -5.2 + rng.normal(0, 0.05, n)
+    ay = 0.3 + rng.normal(0, 0.05, n)
+    return [
+        {"ax": round(float(a), 1), "ay": round(float(b), 1), "az": round(float(c), 2), "timestamp": int(s)}
+        for a, b, c, s in zip(ax, ay, az, ts)
+    ]
+
+
+def time_ms(fn: Callable[[], Any], repeat: int) -> float:
+    fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000.0
+
+
+def variants(samples: List[Dict[str, Any]]) -> List[Tuple[str, bytes, Callable[[], Any]]]:
+    """(label, request body bytes, decode callable) per encoding."""
+    out: List[Tuple[str, bytes, Callable[[], Any]]] = []
+    body = json.dumps({"observation": {"az_data_array": samples}}).encode()
+    out.append(("json", body, lambda b=body: SampleColumns.from_samples(json.loads(b)["observation"]["az_data_array"])))
+    gz = gzip.compress(body, mtime=0)
+    out.append(
+        ("json+gzip (HTTP)", gz, lambda g=gz: SampleColumns.from_samples(json.loads(gzip.decompress(g))["observation"]["az_data_array"]))
+    )
+
+    compressions = ["none", "gzip"] + (["zstd"] if zstd_available() else [])
+    cols = SampleColumns.from_samples(samples)
+    for compression in compressions:
+        for scale, tag in ((None, "f32"), (0.001, "i16")):
+            enc = encode_observation(cols, compression=compression, accel_scale=scale)
+            body = json.dumps({"observation": enc}).encode()
+            out.append((f"b64 {tag} {compression}", body, lambda b=body: decode_observation(json.loads(b)["observation"])))
+            header, data = encode_observation(cols, compression=compression, accel_scale=scale, binary=True)
+            part = json.dumps({"observation": header}).encode()
+            out.append(
+                (f"multipart {tag} {compression}", part + data, lambda h=header, d=data: decode_observation(h, d))
+            )
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    inputs = [("data_full.json", json.loads(DATA_FULL.read_text(encoding="utf-8")))]
+    inputs += [(f"synthetic_{label}", recording(sec)) for label, sec in (("1min", 60), ("10min", 600), ("1h", 3600))]
+    for name, samples in inputs:
+        print(f"\n{name}: {len(samples)} samples")
+        print(f"{'encoding':<22} {'bytes':>11} {'vs json':>8} {'decode ms':>10}")
+        json_bytes = None
+        for label, body, decode in variants(samples):
+            json_bytes = json_bytes or len(body)
+            repeat = max(1, args.repeat // max(1, len(samples) // 6000))
+            ms = time_ms(decode, repeat)
+            print(f"{label:<22} {len(body):>11} {len(body) / json_bytes:>8.3f} {ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()